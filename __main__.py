@@ -1,12 +1,17 @@
 import pulumi
 import pulumi_aws as aws
 import json
+import hashlib
 from utils import tags
+from factories import service_role
+from lookups import region, account_id
 from dynamo import dynamo_table
 from lambda_function import upload_cv_lambda
 from s3 import cv_bucket
 from analyze_lambda import analyze_cv_lambda
 from notify_lambda import notify_lambda
+from export_lambda import export_lambda, analytics_bucket
+from results_lambda import results_lambda
 
 
 # Frontend infrastructure
@@ -114,19 +119,7 @@ frontend_cdn = aws.cloudfront.Distribution("frontend-cdn",
 )
 
 # 1. Crear el rol IAM para API Gateway CloudWatch logs
-api_gateway_log_role = aws.iam.Role("api-gateway-log-role",
-    assume_role_policy=json.dumps({
-        "Version": "2012-10-17",
-        "Statement": [{
-            "Action": "sts:AssumeRole",
-            "Principal": {
-                "Service": "apigateway.amazonaws.com"
-            },
-            "Effect": "Allow"
-        }]
-    }),
-    tags=tags
-)
+api_gateway_log_role = service_role("api-gateway-log-role", "apigateway.amazonaws.com")
 
 # 2. Adjuntar política para permitir escribir logs
 api_gateway_log_policy = aws.iam.RolePolicy("api-gateway-log-policy",
@@ -246,11 +239,77 @@ upload_cv_options_integration_response = aws.apigateway.IntegrationResponse("upl
     }
 )
 
+# Endpoints de lectura de resultados: GET /results?email=, /results/recent y /results/{cv_file+}.
+# Devuelven datos personales, por eso requieren API key.
+results_resource = aws.apigateway.Resource("results",
+    rest_api=rest_api.id,
+    parent_id=rest_api.root_resource_id,
+    path_part="results",
+)
+
+results_recent_resource = aws.apigateway.Resource("results-recent",
+    rest_api=rest_api.id,
+    parent_id=results_resource.id,
+    path_part="recent",
+)
+
+results_file_resource = aws.apigateway.Resource("results-file",
+    rest_api=rest_api.id,
+    parent_id=results_resource.id,
+    path_part="{cv_file+}",  # Greedy: las claves con prefijo (p. ej. backfills por carpeta) contienen "/"
+)
+
+# GET /matches?positions=&country=: mejores candidatos para un puesto, desde la matriz de matching
+matches_resource = aws.apigateway.Resource("matches",
+    rest_api=rest_api.id,
+    parent_id=rest_api.root_resource_id,
+    path_part="matches",
+)
+
+results_methods = []
+results_integrations = []
+for name, resource in [("results", results_resource),
+                       ("results-recent", results_recent_resource),
+                       ("results-file", results_file_resource),
+                       ("matches", matches_resource)]:
+    method = aws.apigateway.Method(f"{name}-get-method",
+        rest_api=rest_api.id,
+        resource_id=resource.id,
+        http_method="GET",
+        authorization="NONE",
+        api_key_required=True
+    )
+    results_methods.append(method)
+
+    results_integrations.append(aws.apigateway.Integration(f"{name}-get-integration",
+        rest_api=rest_api.id,
+        resource_id=resource.id,
+        http_method=method.http_method,
+        integration_http_method="POST",
+        type="AWS_PROXY",
+        uri=results_lambda.invoke_arn
+    ))
+
+# Hash de rutas, métodos e integraciones: si cambia, el Deployment se reemplaza y el stage
+# prod publica los endpoints nuevos (depends_on solo ordena, no fuerza un redeploy)
+api_redeployment_hash = pulumi.Output.all(
+    *[resource.id for resource in [upload_cv_resource, results_resource, results_recent_resource,
+                                   results_file_resource, matches_resource]],
+    *[method.id for method in results_methods],
+    *[method.api_key_required for method in results_methods],
+    *[integration.id for integration in [upload_cv_integration, *results_integrations]],
+    *[integration.uri for integration in [upload_cv_integration, *results_integrations]]
+).apply(lambda values: hashlib.sha1(json.dumps(values, sort_keys=True).encode()).hexdigest())
+
 # 5. Deployment y Stage con logging habilitado (después de la configuración de la cuenta)
 api_deployment = aws.apigateway.Deployment("api-deployment",
     rest_api=rest_api.id,
+    triggers={
+        "redeployment": api_redeployment_hash
+    },
     opts=pulumi.ResourceOptions(depends_on=[
         upload_cv_integration,
+        *results_integrations,
         account_settings  # Aseguramos que la cuenta esté configurada primero
     ])
 )
@@ -261,7 +320,7 @@ api_stage = aws.apigateway.Stage("prod",
     stage_name="prod",
     xray_tracing_enabled=True,
     access_log_settings={
-        "destination_arn": pulumi.Output.concat("arn:aws:logs:", aws.get_region().name, ":", aws.get_caller_identity().account_id, ":log-group:/aws/api-gateway/", rest_api.name),
+        "destination_arn": pulumi.Output.concat("arn:aws:logs:", region(), ":", account_id(), ":log-group:/aws/api-gateway/", rest_api.name),
         "format": json.dumps({
             "requestId": "$context.requestId",
             "ip": "$context.identity.sourceIp",
@@ -307,6 +366,44 @@ lambda_permission = aws.lambda_.Permission("api-gateway-permission",
     source_arn=pulumi.Output.concat(rest_api.execution_arn, "/*/*/upload-cv")
 )
 
+results_lambda_permission = aws.lambda_.Permission("results-api-gateway-permission",
+    action="lambda:InvokeFunction",
+    function=results_lambda.name,
+    principal="apigateway.amazonaws.com",
+    source_arn=pulumi.Output.concat(rest_api.execution_arn, "/*/GET/results*")
+)
+
+results_matches_permission = aws.lambda_.Permission("results-matches-api-gateway-permission",
+    action="lambda:InvokeFunction",
+    function=results_lambda.name,
+    principal="apigateway.amazonaws.com",
+    source_arn=pulumi.Output.concat(rest_api.execution_arn, "/*/GET/matches")
+)
+
+# API key y plan de uso para los endpoints de resultados
+results_api_key = aws.apigateway.ApiKey("results-api-key",
+    description="Key for the SillarCV results endpoints",
+    tags=tags
+)
+
+results_usage_plan = aws.apigateway.UsagePlan("results-usage-plan",
+    api_stages=[{
+        "api_id": rest_api.id,
+        "stage": api_stage.stage_name
+    }],
+    throttle_settings={
+        "burst_limit": 100,
+        "rate_limit": 50
+    },
+    tags=tags
+)
+
+results_usage_plan_key = aws.apigateway.UsagePlanKey("results-usage-plan-key",
+    key_id=results_api_key.id,
+    key_type="API_KEY",
+    usage_plan_id=results_usage_plan.id
+)
+
 # Add Lambda trigger for CV analysis
 cv_bucket_notification = aws.s3.BucketNotification("cv-bucket-notification",
     bucket=cv_bucket.id,
@@ -325,12 +422,13 @@ pulumi.export("dynamodb_table", dynamo_table.name)
 pulumi.export("lambda_name", upload_cv_lambda.name)
 pulumi.export("analyze_lambda_name", analyze_cv_lambda.name)
 pulumi.export("notify_lambda_name", notify_lambda.name)
+pulumi.export("results_api_key", pulumi.Output.secret(results_api_key.value))
 pulumi.export("api_url",
     pulumi.Output.concat(
         "https://",
         rest_api.id,
         ".execute-api.",
-        aws.get_region().name,
+        region(),
         ".amazonaws.com/prod/upload-cv"
     )
 )
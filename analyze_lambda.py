@@ -1,9 +1,11 @@
 import pulumi
 import pulumi_aws as aws
 import json
+from factories import lambda_role, lambda_function
 from utils import tags
+from lookups import config, profile_variables
 from vpc import vpc, private_subnet_ids, security_group_id
-from dynamo import dynamo_table
+from dynamo import dynamo_table, lsh_table, lane_slots_table, deferred_table, llm_cache_table
 
 # Create Lambda layer for dependencies
 analyze_cv_layer = aws.lambda_.LayerVersion("analyze-cv-layer",
@@ -13,42 +15,100 @@ analyze_cv_layer = aws.lambda_.LayerVersion("analyze-cv-layer",
     description="Dependencies for CV analysis: pdfplumber, openai"
 )
 
+# Optional layer with a tesseract binary for the OCR fallback on scanned CVs
+tesseract_layer_arn = config.get("tesseract_layer_arn")
+
 # Create IAM role for the Lambda
-analyze_cv_role = aws.iam.Role("analyze-cv-role",
-    assume_role_policy=json.dumps({
-        "Version": "2012-10-17",
-        "Statement": [{
-            "Action": "sts:AssumeRole",
-            "Principal": {
-                "Service": "lambda.amazonaws.com"
-            },
-            "Effect": "Allow"
-        }]
-    }),
-    tags=tags
-)
+analyze_cv_role = lambda_role("analyze-cv-role")
 
 # Add necessary policies to the role
 analyze_cv_policy = aws.iam.RolePolicy("analyze-cv-policy",
     role=analyze_cv_role.id,
-    policy=pulumi.Output.all(dynamo_table.name).apply(
+    policy=pulumi.Output.all(dynamo_table.name, lsh_table.name, lane_slots_table.name, deferred_table.name,
+                             llm_cache_table.name).apply(
         lambda args: json.dumps({
             "Version": "2012-10-17",
             "Statement": [
                 {
                     "Effect": "Allow",
                     "Action": [
-                        "s3:GetObject"
+                        "s3:GetObject",
+                        "s3:GetObjectVersion",  # Lecturas fijadas a la versión medida con HEAD
+                        "s3:GetObjectTagging"  # Tag "profile=true" activa el profiling
                     ],
                     "Resource": "arn:aws:s3:::mis-postulaciones-cv/*"
                 },
                 {
                     "Effect": "Allow",
                     "Action": [
-                        "dynamodb:PutItem"
+                        "s3:PutObject"
+                    ],
+                    "Resource": "arn:aws:s3:::mis-postulaciones-cv/profiles/*"
+                },
+                {
+                    "Effect": "Allow",
+                    "Action": [
+                        "s3:ListBucketVersions"  # Modo backfill
+                    ],
+                    "Resource": "arn:aws:s3:::mis-postulaciones-cv"
+                },
+                {
+                    "Effect": "Allow",
+                    "Action": [
+                        "dynamodb:PutItem",
+                        "dynamodb:GetItem",
+                        "dynamodb:BatchGetItem",
+                        "dynamodb:BatchWriteItem",
+                        "dynamodb:Query"
                     ],
                     "Resource": f"arn:aws:dynamodb:*:*:table/{args[0]}"
                 },
+                {
+                    "Effect": "Allow",
+                    "Action": [
+                        "dynamodb:Query",
+                        "dynamodb:BatchGetItem",
+                        "dynamodb:BatchWriteItem"
+                    ],
+                    "Resource": f"arn:aws:dynamodb:*:*:table/{args[1]}"
+                },
+                {
+                    "Effect": "Allow",
+                    "Action": [
+                        "dynamodb:PutItem",
+                        "dynamodb:DeleteItem"
+                    ],
+                    "Resource": f"arn:aws:dynamodb:*:*:table/{args[2]}"
+                },
+                {
+                    "Effect": "Allow",
+                    "Action": [
+                        "dynamodb:GetItem",
+                        "dynamodb:PutItem",
+                        "dynamodb:UpdateItem",
+                        "dynamodb:DeleteItem",
+                        "dynamodb:Query"
+                    ],
+                    "Resource": [
+                        f"arn:aws:dynamodb:*:*:table/{args[3]}",
+                        f"arn:aws:dynamodb:*:*:table/{args[3]}/index/PendingIndex"
+                    ]
+                },
+                {
+                    "Effect": "Allow",
+                    "Action": [
+                        "dynamodb:GetItem",
+                        "dynamodb:PutItem"
+                    ],
+                    "Resource": f"arn:aws:dynamodb:*:*:table/{args[4]}"
+                },
+                {
+                    "Effect": "Allow",
+                    "Action": [
+                        "lambda:InvokeFunction"  # Continuación de backfills que no entran en una invocación
+                    ],
+                    "Resource": "arn:aws:lambda:*:*:function:analyze-cv-lambda-*"
+                },
                 {
                     "Effect": "Allow",
                     "Action": [
@@ -73,27 +133,45 @@ analyze_cv_policy = aws.iam.RolePolicy("analyze-cv-policy",
 )
 
 # Create the Lambda function
-analyze_cv_lambda = aws.lambda_.Function("analyze-cv-lambda",
-    runtime="python3.9",
-    handler="analyze_cv.lambda_handler",
-    role=analyze_cv_role.arn,
-    code=pulumi.AssetArchive({
-        ".": pulumi.FileArchive("./lambdas")
-    }),
-    layers=[analyze_cv_layer.arn],
+analyze_cv_lambda = lambda_function("analyze-cv-lambda", "analyze_cv.lambda_handler", analyze_cv_role,
+    layers=[analyze_cv_layer.arn] + ([tesseract_layer_arn] if tesseract_layer_arn else []),
     timeout=300,  # 5 minutes
     memory_size=512,
-    environment={
-        "variables": {
-            "OPENAI_API_KEY": pulumi.Config().require_secret("openai_api_key"),
-            "DYNAMODB_TABLE": dynamo_table.name
-        }
+    ephemeral_storage={
+        "size": 1024  # MB en /tmp para PDFs grandes
     },
     vpc_config={
         "subnet_ids": private_subnet_ids,
         "security_group_ids": [security_group_id]
     },
-    tags=tags
+    variables={
+        "OPENAI_API_KEY": config.require_secret("openai_api_key"),
+        "DYNAMODB_TABLE": dynamo_table.name,
+        "LSH_TABLE": lsh_table.name,
+        "LANE_SLOTS_TABLE": lane_slots_table.name,
+        "SCHEDULER_LANE_LIMITS": "interactive=3,bulk=6,reprocess=1",
+        "DEFERRED_TABLE": deferred_table.name,
+        "LLM_CACHE_TABLE": llm_cache_table.name,
+        "LLM_CACHE_TTL_SECONDS": str(7 * 24 * 3600),
+        "BREAKER_FAILURE_THRESHOLD": "5",
+        "BREAKER_OPEN_SECONDS": "60",
+        "DRAIN_BATCH_SIZE": "20",
+        "BATCH_FLUSH_SIZE": "10",
+        "BATCH_MIN_SECONDS": "60",
+        **profile_variables,
+        "NEAR_DUP_THRESHOLD": "0.85",
+        "NEAR_DUP_ACTION": "link",
+        "TIKTOKEN_CACHE_DIR": "/opt/tiktoken_cache",  # BPE incluido en el layer
+        "LLM_DEADLINE_MARGIN_SECONDS": "15",
+        "LLM_HEDGE_PERCENTILE": "95",
+        "TESSERACT_CMD": "/opt/bin/tesseract",
+        "OCR_DPI": "200",
+        "OCR_MAX_PAGES": "5",
+        "OCR_PAGE_TIMEOUT_SECONDS": "20",
+        "PDF_SPILL_THRESHOLD_BYTES": str(8 * 1024 * 1024),
+        "PDF_RANGE_THRESHOLD_BYTES": str(32 * 1024 * 1024),
+        "PDF_RANGE_MAX_PAGES": "5"
+    }
 )
 
 # Allow S3 to invoke the Lambda
@@ -104,5 +182,24 @@ s3_lambda_permission = aws.lambda_.Permission("analyze-cv-s3-permission",
     source_arn=f"arn:aws:s3:::mis-postulaciones-cv"
 )
 
+# Drenado de los CVs diferidos cuando el circuit breaker está cerrado o semiabierto
+drain_rule = aws.cloudwatch.EventRule("analyze-cv-drain-rule",
+    schedule_expression="rate(1 minute)",
+    tags=tags
+)
+
+drain_target = aws.cloudwatch.EventTarget("analyze-cv-drain-target",
+    rule=drain_rule.name,
+    arn=analyze_cv_lambda.arn,
+    input=json.dumps({"drain": {}})
+)
+
+drain_permission = aws.lambda_.Permission("analyze-cv-drain-permission",
+    action="lambda:InvokeFunction",
+    function=analyze_cv_lambda.name,
+    principal="events.amazonaws.com",
+    source_arn=drain_rule.arn
+)
+
 # Export the Lambda ARN
 pulumi.export("analyze_cv_lambda_arn", analyze_cv_lambda.arn)
\ No newline at end of file
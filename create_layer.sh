@@ -5,18 +5,24 @@ set -e
 
 echo "Building Lambda layer..."
 
+# Packages that are not shipped in the layer:
+# - boto3/botocore/s3transfer/jmespath ya vienen en el runtime de Lambda
+# - httpx y sus dependencias no se importan desde openai==0.28
+EXCLUDED_PACKAGES="boto3 botocore s3transfer jmespath httpx httpcore h11 rfc3986"
+
 # Create temporary Dockerfile
 cat << 'EOF' > Dockerfile.tmp
 FROM public.ecr.aws/lambda/python:3.9
 
 # Install system dependencies
-RUN yum install -y gcc gcc-c++ python3-devel libffi-devel openssl-devel make
+RUN yum install -y gcc gcc-c++ python3-devel libffi-devel openssl-devel make zip binutils findutils
 
 # Set working directory
 WORKDIR /layer
 
-# Copy requirements file
+# Copy requirements file and the analyze function (for the import-time report)
 COPY requirements.txt .
+COPY lambdas/ /function/
 
 # Create python directory structure for the layer
 RUN mkdir -p python/lib/python3.9/site-packages
@@ -27,25 +33,73 @@ RUN pip install --platform manylinux2014_x86_64 \
     --implementation cp \
     --python 3.9 \
     --only-binary=:all: \
+    --no-compile \
     --target python/lib/python3.9/site-packages \
     -r requirements.txt
 
+# Bundle the tiktoken BPE files (cl100k_base for gpt-3.5/gpt-4, o200k_base for gpt-4o);
+# without them tiktoken downloads them at runtime, which fails in the VPC or any
+# sandbox without egress. Extracted to /opt/tiktoken_cache.
+RUN PYTHONPATH=python/lib/python3.9/site-packages TIKTOKEN_CACHE_DIR=/layer/tiktoken_cache \
+    python -c "import tiktoken; [tiktoken.get_encoding(name) for name in ('cl100k_base', 'o200k_base')]" && \
+    test "$(ls -A /layer/tiktoken_cache | wc -l)" -ge 2
+
+# Tree-shake: packages provided by the runtime or never imported, tests, docs and stubs.
+# Only strip may fail (some .so* are not ELF files); any other error stops the build.
+ARG EXCLUDED_PACKAGES
+RUN cd python/lib/python3.9/site-packages && \
+    for pkg in $EXCLUDED_PACKAGES; do \
+        rm -rf "$pkg" "$pkg"-*.dist-info; \
+    done && \
+    find . -type d \( -name tests -o -name test -o -name __pycache__ \) -prune -exec rm -rf {} + && \
+    find . -type f \( -name "*.pyi" -o -name "*.pyx" -o -name "*.c" -o -name "*.h" \) -delete && \
+    find . -type f -name "*.so*" -exec sh -c 'strip --strip-unneeded "$@" 2>/dev/null || true' sh {} +
+
+# Precompile: /opt is read-only at runtime, so without these every cold start compiles from source.
+# unchecked-hash pycs stay valid regardless of the timestamps stored in the zip.
+RUN python -m compileall -q -j 0 --invalidation-mode unchecked-hash python/lib/python3.9/site-packages
+
+# Import-time report for analyze_cv, sorted by cumulative microseconds
+RUN cd /function && \
+    PYTHONPATH=/layer/python/lib/python3.9/site-packages:/function:/var/runtime \
+    AWS_DEFAULT_REGION=us-east-1 OPENAI_API_KEY=importtime DYNAMODB_TABLE=importtime \
+    LSH_TABLE=importtime LANE_SLOTS_TABLE=importtime DEFERRED_TABLE=importtime LLM_CACHE_TABLE=importtime \
+    TIKTOKEN_CACHE_DIR=/layer/tiktoken_cache \
+    python -X importtime -c "import analyze_cv" 2> /layer/importtime.raw && \
+    grep '^import time:' /layer/importtime.raw | grep -v 'self \[us\]' | \
+    awk -F'|' '{gsub(/import time: */, "", $1); printf "%10d %10d %s\n", $2, $1, $3}' | \
+    sort -rn > /layer/importtime-report.txt
+
 # Create the layer zip file
-RUN zip -r layer.zip python/
+RUN zip -qr9 layer.zip python/ tiktoken_cache/
 EOF
 
 # Build the Docker image with platform specification
-docker build --platform linux/amd64 -t lambda-layer-builder -f Dockerfile.tmp .
+docker build --platform linux/amd64 \
+    --build-arg EXCLUDED_PACKAGES="$EXCLUDED_PACKAGES" \
+    -t lambda-layer-builder -f Dockerfile.tmp .
 
 # Create a container from the image
 container_id=$(docker create lambda-layer-builder)
 
-# Copy the layer.zip from the container
+# Copy the layer.zip and the import-time report from the container
 docker cp $container_id:/layer/layer.zip .
+docker cp $container_id:/layer/importtime-report.txt .
 
 # Clean up
 docker rm $container_id
 rm Dockerfile.tmp
 
+# Track size and import cost across builds
+layer_size=$(stat -c %s layer.zip 2>/dev/null || stat -f %z layer.zip)
+total_import_us=$(awk '$3 == "analyze_cv" {print $1}' importtime-report.txt)
+if [ ! -f layer-build-history.csv ]; then
+    echo "date,commit,layer_bytes,analyze_cv_import_us" > layer-build-history.csv
+fi
+echo "$(date -u +%Y-%m-%dT%H:%M:%SZ),$(git rev-parse --short HEAD 2>/dev/null || echo unknown),$layer_size,$total_import_us" >> layer-build-history.csv
+
 echo "Lambda layer has been built successfully!"
-echo "The layer.zip file is ready to be uploaded to AWS Lambda."
\ No newline at end of file
+echo "The layer.zip file is ready to be uploaded to AWS Lambda."
+echo "Layer size: $layer_size bytes, analyze_cv import time: ${total_import_us} us"
+echo "Slowest imports (cumulative us, self us, module):"
+head -n 15 importtime-report.txt
@@ -8,13 +8,15 @@ dynamo_table = aws.dynamodb.Table("applications",
         {"name": "cv_file", "type": "S"},  # Primary key - S3 key of the CV file
         {"name": "analyzed_at", "type": "S"},  # Sort key - Lambda ARN + timestamp
         {"name": "name", "type": "S"},  # For the NameIndex
-        {"name": "email", "type": "S"}   # For the EmailIndex
+        {"name": "email", "type": "S"},   # For the EmailIndex
+        {"name": "entity", "type": "S"},  # For the RecentIndex (constant "application")
+        {"name": "created_at", "type": "S"}  # For the RecentIndex - ISO timestamp
     ],
     hash_key="cv_file",
     range_key="analyzed_at",
     billing_mode="PAY_PER_REQUEST",
     stream_enabled=True,
-    stream_view_type="NEW_IMAGE",  # Solo necesitamos la nueva imagen del registro
+    stream_view_type="NEW_AND_OLD_IMAGES",  # La imagen anterior invalida la caché del email previo
     global_secondary_indexes=[
         {
             "name": "EmailIndex",
@@ -31,6 +33,14 @@ dynamo_table = aws.dynamodb.Table("applications",
             "projection_type": "ALL",
             "read_capacity": 0,
             "write_capacity": 0
+        },
+        {
+            "name": "RecentIndex",
+            "hash_key": "entity",
+            "range_key": "created_at",
+            "projection_type": "ALL",
+            "read_capacity": 0,
+            "write_capacity": 0
         }
     ],
     tags=tags
@@ -38,3 +48,78 @@ dynamo_table = aws.dynamodb.Table("applications",
 
 # Export the stream ARN for use in the notification Lambda
 pulumi.export("dynamo_stream_arn", dynamo_table.stream_arn)
+
+# Índice LSH para detectar CVs casi duplicados (bandas MinHash + firmas)
+lsh_table = aws.dynamodb.Table("cv-lsh-index",
+    attributes=[
+        {"name": "band", "type": "S"},  # "<banda>:<hash>" o "signature"
+        {"name": "cv_file", "type": "S"}
+    ],
+    hash_key="band",
+    range_key="cv_file",
+    billing_mode="PAY_PER_REQUEST",
+    tags=tags
+)
+
+pulumi.export("lsh_table", lsh_table.name)
+
+# Generaciones por clave de caché; notify las incrementa y la API de resultados las compara
+cache_generations_table = aws.dynamodb.Table("api-cache-generations",
+    attributes=[
+        {"name": "cache_key", "type": "S"}  # "file#<cv_file>", "email#<email>" o "recent"
+    ],
+    hash_key="cache_key",
+    billing_mode="PAY_PER_REQUEST",
+    tags=tags
+)
+
+# Slots de concurrencia por carril (interactive, bulk, reprocess) para las llamadas a OpenAI
+lane_slots_table = aws.dynamodb.Table("analysis-lane-slots",
+    attributes=[
+        {"name": "slot", "type": "S"}  # "<carril>#<n>"
+    ],
+    hash_key="slot",
+    billing_mode="PAY_PER_REQUEST",
+    ttl={
+        "attribute_name": "expires_at",
+        "enabled": True
+    },
+    tags=tags
+)
+
+# Caché compartida de respuestas del LLM entre contenedores, expira por TTL (7 días)
+llm_cache_table = aws.dynamodb.Table("llm-response-cache",
+    attributes=[
+        {"name": "cache_key", "type": "S"}  # sha256 de modelo, prompt, parámetros y texto del CV
+    ],
+    hash_key="cache_key",
+    billing_mode="PAY_PER_REQUEST",
+    ttl={
+        "attribute_name": "expires_at",
+        "enabled": True
+    },
+    tags=tags
+)
+
+# Análisis diferidos mientras OpenAI está caído ("pending#<cv_file>") y estado del circuit breaker ("breaker#openai")
+deferred_table = aws.dynamodb.Table("analysis-deferred",
+    attributes=[
+        {"name": "pk", "type": "S"},
+        {"name": "queue", "type": "S"},  # Para el PendingIndex (constante "pending", solo en los pendientes)
+        {"name": "deferred_at", "type": "S"}  # Para el PendingIndex - ISO timestamp
+    ],
+    hash_key="pk",
+    billing_mode="PAY_PER_REQUEST",
+    global_secondary_indexes=[
+        {
+            # Índice disperso y solo de claves: el drenado no lee el texto comprimido
+            "name": "PendingIndex",
+            "hash_key": "queue",
+            "range_key": "deferred_at",
+            "projection_type": "KEYS_ONLY",
+            "read_capacity": 0,
+            "write_capacity": 0
+        }
+    ],
+    tags=tags
+)
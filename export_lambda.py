@@ -0,0 +1,133 @@
+import pulumi
+import pulumi_aws as aws
+import json
+from utils import tags
+from factories import lambda_role, lambda_function
+from lookups import config, region
+from dynamo import dynamo_table
+
+# Bucket para la exportación columnar (Parquet) de la tabla applications
+analytics_bucket = aws.s3.Bucket("analytics-bucket",
+    bucket=f"sillar-cv-analytics-{pulumi.get_stack()}",
+    acl="private",
+    force_destroy=True,
+    server_side_encryption_configuration={
+        "rule": {
+            "apply_server_side_encryption_by_default": {
+                "sse_algorithm": "AES256"
+            }
+        }
+    },
+    tags=tags
+)
+
+analytics_bucket_public_access_block = aws.s3.BucketPublicAccessBlock("analytics-bucket-public-access-block",
+    bucket=analytics_bucket.id,
+    block_public_acls=True,
+    block_public_policy=True,
+    ignore_public_acls=True,
+    restrict_public_buckets=True
+)
+
+# pyarrow es demasiado grande para la capa de analyze; usamos la capa pública AWS SDK for pandas
+pyarrow_layer_arn = config.get("pyarrow_layer_arn") or \
+    f"arn:aws:lambda:{region()}:336392948345:layer:AWSSDKPandas-Python39:20"
+
+# Create IAM role for the Lambda
+export_lambda_role = lambda_role("export-lambda-role")
+
+# Add necessary policies to the role
+export_lambda_policy = aws.iam.RolePolicy("export-lambda-policy",
+    role=export_lambda_role.id,
+    policy=pulumi.Output.all(stream_arn=dynamo_table.stream_arn, bucket_arn=analytics_bucket.arn).apply(
+        lambda values: json.dumps({
+            "Version": "2012-10-17",
+            "Statement": [
+                {
+                    "Effect": "Allow",
+                    "Action": [
+                        "s3:PutObject",
+                        "s3:GetObject",
+                        "s3:DeleteObject"
+                    ],
+                    "Resource": f"{values['bucket_arn']}/*"
+                },
+                {
+                    "Effect": "Allow",
+                    "Action": [
+                        "s3:ListBucket"
+                    ],
+                    "Resource": values['bucket_arn']
+                },
+                {
+                    "Effect": "Allow",
+                    "Action": [
+                        "dynamodb:GetRecords",
+                        "dynamodb:GetShardIterator",
+                        "dynamodb:DescribeStream",
+                        "dynamodb:ListStreams"
+                    ],
+                    "Resource": [
+                        values['stream_arn']
+                    ]
+                },
+                {
+                    "Effect": "Allow",
+                    "Action": [
+                        "logs:CreateLogGroup",
+                        "logs:CreateLogStream",
+                        "logs:PutLogEvents"
+                    ],
+                    "Resource": "arn:aws:logs:*:*:*"
+                }
+            ]
+        })
+    )
+)
+
+# Create the Lambda function
+export_lambda = lambda_function("export-lambda", "export_columnar.lambda_handler", export_lambda_role,
+    layers=[pyarrow_layer_arn],
+    timeout=300,
+    memory_size=1024,
+    # Un solo escritor para la matriz de candidatos (lectura-modificación-escritura en S3)
+    reserved_concurrent_executions=1,
+    variables={
+        "EXPORT_BUCKET": analytics_bucket.bucket,
+        "EXPORT_PREFIX": "applications",
+        "MATCH_MATRIX_KEY": "matching/candidates.npz"
+    }
+)
+
+# Segundo consumidor del stream: lotes grandes para escribir pocos archivos
+export_stream_trigger = aws.lambda_.EventSourceMapping("export-stream-trigger",
+    event_source_arn=dynamo_table.stream_arn,
+    function_name=export_lambda.name,
+    starting_position="TRIM_HORIZON",
+    batch_size=1000,
+    maximum_batching_window_in_seconds=300,
+    maximum_retry_attempts=5
+)
+
+# Compactación diaria de las particiones pequeñas
+export_compaction_rule = aws.cloudwatch.EventRule("export-compaction-rule",
+    schedule_expression="cron(30 3 * * ? *)",
+    tags=tags
+)
+
+export_compaction_target = aws.cloudwatch.EventTarget("export-compaction-target",
+    rule=export_compaction_rule.name,
+    arn=export_lambda.arn,
+    input=json.dumps({"compact": True})
+)
+
+export_compaction_permission = aws.lambda_.Permission("export-compaction-permission",
+    action="lambda:InvokeFunction",
+    function=export_lambda.name,
+    principal="events.amazonaws.com",
+    source_arn=export_compaction_rule.arn
+)
+
+# Export the Lambda ARN and bucket
+pulumi.export("export_lambda_arn", export_lambda.arn)
+pulumi.export("analytics_bucket_name", analytics_bucket.bucket)
@@ -0,0 +1,53 @@
+import pulumi
+import pulumi_aws as aws
+import json
+from typing import Any, Dict, Optional
+from utils import tags
+
+
+def assume_role_policy(service: str) -> str:
+    return json.dumps({
+        "Version": "2012-10-17",
+        "Statement": [{
+            "Action": "sts:AssumeRole",
+            "Principal": {
+                "Service": service
+            },
+            "Effect": "Allow"
+        }]
+    })
+
+
+def service_role(name: str, service: str) -> aws.iam.Role:
+    """
+    IAM role that `service` can assume
+    """
+    return aws.iam.Role(name,
+        assume_role_policy=assume_role_policy(service),
+        tags=tags
+    )
+
+
+def lambda_role(name: str) -> aws.iam.Role:
+    return service_role(name, "lambda.amazonaws.com")
+
+
+def lambda_function(name: str, handler: str, role: aws.iam.Role,
+                    variables: Optional[Dict[str, Any]] = None, **kwargs: Any) -> aws.lambda_.Function:
+    """
+    Lambda packaged from ./lambdas with the project runtime and tags.
+    Extra arguments (timeout, memory_size, layers, vpc_config...) are passed through.
+    """
+    return aws.lambda_.Function(name,
+        runtime="python3.9",
+        handler=handler,
+        role=role.arn,
+        code=pulumi.AssetArchive({
+            ".": pulumi.FileArchive("./lambdas")
+        }),
+        environment={
+            "variables": variables
+        } if variables else None,
+        tags=tags,
+        **kwargs
+    )
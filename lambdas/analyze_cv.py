@@ -4,8 +4,27 @@ import os
 import logging
 import pdfplumber
 import io
+import time
 import openai
-from typing import Dict, Any, List
+from decimal import Decimal
+from datetime import datetime, timezone
+from boto3.dynamodb.conditions import Key
+from typing import Dict, Any, List, Tuple, Union, BinaryIO, Optional
+from llm_cache import CachingLLMClient, DynamoCache
+from pdf_fetch import open_s3_pdf, RANGE_MAX_PAGES
+from s3_range import S3RangeFile
+from ocr import ocr_missing_pages
+from text_normalize import normalize_pages, normalization_stats
+from token_router import choose_route, merge_results, record_usage, OUTPUT_TOKENS
+from near_duplicate import LSHIndex, minhash_signature
+from cv_schema import parse_model_json, validate_cv_info, local_repairs, cacheable_output, reask_prompt, contact_fields, CVOutputError, metrics as schema_metrics
+from deadline import HedgedCaller, DeadlineExceeded
+from idempotency import source_version, already_processed, put_item_once, filter_processed, batch_put_items
+from scheduler import FairQueue, LaneSlots, classify, DEFAULT_TENANT, metrics as scheduler_metrics
+from circuit_breaker import CircuitBreaker, BreakerOpen, OPEN, HALF_OPEN
+from deferred import PendingQueue, AnalysisDeferred
+from taxonomy import normalize_recommendations
+from profiling import profiled
 
 # Configure logging
 logger = logging.getLogger()
@@ -15,17 +34,101 @@ logger.setLevel(logging.INFO)
 s3_client = boto3.client('s3')
 openai.api_key = os.environ['OPENAI_API_KEY']
 
-def extract_text_from_pdf(pdf_content: bytes) -> str:
+# Near-duplicate index; "link" reuses the earlier analysis (with the contact details
+# read from the new CV), "reprocess" calls the LLM again
+lsh_index = LSHIndex(boto3.client('dynamodb'), os.environ['LSH_TABLE'])
+NEAR_DUP_ACTION = os.environ.get('NEAR_DUP_ACTION', 'link')
+
+# Per-lane concurrency limit on OpenAI calls, shared by all containers
+lane_slots = LaneSlots(boto3.client('dynamodb'), os.environ['LANE_SLOTS_TABLE'])
+
+# Provider errors count against the circuit breaker; running out of the
+# invocation budget does not, but both defer the CV instead of failing it
+LLM_PROVIDER_ERRORS = (openai.error.OpenAIError, DeadlineExceeded)
+
+# While OpenAI is degraded, extracted text is parked and drained later at a bounded rate
+deferred_table = boto3.resource('dynamodb').Table(os.environ['DEFERRED_TABLE'])
+llm_breaker = CircuitBreaker(deferred_table, failure_types=(openai.error.OpenAIError,))
+pending_queue = PendingQueue(deferred_table)
+DRAIN_BATCH_SIZE = int(os.environ.get('DRAIN_BATCH_SIZE', '20'))
+DRAIN_MAX_ATTEMPTS = int(os.environ.get('DRAIN_MAX_ATTEMPTS', '5'))
+
+# Batches store results every BATCH_FLUSH_SIZE analyses, and hand the rest of
+# the work to a fresh invocation once less than BATCH_MIN_SECONDS of budget
+# is left, so a long backfill never loses analyses that were already paid for
+BATCH_FLUSH_SIZE = int(os.environ.get('BATCH_FLUSH_SIZE', '10'))
+BATCH_MIN_SECONDS = float(os.environ.get('BATCH_MIN_SECONDS', '60'))
+MAX_CONTINUATIONS = int(os.environ.get('MAX_CONTINUATIONS', '50'))
+lambda_client = boto3.client('lambda')
+
+# Static prompt prefix. It must stay byte-identical between calls so the
+# provider can reuse its cached prefix; the CV text is always appended last.
+SYSTEM_PROMPT = "You are a CV analysis expert. Extract information from CVs accurately and format it as JSON."
+
+INSTRUCTIONS = """Please analyze this CV and extract the following information in a structured format:
+1. The full name of the candidate
+2. A list of recommended positions based on their experience and skills (maximum 5 positions)
+3. Their email address
+4. Their phone number
+5. Their country of residence
+
+Please respond ONLY with a JSON object in this exact format:
+{
+    "name": "full name",
+    "recommendations": ["position1", "position2", ...],
+    "email": "email address",
+    "phone": "phone number",
+    "country": "country name"
+}"""
+
+def has_json_content(response: Any) -> bool:
+    """
+    Cheap check used to pick the first usable response among hedged attempts
+    """
+    content = response.choices[0].message.get('content') or ''
+    return '{' in content
+
+# OpenAI calls get a per-invocation deadline and a hedged duplicate when slow
+llm_caller = HedgedCaller(openai.ChatCompletion.create, is_valid=has_json_content)
+
+# Responses are cached per container (memory) and in DynamoDB (shared by all containers)
+llm_client = CachingLLMClient(
+    llm_caller,
+    system_prompt=SYSTEM_PROMPT,
+    instructions=INSTRUCTIONS,
+    shared_cache=DynamoCache(boto3.resource('dynamodb').Table(os.environ['LLM_CACHE_TABLE'])),
+    parse=parse_model_json,
+    cacheable=cacheable_output
+)
+
+def extract_text_from_pdf(pdf_content: Union[bytes, BinaryIO], max_pages: Optional[int] = None) -> str:
     """
-    Extract text from PDF content using pdfplumber
+    Extract text from PDF content (bytes or a seekable file object) using
+    pdfplumber and compact it before prompting
     """
     try:
         text_content = []
-        with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
+        if isinstance(pdf_content, bytes):
+            pdf_content = io.BytesIO(pdf_content)
+        pages = list(range(1, max_pages + 1)) if max_pages else None
+        with pdfplumber.open(pdf_content, pages=pages) as pdf:
             for page in pdf.pages:
                 text_content.append(page.extract_text())
 
-        return "\n".join(text_content)
+            # Scanned pages have no text layer; OCR only those pages
+            text_content = ocr_missing_pages(pdf.pages, text_content)
+
+        started = time.perf_counter()
+        normalized = normalize_pages(text_content)
+        stats = normalization_stats("\n".join(page or "" for page in text_content), normalized,
+                                    time.perf_counter() - started)
+        logger.info(f"Normalized CV text: {json.dumps(stats)}")
+
+        # Don't spend an LLM call on an empty prompt
+        if not normalized:
+            raise ValueError("No text could be extracted from the PDF")
+
+        return normalized
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {str(e)}")
         raise
@@ -35,96 +138,437 @@ def extract_cv_info(cv_text: str) -> Dict[str, Any]:
     Extract relevant information from CV text using OpenAI API.
     """
     try:
-        # Create a prompt that will help GPT extract the required information
-        prompt = f"""Please analyze this CV and extract the following information in a structured format:
-        1. The full name of the candidate
-        2. A list of recommended positions based on their experience and skills (maximum 5 positions)
-        3. Their email address
-        4. Their phone number
-        5. Their country of residence
-
-        CV Text:
-        {cv_text}
-
-        Please respond ONLY with a JSON object in this exact format:
-        {{
-            "name": "full name",
-            "recommendations": ["position1", "position2", ...],
-            "email": "email address",
-            "phone": "phone number",
-            "country": "country name"
-        }}
-        """
-
-        # Call OpenAI API
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a CV analysis expert. Extract information from CVs accurately and format it as JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"}
-        )
+        # Choose model and truncate/split before any network call
+        route = choose_route(cv_text, llm_client.build_messages(""))
+        logger.info(f"Routing CV to {route['model']} ({route['action']}, {len(route['chunks'])} chunk(s))")
 
-        # Parse the response
-        result = json.loads(response.choices[0].message['content'])
-        return result
+        repairs_before = local_repairs()
+        results = []
+        for index, chunk in enumerate(route['chunks']):
+            # Call OpenAI API through the caching client
+            results.append(llm_client.complete_json(
+                chunk,
+                model=route['model'],
+                max_tokens=OUTPUT_TOKENS,
+                response_format={"type": "json_object"}
+            ))
+            record_usage(route, index, llm_client.last_metrics)
+
+        cv_info, missing = validate_cv_info(merge_results(results))
+        if missing:
+            cv_info = reask_missing_fields(route['chunks'][0], route['model'], cv_info, missing)
+        elif local_repairs() > repairs_before:
+            # Before, malformed JSON, a wrong type or a missing key failed the
+            # invocation and S3 retried all of it, model call included
+            schema_metrics['avoided_recalls'] += 1
+
+        # Canonical taxonomy ids, so positions can be grouped and indexed
+        cv_info['position_ids'] = normalize_recommendations(cv_info['recommendations'])
+
+        logger.info(f"CV output metrics: {json.dumps(schema_metrics)}")
+        logger.info(f"LLM call metrics: {json.dumps(llm_caller.metrics)}")
+        return cv_info
 
     except Exception as e:
         logger.error(f"Error analyzing CV with OpenAI: {str(e)}")
         raise
 
-def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+def reask_missing_fields(cv_text: str, model: str, cv_info: Dict[str, Any], missing: List[str]) -> Dict[str, Any]:
     """
-    Lambda handler that processes uploaded CVs and extracts information using OpenAI.
+    Ask the model again only for the required fields it left out, instead of
+    repeating the whole extraction
     """
-    try:
-        # Get bucket and key from the S3 event
-        bucket = event['Records'][0]['s3']['bucket']['name']
-        key = event['Records'][0]['s3']['object']['key']
+    schema_metrics['reasks'] += 1
+    logger.info(f"Re-asking the model for missing fields: {missing}")
+    reask_client = CachingLLMClient(
+        llm_caller,
+        system_prompt=SYSTEM_PROMPT,
+        instructions=reask_prompt(missing),
+        memory_cache=llm_client.memory_cache,
+        shared_cache=llm_client.shared_cache,
+        parse=parse_model_json,
+        cacheable=lambda raw, result: cacheable_output(raw, result, fields=tuple(missing), required=tuple(missing))
+    )
+    answer = reask_client.complete_json(
+        cv_text,
+        model=model,
+        max_tokens=100,
+        response_format={"type": "json_object"}
+    )
+
+    cv_info, still_missing = validate_cv_info({**cv_info, **{field: answer.get(field) for field in missing}})
+    if still_missing:
+        raise CVOutputError(f"Model output is missing required fields: {still_missing}")
+    return cv_info
 
-        logger.info(f"Processing CV from bucket: {bucket}, key: {key}")
+def analyze_object(bucket: str, key: str, lane: str = 'interactive', probe: bool = False) -> Dict[str, Any]:
+    """
+    Download a CV from S3, extract its text and analyze it with OpenAI
+    using a slot of the given scheduling lane
+    """
+    logger.info(f"Processing CV from bucket: {bucket}, key: {key}")
 
-        # Get the PDF file from S3
-        response = s3_client.get_object(Bucket=bucket, Key=key)
-        pdf_content = response['Body'].read()
+    # Get the PDF file from S3, spilling large objects to /tmp and
+    # range-reading only the first pages of very large ones
+    with open_s3_pdf(s3_client, bucket, key) as pdf_file:
+        max_pages = RANGE_MAX_PAGES if isinstance(pdf_file, S3RangeFile) else None
 
         # Extract text from PDF
-        cv_text = extract_text_from_pdf(pdf_content)
-        logger.info("Successfully extracted text from PDF")
+        cv_text = extract_text_from_pdf(pdf_file, max_pages=max_pages)
+    logger.info("Successfully extracted text from PDF")
+
+    return analyze_text(key, cv_text, lane, probe)
 
-        # Analyze CV text with OpenAI
-        cv_info = extract_cv_info(cv_text)
+def analyze_text(key: str, cv_text: str, lane: str, probe: bool = False) -> Dict[str, Any]:
+    """
+    Near-duplicate check, then the LLM stage behind the circuit breaker.
+    Raises AnalysisDeferred when the breaker is open or the provider fails.
+    """
+    # Look for a near-identical CV that was already analyzed
+    signature = minhash_signature(cv_text)
+    match = lsh_index.find(signature, exclude=key) if signature is not None else None
+
+    cv_info = None
+    if match and NEAR_DUP_ACTION == 'link':
+        # Edited CVs often only change the contact details; those come from
+        # the new text, and the LLM is still called if no email is found in it
+        original = load_analysis(match[0])
+        contact = contact_fields(cv_text)
+        if original and contact['email']:
+            cv_info = {**original, **contact}
+            logger.info(f"CV {key} is a near-duplicate of {match[0]} ({match[1]:.2f}), reusing its analysis")
+
+    if cv_info is None:
+        if not probe and not llm_breaker.allow():
+            raise AnalysisDeferred(cv_text, f"Circuit breaker {llm_breaker.name} is {llm_breaker.state()}")
+
+        # Analyze CV text with OpenAI once the lane has a free slot; running
+        # out of budget while waiting for one defers the CV like a slow call
+        try:
+            with lane_slots.slot(lane, llm_caller.remaining):
+                cv_info = llm_breaker.call(extract_cv_info, cv_text, probe=probe)
+        except BreakerOpen as e:
+            raise AnalysisDeferred(cv_text, str(e))
+        except LLM_PROVIDER_ERRORS as e:
+            raise AnalysisDeferred(cv_text, f"{type(e).__name__}: {str(e)}") from e
         logger.info("Successfully analyzed CV with OpenAI")
 
-        # Store the results in DynamoDB
+    if match:
+        cv_info['duplicate_of'] = match[0]
+        cv_info['similarity'] = match[1]
+    if signature is not None:
+        lsh_index.add(key, signature)
+
+    return cv_info
+
+def load_analysis(cv_file: str) -> Optional[Dict[str, Any]]:
+    """
+    Load the stored analysis of a CV in the same shape extract_cv_info returns
+    """
+    table = boto3.resource('dynamodb').Table(os.environ['DYNAMODB_TABLE'])
+    response = table.query(
+        KeyConditionExpression=Key('cv_file').eq(cv_file),
+        Limit=1
+    )
+    if not response.get('Items'):
+        return None
+    item = response['Items'][0]
+    return {
+        'name': item['name'],
+        'email': item['email'],
+        **json.loads(item['additional_info'])
+    }
+
+def build_item(key: str, cv_info: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Prepare the item with indexed and non-indexed fields
+    """
+    item = {
+        'cv_file': key,
+        'analyzed_at': context.invoked_function_arn,
+        # RecentIndex: all analyses under one partition, newest first
+        'entity': 'application',
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'name': cv_info['name'],
+        'email': cv_info['email'],
+        'additional_info': json.dumps({
+            'phone': cv_info['phone'],
+            'country': cv_info['country'],
+            'recommendations': cv_info['recommendations'],
+            'position_ids': cv_info.get('position_ids', [])
+        })
+    }
+
+    # Near-duplicates point at the original so notify can skip them
+    if cv_info.get('duplicate_of'):
+        item['duplicate_of'] = cv_info['duplicate_of']
+        item['similarity'] = Decimal(str(round(cv_info['similarity'], 4)))
+
+    return item
+
+def classify_object(bucket: str, key: str) -> Tuple[str, str]:
+    """
+    Scheduling lane and tenant of an uploaded object, from the metadata upload_cv sets
+    """
+    head = s3_client.head_object(Bucket=bucket, Key=key)
+    return classify(head.get('Metadata'))
+
+def list_backfill_objects(backfill: Dict[str, Any]) -> List[Tuple[str, str, str]]:
+    """
+    List the latest version of every PDF under a prefix for backfill mode
+    """
+    bucket = backfill['bucket']
+    targets = []
+    paginator = s3_client.get_paginator('list_object_versions')
+    for page in paginator.paginate(Bucket=bucket, Prefix=backfill.get('prefix', '')):
+        for version in page.get('Versions', []):
+            if version['IsLatest'] and version['Key'].endswith('.pdf'):
+                targets.append((bucket, version['Key'], source_version(version)))
+    return targets
+
+def continue_later(event: Dict[str, Any], left: List[Tuple[str, str, str]], context: Any) -> None:
+    """
+    Invoke this function again (asynchronously) for the targets that did not
+    fit in the current invocation. Backfills are re-sent as-is, since stored
+    versions are skipped; S3 events only carry the records still to do.
+    """
+    continuation = int(event.get('continuation', 0)) + 1
+    if continuation > MAX_CONTINUATIONS:
+        raise DeadlineExceeded(f"{len(left)} CVs left after {MAX_CONTINUATIONS} continuations")
+
+    if 'backfill' in event:
+        payload = {'backfill': event['backfill']}
+    else:
+        left_keys = {(bucket, key) for bucket, key, _ in left}
+        payload = {'Records': [
+            record for record in event['Records']
+            if (record['s3']['bucket']['name'], record['s3']['object']['key']) in left_keys
+        ]}
+    payload['continuation'] = continuation
+
+    lambda_client.invoke(
+        FunctionName=context.invoked_function_arn,
+        InvocationType='Event',
+        Payload=json.dumps(payload).encode('utf-8')
+    )
+    logger.info(f"Budget running low, continuing {len(left)} CVs in invocation #{continuation}")
+
+def drain_pending(context: Any) -> Dict[str, Any]:
+    """
+    Analyze deferred CVs at a bounded rate (DRAIN_BATCH_SIZE per scheduled run).
+    While the breaker is half-open items are tried one by one as the probe
+    that closes or reopens it; near-duplicates served from an earlier
+    analysis make no LLM call, so probing goes on with the next item until
+    one does. While the breaker is open nothing is called.
+    """
+    state = llm_breaker.state()
+    drained = []
+    failed = []
+
+    if state != OPEN:
+        table = boto3.resource('dynamodb').Table(os.environ['DYNAMODB_TABLE'])
+        for key in pending_queue.list(DRAIN_BATCH_SIZE):
+            if llm_caller.remaining() <= 0:
+                break
+            # Still half-open until a probe reaches the LLM and closes the breaker
+            probe = llm_breaker.state() == HALF_OPEN
+            # The claimed item (with the stored text) is read only now
+            item = pending_queue.claim(key)
+            if item is None:
+                continue
+            try:
+                cv_text = pending_queue.text(item)
+                if cv_text is None:
+                    cv_info = analyze_object(item['bucket'], key, item['lane'], probe=probe)
+                else:
+                    cv_info = analyze_text(key, cv_text, item['lane'], probe=probe)
+                put_item_once(table, build_item(key, cv_info, context), item['source_version'])
+                pending_queue.remove(key)
+                drained.append(key)
+
+            except AnalysisDeferred as e:
+                pending_queue.release(key)
+                logger.warning(f"Stopping drain, LLM stage still unavailable: {e.reason}")
+                break
+
+            except Exception as e:
+                logger.error(f"Error draining CV {key}: {str(e)}")
+                failed.append(key)
+                if pending_queue.fail(key) >= DRAIN_MAX_ATTEMPTS:
+                    logger.error(f"Giving up on CV {key} after {DRAIN_MAX_ATTEMPTS} attempts")
+                    pending_queue.remove(key)
+
+    backlog = pending_queue.backlog()
+    llm_breaker.report(backlog)
+    logger.info(f"Drained {len(drained)} deferred CVs, {backlog} still pending (breaker {state})")
+
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'message': 'Deferred CVs drained',
+            'breaker': state,
+            'drained': drained,
+            'failed': failed,
+            'backlog': backlog
+        })
+    }
+
+@profiled
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler that processes uploaded CVs and extracts information using OpenAI.
+
+    Handles S3 events (one or more records) and backfill events of the form
+    {"backfill": {"bucket": "...", "prefix": "...", "lane": "bulk|reprocess", "tenant": "..."}}.
+    Every object version is stored at most once, so S3 redeliveries and
+    Lambda retries do not create duplicate items or notifications. Batches
+    that do not fit in one invocation continue in a new one.
+
+    While the LLM provider is degraded, CVs are saved as pending and
+    answered with 202; the scheduled {"drain": {}} event analyzes them later.
+    """
+    try:
+        # The LLM stage gets whatever is left of the Lambda timeout
+        llm_caller.start(context)
+
+        if 'drain' in event:
+            return drain_pending(context)
+
         dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table(os.environ['DYNAMODB_TABLE'])
-
-        # Prepare the item with indexed and non-indexed fields
-        item = {
-            'cv_file': key,
-            'analyzed_at': context.invoked_function_arn,
-            'name': cv_info['name'],
-            'email': cv_info['email'],
-            'additional_info': json.dumps({
-                'phone': cv_info['phone'],
-                'country': cv_info['country'],
-                'recommendations': cv_info['recommendations']
-            })
-        }
+        table_name = os.environ['DYNAMODB_TABLE']
+        table = dynamodb.Table(table_name)
+
+        if 'backfill' in event:
+            targets = list_backfill_objects(event['backfill'])
+        else:
+            # Oldest first, so the latest version of a key wins when an event carries several
+            records = sorted(event['Records'], key=lambda record: int(record['s3']['object'].get('sequencer') or '0', 16))
+            targets = [
+                (record['s3']['bucket']['name'], record['s3']['object']['key'], source_version(record['s3']['object']))
+                for record in records
+            ]
+
+        # Single S3 record: check first, then write conditionally
+        if len(targets) == 1 and 'backfill' not in event:
+            bucket, key, version = targets[0]
+            item_key = {'cv_file': key, 'analyzed_at': context.invoked_function_arn}
+
+            if already_processed(table, item_key, version):
+                logger.info(f"CV {key} version {version} already analyzed, skipping")
+                return {
+                    'statusCode': 200,
+                    'body': json.dumps({
+                        'message': 'CV already analyzed',
+                        'cv_file': key
+                    })
+                }
+
+            lane, tenant = classify_object(bucket, key)
+            logger.info(f"Scheduling CV {key} in the {lane} lane for tenant {tenant}")
+            try:
+                cv_info = analyze_object(bucket, key, lane)
+            except AnalysisDeferred as e:
+                pending_queue.add(bucket, key, version, lane, tenant, e.cv_text, e.reason)
+                llm_breaker.report()
+                return {
+                    'statusCode': 202,
+                    'body': json.dumps({
+                        'message': 'CV analysis deferred',
+                        'cv_file': key,
+                        'reason': e.reason
+                    })
+                }
+
+            if put_item_once(table, build_item(key, cv_info, context), version):
+                logger.info("Successfully stored CV analysis in DynamoDB")
 
-        table.put_item(Item=item)
-        logger.info("Successfully stored CV analysis in DynamoDB")
+            return {
+                'statusCode': 200,
+                'body': json.dumps({
+                    'message': 'CV analyzed successfully',
+                    'cv_info': cv_info
+                })
+            }
+
+        # Multi-record and backfill: skip stored versions, then use batch_writer
+        pending = filter_processed(
+            dynamodb,
+            table_name,
+            [({'cv_file': key, 'analyzed_at': context.invoked_function_arn}, version) for _, key, version in targets]
+        )
+        pending_keys = {(item_key['cv_file'], version) for item_key, version in pending}
+
+        # Process this event's records in priority order, interleaving tenants fairly
+        queue = FairQueue()
+        backfill_lane = event['backfill'].get('lane', 'bulk') if 'backfill' in event else None
+        for bucket, key, version in targets:
+            if (key, version) not in pending_keys:
+                continue
+            if backfill_lane:
+                lane, tenant = classify(default_lane=backfill_lane, default_tenant=event['backfill'].get('tenant', DEFAULT_TENANT))
+            else:
+                lane, tenant = classify_object(bucket, key)
+            queue.submit((bucket, key, version), lane, tenant)
+
+        items = []
+        written = 0
+        failed = []
+        deferred = []
+        left = []
+        while True:
+            entry = queue.pop()
+            if entry is None:
+                break
+            lane, tenant, target = entry
+            if llm_caller.remaining() < BATCH_MIN_SECONDS:
+                queue.done(lane)
+                left = [target] + queue.take_all()
+                break
+
+            bucket, key, version = target
+            try:
+                cv_info = analyze_object(bucket, key, lane)
+                items.append((build_item(key, cv_info, context), version))
+            except AnalysisDeferred as e:
+                pending_queue.add(bucket, key, version, lane, tenant, e.cv_text, e.reason)
+                deferred.append(key)
+            except Exception as e:
+                logger.error(f"Error processing CV {key}: {str(e)}")
+                failed.append(key)
+            finally:
+                queue.done(lane)
+
+            if len(items) >= BATCH_FLUSH_SIZE:
+                written += batch_put_items(table, items)
+                items = []
+
+        written += batch_put_items(table, items)
+        logger.info(f"Stored {written} CV analyses in DynamoDB, skipped {len(targets) - len(pending)} duplicates")
+
+        if left:
+            if not (written or deferred or failed):
+                # Not even one CV fit in this invocation; let Lambda retry the event
+                raise DeadlineExceeded(f"No budget to analyze any of {len(left)} CVs")
+            continue_later(event, left, context)
+        logger.info(f"Scheduler metrics: {json.dumps(scheduler_metrics)}")
 
         return {
-            'statusCode': 200,
+            'statusCode': 500 if failed else 200,
             'body': json.dumps({
-                'message': 'CV analyzed successfully',
-                'cv_info': cv_info
+                'message': 'CVs analyzed',
+                'analyzed': written,
+                'skipped': len(targets) - len(pending),
+                'deferred': deferred,
+                'failed': failed,
+                'continued': len(left)
             })
         }
 
+    except DeadlineExceeded as e:
+        # S3 invokes asynchronously and ignores the response; only an error makes Lambda retry the event
+        logger.error(f"Time budget exhausted while processing CV: {str(e)}")
+        raise
+
     except Exception as e:
         logger.error(f"Error processing CV: {str(e)}")
         return {
@@ -132,4 +576,4 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': json.dumps({
                 'error': str(e)
             })
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,33 @@
+import logging
+from typing import Dict, Any, List
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+def invalidation_keys(*images: Dict[str, Any]) -> List[str]:
+    """
+    Cache keys affected by a change to an item (DynamoDB stream image format).
+    Pass both the old and the new image, so a MODIFY that changes the email
+    also invalidates the query cached under the previous one.
+    """
+    keys = ['recent']
+    for image in images:
+        for key in (f"file#{image['cv_file']['S']}" if 'cv_file' in image else None,
+                    f"email#{image['email']['S']}" if 'email' in image else None):
+            if key and key not in keys:
+                keys.append(key)
+    return keys
+
+
+def bump_generations(generations_table: Any, keys: List[str]) -> None:
+    """
+    Invalidate cached pages in every container by bumping their generation
+    """
+    for key in keys:
+        generations_table.update_item(
+            Key={'cache_key': key},
+            UpdateExpression='ADD generation :one',
+            ExpressionAttributeValues={':one': 1}
+        )
@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import logging
+from decimal import Decimal
+from typing import Dict, Any, Callable, Optional, Tuple, Type
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Breaker configuration
+FAILURE_THRESHOLD = int(os.environ.get('BREAKER_FAILURE_THRESHOLD', '5'))
+OPEN_SECONDS = int(os.environ.get('BREAKER_OPEN_SECONDS', '60'))
+MAX_OPEN_SECONDS = int(os.environ.get('BREAKER_MAX_OPEN_SECONDS', '900'))
+REFRESH_SECONDS = float(os.environ.get('BREAKER_REFRESH_SECONDS', '5'))
+METRICS_NAMESPACE = 'SillarCV'
+
+
+class BreakerOpen(Exception):
+    """
+    The protected dependency is considered down; the call was not made
+    """
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker whose state is shared by all containers through one
+    DynamoDB item ("breaker#<name>").
+
+    Failures are counted per container; FAILURE_THRESHOLD consecutive
+    failures open the breaker for everyone. While open, calls are rejected
+    without touching the dependency. Once the open period is over the
+    breaker is half-open: normal calls are still rejected and only probe
+    calls (the drain worker) go through. A successful probe closes the
+    breaker, a failed one reopens it with the open period doubled.
+    """
+
+    def __init__(self, table: Any, name: str = 'openai',
+                 failure_types: Tuple[Type[BaseException], ...] = (TimeoutError,),
+                 failure_threshold: int = FAILURE_THRESHOLD, open_seconds: int = OPEN_SECONDS,
+                 refresh_seconds: float = REFRESH_SECONDS, clock: Callable[[], float] = time.time):
+        self.table = table
+        self.key = f"breaker#{name}"
+        self.name = name
+        self.failure_types = failure_types
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.refresh_seconds = refresh_seconds
+        self.clock = clock
+        self.consecutive_failures = 0
+        self._item: Dict[str, Any] = {}
+        self._read_at = float('-inf')
+        self.metrics = {'calls': 0, 'failures': 0, 'rejected': 0, 'opened': 0, 'closed': 0}
+
+    def _load(self, refresh: bool = False) -> Dict[str, Any]:
+        now = self.clock()
+        if refresh or now - self._read_at >= self.refresh_seconds:
+            self._item = self.table.get_item(Key={'pk': self.key}).get('Item') or {}
+            self._read_at = now
+        return self._item
+
+    def _store(self, item: Dict[str, Any]) -> None:
+        self.table.put_item(Item={'pk': self.key, **item})
+        self._item = {'pk': self.key, **item}
+        self._read_at = self.clock()
+
+    def state(self) -> str:
+        item = self._load()
+        if item.get('state') != OPEN:
+            return CLOSED
+        return OPEN if self.clock() < float(item['open_until']) else HALF_OPEN
+
+    def allow(self) -> bool:
+        return self.state() == CLOSED
+
+    def open_for(self) -> float:
+        """
+        Seconds the breaker has been open in the current episode
+        """
+        item = self._load()
+        if item.get('state') != OPEN:
+            return 0.0
+        return self.clock() - float(item['opened_at'])
+
+    def trip(self, open_seconds: Optional[int] = None) -> None:
+        item = self._load(refresh=True)
+        now = self.clock()
+        seconds = min(open_seconds or self.open_seconds, MAX_OPEN_SECONDS)
+        self._store({
+            'state': OPEN,
+            'opened_at': item['opened_at'] if item.get('state') == OPEN else Decimal(str(round(now, 3))),
+            'open_until': Decimal(str(round(now + seconds, 3))),
+            'open_seconds': seconds,
+            'open_seconds_total': item.get('open_seconds_total', 0)
+        })
+        self.consecutive_failures = 0
+        self.metrics['opened'] += 1
+        logger.warning(f"Circuit breaker {self.name} open for {seconds}s")
+
+    def reopen(self) -> None:
+        item = self._load(refresh=True)
+        self.trip(int(item.get('open_seconds', self.open_seconds)) * 2)
+
+    def close(self) -> None:
+        item = self._load(refresh=True)
+        total = float(item.get('open_seconds_total', 0))
+        if item.get('state') == OPEN:
+            total += self.clock() - float(item['opened_at'])
+        self._store({'state': CLOSED, 'open_seconds_total': Decimal(str(round(total, 3)))})
+        self.consecutive_failures = 0
+        self.metrics['closed'] += 1
+        logger.info(f"Circuit breaker {self.name} closed")
+
+    def call(self, fn: Callable[..., Any], *args: Any, probe: bool = False, **kwargs: Any) -> Any:
+        """
+        Call `fn` unless the breaker is open. Probe calls are allowed while
+        half-open and decide whether the breaker closes or reopens.
+        """
+        state = self.state()
+        if state == OPEN or (state == HALF_OPEN and not probe):
+            self.metrics['rejected'] += 1
+            raise BreakerOpen(f"Circuit breaker {self.name} is {state}")
+
+        self.metrics['calls'] += 1
+        try:
+            result = fn(*args, **kwargs)
+        except self.failure_types:
+            self.metrics['failures'] += 1
+            self.consecutive_failures += 1
+            if state == HALF_OPEN:
+                self.reopen()
+            elif self.consecutive_failures >= self.failure_threshold:
+                self.trip()
+            raise
+
+        self.consecutive_failures = 0
+        if state == HALF_OPEN:
+            self.close()
+        return result
+
+    def report(self, backlog: Optional[int] = None) -> None:
+        """
+        Log breaker state, time open and backlog size in CloudWatch embedded metric format
+        """
+        state = self.state()
+        values = {
+            'BreakerOpen': 0 if state == CLOSED else 1,
+            'BreakerOpenSeconds': round(self.open_for(), 1),
+            'BreakerRejected': self.metrics['rejected']
+        }
+        if backlog is not None:
+            values['PendingBacklog'] = backlog
+
+        print(json.dumps({
+            '_aws': {
+                'Timestamp': int(self.clock() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': METRICS_NAMESPACE,
+                    'Dimensions': [['Breaker']],
+                    'Metrics': [{'Name': name, 'Unit': 'Seconds' if name.endswith('Seconds') else 'Count'}
+                                for name in values]
+                }]
+            },
+            'Breaker': self.name,
+            'BreakerState': state,
+            **values
+        }))
@@ -0,0 +1,252 @@
+import re
+import json
+import logging
+from typing import Dict, Any, List, Tuple
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# name and email are GSI keys in the applications table and cannot be empty;
+# the rest default when the model leaves them out
+REQUIRED_FIELDS = ('name', 'email')
+OPTIONAL_DEFAULTS: Dict[str, Any] = {
+    'phone': '',
+    'country': '',
+    'recommendations': []
+}
+SCHEMA_FIELDS = REQUIRED_FIELDS + tuple(OPTIONAL_DEFAULTS)
+MAX_RECOMMENDATIONS = 5
+
+CODE_FENCE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$', re.IGNORECASE)
+TRAILING_COMMA = re.compile(r',\s*([}\]])')
+LIST_SEPARATOR = re.compile(r'\s*(?:[,;\n]|\s-\s)\s*')
+EMAIL = re.compile(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+PHONE = re.compile(r'(?<![\w.])\+?\(?\d[\d \t().-]{6,18}\d(?![\w.])')
+YEAR = re.compile(r'^(?:19|20)\d\d$')
+COMPLETE_LITERALS = ('true', 'false', 'null')
+
+# Counters for the lifetime of the container
+metrics: Dict[str, int] = {
+    'responses': 0,
+    'valid': 0,
+    'json_repaired': 0,
+    'fields_repaired': 0,
+    'fields_defaulted': 0,
+    'reasks': 0,
+    'avoided_recalls': 0
+}
+
+
+class CVOutputError(ValueError):
+    """
+    The model output could not be turned into a CV analysis locally
+    """
+
+
+def _close_truncated(text: str) -> str:
+    """
+    Close the open objects/arrays of a truncated JSON document. Only the member
+    the cut went through is dropped: a dangling separator, a key without its
+    value, a string (key or value) that never terminated or a scalar cut
+    short ("tru", "12." - a number at the very end may be missing digits, so
+    only complete true/false/null are kept there). Complete elements and
+    members before it are kept.
+    """
+    # One entry per open container: [closer, what comes next, where the current member starts]
+    stack: List[List[Any]] = []
+    in_string = False
+    escaped = False
+    scalar_start = 0
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+                stack[-1][1] = 'colon' if stack[-1][1] == 'key' else 'done'
+        elif char.isspace():
+            if stack and stack[-1][1] == 'scalar':
+                stack[-1][1] = 'done'
+        elif char in '{[':
+            stack.append(['}', 'key', index + 1] if char == '{' else [']', 'value', index + 1])
+        elif not stack:
+            continue
+        elif char in '}]':
+            stack.pop()
+            if not stack:
+                return text
+            stack[-1][1] = 'done'
+        elif char == '"':
+            in_string = True
+        elif char == ':':
+            stack[-1][1] = 'value'
+        elif char == ',':
+            stack[-1][1] = 'key' if stack[-1][0] == '}' else 'value'
+            stack[-1][2] = index
+        elif stack[-1][1] != 'scalar':
+            # Number or literal, complete once a delimiter follows it
+            stack[-1][1] = 'scalar'
+            scalar_start = index
+
+    if stack and stack[-1][1] == 'scalar' and text[scalar_start:] in COMPLETE_LITERALS:
+        stack[-1][1] = 'done'
+    if stack and (in_string or stack[-1][1] != 'done'):
+        text = text[:stack[-1][2]]
+    return text.rstrip() + ''.join(closer for closer, _, _ in reversed(stack))
+
+
+def parse_model_json(raw: str) -> Dict[str, Any]:
+    """
+    Parse the completion as JSON, repairing code fences, leading/trailing
+    text, trailing commas and truncation locally instead of re-calling the model
+    """
+    metrics['responses'] += 1
+    try:
+        result = json.loads(raw)
+        if isinstance(result, dict):
+            return result
+    except ValueError:
+        pass
+
+    text = CODE_FENCE.sub('', raw)
+    start = text.find('{')
+    if start == -1:
+        raise CVOutputError("Model output contains no JSON object")
+    text = TRAILING_COMMA.sub(r'\1', text[start:])
+
+    decoder = json.JSONDecoder()
+    for candidate in (text, _close_truncated(text)):
+        try:
+            # raw_decode ignores whatever follows the object
+            result, _ = decoder.raw_decode(TRAILING_COMMA.sub(r'\1', candidate))
+        except ValueError:
+            continue
+        if isinstance(result, dict):
+            metrics['json_repaired'] += 1
+            logger.info("Repaired malformed JSON from the model locally")
+            return result
+
+    raise CVOutputError("Model output is not valid JSON and could not be repaired")
+
+
+def _as_text(value: Any) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return ', '.join(_as_text(v) for v in value if v)
+    if isinstance(value, dict):
+        return ', '.join(_as_text(v) for v in value.values() if v)
+    return str(value).strip()
+
+
+def _as_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        items = LIST_SEPARATOR.split(value)
+    elif isinstance(value, dict):
+        items = list(value.values())
+    else:
+        items = list(value)
+    return [text for text in (_as_text(item) for item in items) if text][:MAX_RECOMMENDATIONS]
+
+
+def validate_cv_info(result: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Coerce the model output to the CV schema.
+
+    Returns the cleaned result and the required fields that are still missing.
+    """
+    cleaned: Dict[str, Any] = {}
+    repaired = 0
+
+    for field in REQUIRED_FIELDS + ('phone', 'country'):
+        value = result.get(field)
+        text = _as_text(value)
+        if value is not None and not isinstance(value, str):
+            repaired += 1
+        if field == 'email' and text:
+            match = EMAIL.search(text)
+            if match and match.group(0) != text:
+                repaired += 1
+            text = match.group(0).lower() if match else ''
+        cleaned[field] = text
+
+    value = result.get('recommendations')
+    cleaned['recommendations'] = _as_list(value)
+    if value is not None and not (isinstance(value, list) and value == cleaned['recommendations']):
+        repaired += 1
+
+    # An explicit "" or [] is the model saying the CV has none, not a default
+    defaulted = sum(1 for field in OPTIONAL_DEFAULTS if result.get(field) is None)
+
+    for field, value in result.items():
+        cleaned.setdefault(field, value)
+
+    missing = [field for field in REQUIRED_FIELDS if not cleaned[field]]
+    metrics['fields_repaired'] += repaired
+    metrics['fields_defaulted'] += defaulted
+    if not missing and not repaired and not defaulted:
+        metrics['valid'] += 1
+    return cleaned, missing
+
+
+def local_repairs() -> int:
+    """
+    Running total of JSON and field repairs. The analysis compares it before
+    and after a CV to count the re-calls it avoided (once per CV, however
+    many repairs it needed).
+    """
+    return metrics['json_repaired'] + metrics['fields_repaired'] + metrics['fields_defaulted']
+
+
+def cacheable_output(raw: str, result: Dict[str, Any], fields: Tuple[str, ...] = SCHEMA_FIELDS,
+                     required: Tuple[str, ...] = ()) -> bool:
+    """
+    Whether a completion can go to the LLM cache: it parsed without repair and
+    has every expected field (non-empty for `required`). A truncated or partial
+    completion is used once, but not served again for the lifetime of the entry.
+    """
+    try:
+        if json.loads(raw) != result:
+            return False
+    except ValueError:
+        return False
+    return all(result.get(field) is not None for field in fields) and all(result.get(field) for field in required)
+
+
+def contact_fields(cv_text: str) -> Dict[str, str]:
+    """
+    Email and phone found in the CV text itself, without the model. Used for
+    near-duplicates, whose other fields are reused from the earlier analysis.
+    """
+    email = EMAIL.search(cv_text)
+    phone = ''
+    for match in PHONE.finditer(cv_text):
+        groups = re.findall(r'\d+', match.group(0))
+        # "2019 - 2021" and similar date ranges are not phone numbers
+        if sum(len(group) for group in groups) >= 7 and not all(YEAR.match(group) for group in groups):
+            phone = match.group(0).strip()
+            break
+    return {
+        'email': email.group(0).lower() if email else '',
+        'phone': phone
+    }
+
+
+def reask_prompt(fields: List[str]) -> str:
+    """
+    Instructions for a targeted re-ask that only requests the missing fields
+    """
+    descriptions = {
+        'name': '"name": the full name of the candidate',
+        'email': '"email": their email address'
+    }
+    wanted = '\n'.join(descriptions.get(field, f'"{field}"') for field in fields)
+    return f"""Extract ONLY the following fields from this CV:
+{wanted}
+
+Please respond ONLY with a JSON object containing exactly these keys."""
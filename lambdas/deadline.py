@@ -0,0 +1,177 @@
+import os
+import sys
+import json
+import time
+import random
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Dict, Any, Callable, List, Optional
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Deadline / hedging configuration
+DEADLINE_SAFETY_MARGIN_SECONDS = float(os.environ.get('LLM_DEADLINE_MARGIN_SECONDS', '15'))
+HEDGE_PERCENTILE = float(os.environ.get('LLM_HEDGE_PERCENTILE', '95'))
+HEDGE_DEFAULT_SECONDS = float(os.environ.get('LLM_HEDGE_AFTER_SECONDS', '10'))
+HEDGE_MIN_SAMPLES = 20
+MAX_ATTEMPTS = int(os.environ.get('LLM_MAX_ATTEMPTS', '2'))
+LATENCY_WINDOW = 200
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    The invocation ran out of time budget; the work can be retried later
+    """
+
+
+class HedgedCaller:
+    """
+    Call wrapper with a per-invocation deadline and hedged duplicates.
+
+    The budget comes from context.get_remaining_time_in_millis() minus a
+    safety margin. If the first attempt has not returned by the configured
+    percentile of recent latencies, a duplicate is sent and the first valid
+    response wins. Only slowness is hedged: an error is raised to the caller
+    (and the circuit breaker) instead of doubling the calls to a provider that
+    is already failing. Each call runs in its own pool, so attempts that lose
+    the race finish in the background without taking workers from later calls;
+    request_timeout keeps them from outliving the invocation.
+    """
+
+    def __init__(self, call_fn: Callable[..., Any], is_valid: Callable[[Any], bool] = lambda response: True,
+                 percentile: float = HEDGE_PERCENTILE, max_attempts: int = MAX_ATTEMPTS,
+                 margin_seconds: float = DEADLINE_SAFETY_MARGIN_SECONDS):
+        self.call_fn = call_fn
+        self.is_valid = is_valid
+        self.percentile = percentile
+        self.max_attempts = max_attempts
+        self.margin_seconds = margin_seconds
+        self.latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self.deadline: Optional[float] = None
+        self._lock = threading.Lock()
+        self.metrics = {'calls': 0, 'hedged': 0, 'hedge_wins': 0, 'deadline_exceeded': 0}
+
+    def start(self, context: Any) -> None:
+        """
+        Set the deadline for the current invocation
+        """
+        remaining = context.get_remaining_time_in_millis() / 1000
+        self.deadline = time.monotonic() + remaining - self.margin_seconds
+
+    def remaining(self) -> float:
+        if self.deadline is None:
+            return float('inf')
+        return self.deadline - time.monotonic()
+
+    def hedge_after(self) -> float:
+        with self._lock:
+            samples = sorted(self.latencies)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_SECONDS
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+        return samples[index]
+
+    def _attempt(self, kwargs: Dict[str, Any]) -> Any:
+        started = time.monotonic()
+        response = self.call_fn(**kwargs)
+        with self._lock:
+            self.latencies.append(time.monotonic() - started)
+        return response
+
+    def __call__(self, **kwargs: Any) -> Any:
+        self.metrics['calls'] += 1
+        if self.remaining() <= 0:
+            self.metrics['deadline_exceeded'] += 1
+            raise DeadlineExceeded("No time budget left for the LLM call")
+
+        if self.deadline is not None:
+            kwargs.setdefault('request_timeout', max(1.0, self.remaining()))
+
+        pool = ThreadPoolExecutor(max_workers=self.max_attempts)
+        try:
+            return self._race(pool, kwargs)
+        finally:
+            # Returns at once; a losing attempt still in flight is not waited for
+            pool.shutdown(wait=False)
+
+    def _race(self, pool: ThreadPoolExecutor, kwargs: Dict[str, Any]) -> Any:
+        futures: Dict[Future, int] = {pool.submit(self._attempt, kwargs): 0}
+        attempts = 1
+        next_hedge = time.monotonic() + self.hedge_after()
+        last_error: Optional[BaseException] = None
+
+        while futures:
+            launch_hedge = attempts < self.max_attempts
+            timeout = min(self.remaining(), next_hedge - time.monotonic()) if launch_hedge else self.remaining()
+            done, _ = wait(futures, timeout=None if timeout == float('inf') else max(0.0, timeout),
+                           return_when=FIRST_COMPLETED)
+
+            for future in done:
+                attempt = futures.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if self.is_valid(response):
+                    if attempt > 0:
+                        self.metrics['hedge_wins'] += 1
+                    return response
+                last_error = ValueError("Invalid response from the LLM")
+
+            if self.remaining() <= 0:
+                self.metrics['deadline_exceeded'] += 1
+                raise DeadlineExceeded("LLM call did not finish within the invocation budget")
+
+            if launch_hedge and futures and time.monotonic() >= next_hedge:
+                # Still running past the percentile: send a duplicate
+                self.metrics['hedged'] += 1
+                logger.info(f"Hedging LLM request after {self.hedge_after():.1f}s")
+                futures[pool.submit(self._attempt, kwargs)] = attempts
+                attempts += 1
+                next_hedge = float('inf')
+
+        raise last_error or RuntimeError("LLM call failed")
+
+
+def _simulate(calls: int = 2000, scale: float = 0.001) -> None:
+    """
+    Fake endpoint with a log-normal latency and a 3% slow tail, called with and
+    without hedging. Latencies are in seconds of simulated time, scaled by `scale`.
+    """
+    rng = random.Random(11)
+
+    def fake_endpoint(**kwargs: Any) -> Dict[str, Any]:
+        latency = rng.lognormvariate(1.0, 0.3)
+        if rng.random() < 0.03:
+            latency *= 12
+        time.sleep(latency * scale)
+        return {'choices': [{'message': {'content': '{}'}}]}
+
+    def run(max_attempts: int) -> List[float]:
+        caller = HedgedCaller(fake_endpoint, max_attempts=max_attempts)
+        observed = []
+        for _ in range(calls):
+            started = time.monotonic()
+            caller()
+            observed.append((time.monotonic() - started) / scale)
+        return sorted(observed)
+
+    def percentile(values: List[float], pct: float) -> float:
+        return round(values[min(len(values) - 1, int(len(values) * pct / 100))], 2)
+
+    baseline = run(1)
+    hedged = run(2)
+    print(json.dumps({
+        'calls': calls,
+        'baseline_p50': percentile(baseline, 50), 'baseline_p99': percentile(baseline, 99),
+        'hedged_p50': percentile(hedged, 50), 'hedged_p99': percentile(hedged, 99)
+    }))
+
+
+if __name__ == '__main__':
+    _simulate(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,157 @@
+import os
+import time
+import zlib
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import Binary
+from botocore.exceptions import ClientError
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+PENDING_PREFIX = 'pending#'
+# Sparse keys-only GSI over pending items: queue (constant) + deferred_at
+PENDING_INDEX = 'PendingIndex'
+PENDING_QUEUE = 'pending'
+# Compressed text above this size is not stored; the drain re-reads the PDF instead
+MAX_TEXT_BYTES = 300 * 1024
+CLAIM_SECONDS = int(os.environ.get('DRAIN_CLAIM_SECONDS', '300'))
+
+
+class AnalysisDeferred(Exception):
+    """
+    The LLM stage is unavailable; the extracted text is kept for a later drain
+    """
+
+    def __init__(self, cv_text: str, reason: str):
+        super().__init__(reason)
+        self.cv_text = cv_text
+        self.reason = reason
+
+
+class PendingQueue:
+    """
+    CVs whose text was extracted but not analyzed, one item per cv_file
+    ("pending#<cv_file>") in the deferred-analysis table.
+
+    Pending items carry a constant `queue` attribute, so the keys-only
+    PendingIndex (queue, deferred_at) lists them oldest first without
+    reading the breaker item or the stored text. The text is only read
+    when an item is claimed.
+    """
+
+    def __init__(self, table: Any):
+        self.table = table
+
+    def add(self, bucket: str, key: str, version: str, lane: str, tenant: str, cv_text: str, reason: str) -> None:
+        """
+        Store or refresh a pending item. `attempts` (failed analyses) is left
+        untouched, so deferring a CV again does not reset its count.
+        """
+        fields: Dict[str, Any] = {
+            'queue': PENDING_QUEUE,
+            'cv_file': key,
+            'bucket': bucket,
+            'source_version': version,
+            'lane': lane,
+            'tenant': tenant,
+            'reason': reason[:500]
+        }
+        text = zlib.compress(cv_text.encode('utf-8'))
+        if len(text) <= MAX_TEXT_BYTES:
+            fields['text'] = Binary(text)
+
+        names = {f"#{name}": name for name in [*fields, 'deferred_at', 'text']}
+        values = {f":{name}": value for name, value in fields.items()}
+        values[':deferred_at'] = datetime.now(timezone.utc).isoformat()
+        update = 'SET ' + ', '.join(f"#{name} = :{name}" for name in fields)
+        # Keep the original position in the queue when a CV is deferred again
+        update += ', #deferred_at = if_not_exists(#deferred_at, :deferred_at)'
+        if 'text' not in fields:
+            update += ' REMOVE #text'
+
+        self.table.update_item(
+            Key={'pk': f"{PENDING_PREFIX}{key}"},
+            UpdateExpression=update,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
+        logger.info(f"Deferred analysis of {key}: {reason}")
+
+    def list(self, limit: int) -> List[str]:
+        """
+        cv_file of up to `limit` pending items, oldest first
+        """
+        response = self.table.query(
+            IndexName=PENDING_INDEX,
+            KeyConditionExpression=Key('queue').eq(PENDING_QUEUE),
+            ScanIndexForward=True,
+            Limit=limit
+        )
+        return [item['pk'][len(PENDING_PREFIX):] for item in response.get('Items', [])]
+
+    def backlog(self) -> int:
+        count = 0
+        kwargs: Dict[str, Any] = {
+            'IndexName': PENDING_INDEX,
+            'KeyConditionExpression': Key('queue').eq(PENDING_QUEUE),
+            'Select': 'COUNT'
+        }
+        while True:
+            response = self.table.query(**kwargs)
+            count += response['Count']
+            if 'LastEvaluatedKey' not in response:
+                return count
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def claim(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Take an item for CLAIM_SECONDS so overlapping drains do not analyze it
+        twice. Returns the whole item, or None if it is gone or claimed by
+        another drain. Claiming does not count as an attempt: an item put
+        back because the LLM stage is still down was never tried.
+        """
+        now = int(time.time())
+        try:
+            response = self.table.update_item(
+                Key={'pk': f"{PENDING_PREFIX}{key}"},
+                UpdateExpression='SET claimed_until = :until',
+                ConditionExpression='attribute_exists(pk) AND (attribute_not_exists(claimed_until) OR claimed_until < :now)',
+                ExpressionAttributeValues={':until': now + CLAIM_SECONDS, ':now': now},
+                ReturnValues='ALL_NEW'
+            )
+            return response['Attributes']
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return None
+            raise
+
+    def release(self, key: str) -> None:
+        self.table.update_item(
+            Key={'pk': f"{PENDING_PREFIX}{key}"},
+            UpdateExpression='REMOVE claimed_until'
+        )
+
+    def fail(self, key: str) -> int:
+        """
+        Release an item whose analysis failed and return its failed attempts so far
+        """
+        response = self.table.update_item(
+            Key={'pk': f"{PENDING_PREFIX}{key}"},
+            UpdateExpression='REMOVE claimed_until ADD attempts :one',
+            ExpressionAttributeValues={':one': 1},
+            ReturnValues='UPDATED_NEW'
+        )
+        return int(response['Attributes']['attempts'])
+
+    def remove(self, key: str) -> None:
+        self.table.delete_item(Key={'pk': f"{PENDING_PREFIX}{key}"})
+
+    @staticmethod
+    def text(item: Dict[str, Any]) -> Optional[str]:
+        if 'text' not in item:
+            return None
+        return zlib.decompress(item['text'].value).decode('utf-8')
@@ -0,0 +1,209 @@
+import io
+import os
+import sys
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, List
+import boto3
+import pyarrow as pa
+import pyarrow.parquet as pq
+from boto3.dynamodb.types import TypeDeserializer
+from matching import load_from_s3, save_to_s3
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Initialize clients
+s3_client = boto3.client('s3')
+deserializer = TypeDeserializer()
+
+EXPORT_PREFIX = os.environ.get('EXPORT_PREFIX', 'applications')
+# Partitions with more files than this are merged by the compaction job
+COMPACT_MIN_FILES = int(os.environ.get('EXPORT_COMPACT_MIN_FILES', '8'))
+# Candidate matrix for job matching, kept up to date from the same stream batches
+MATCH_MATRIX_KEY = os.environ.get('MATCH_MATRIX_KEY', 'matching/candidates.npz')
+
+SCHEMA = pa.schema([
+    ('cv_file', pa.string()),
+    ('analyzed_at', pa.string()),
+    ('event_time', pa.timestamp('s', tz='UTC')),
+    ('week', pa.string()),
+    ('name', pa.string()),
+    ('email', pa.string()),
+    ('phone', pa.string()),
+    ('country', pa.string()),
+    ('recommendations', pa.list_(pa.string())),
+    ('position_ids', pa.list_(pa.string())),
+    ('duplicate_of', pa.string())
+])
+
+
+def record_to_row(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Flatten one stream record, decoding the additional_info JSON string
+    """
+    image = {key: deserializer.deserialize(value) for key, value in record['dynamodb']['NewImage'].items()}
+    additional_info = json.loads(image.get('additional_info') or '{}')
+    event_time = datetime.fromtimestamp(int(record['dynamodb']['ApproximateCreationDateTime']), tz=timezone.utc)
+    year, week, _ = event_time.isocalendar()
+    return {
+        'cv_file': image['cv_file'],
+        'analyzed_at': image.get('analyzed_at'),
+        'event_time': event_time,
+        'week': f"{year}-W{week:02d}",
+        'name': image.get('name'),
+        'email': image.get('email'),
+        'phone': additional_info.get('phone'),
+        'country': additional_info.get('country'),
+        'recommendations': list(additional_info.get('recommendations') or []),
+        'position_ids': list(additional_info.get('position_ids') or []),
+        'duplicate_of': image.get('duplicate_of')
+    }
+
+
+def _partition_key(date: str, name: str) -> str:
+    return f"{EXPORT_PREFIX}/dt={date}/{name}.parquet"
+
+
+def _write_table(bucket: str, key: str, table: pa.Table) -> None:
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression='zstd')
+    s3_client.put_object(Bucket=bucket, Key=key, Body=buffer.getvalue())
+
+
+def export_records(bucket: str, records: List[Dict[str, Any]], batch_id: str) -> int:
+    """
+    Append one Parquet file per date partition for a batch of stream records
+    """
+    partitions: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        if record['eventName'] not in ('INSERT', 'MODIFY'):
+            continue
+        row = record_to_row(record)
+        partitions.setdefault(row['event_time'].strftime('%Y-%m-%d'), []).append(row)
+
+    for date, rows in partitions.items():
+        table = pa.Table.from_pylist(rows, schema=SCHEMA)
+        _write_table(bucket, _partition_key(date, f"part-{batch_id}"), table)
+    return sum(len(rows) for rows in partitions.values())
+
+
+def concat_promoting(tables: List[pa.Table]) -> pa.Table:
+    """
+    Concatenate tables whose schemas differ by added columns. promote_options
+    only exists from pyarrow 14; the AWS SDK for pandas layer may ship an
+    older pyarrow, which only has promote=True (deprecated afterwards).
+    """
+    try:
+        return pa.concat_tables(tables, promote_options='default')
+    except TypeError:
+        return pa.concat_tables(tables, promote=True)
+
+
+def compact_partition(bucket: str, date: str) -> int:
+    """
+    Merge the small files of one date partition into a single file.
+    Rows of the same item are deduplicated, keeping the latest event.
+    """
+    prefix = f"{EXPORT_PREFIX}/dt={date}/"
+    keys = []
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        keys.extend(obj['Key'] for obj in page.get('Contents', []) if obj['Key'].endswith('.parquet'))
+    if len(keys) < COMPACT_MIN_FILES:
+        return 0
+
+    tables = [pq.read_table(io.BytesIO(s3_client.get_object(Bucket=bucket, Key=key)['Body'].read()))
+              for key in keys]
+    # Files written before a column was added are filled with nulls
+    merged = concat_promoting(tables).sort_by([('event_time', 'descending')])
+
+    # Keep the first (latest) row per cv_file/analyzed_at
+    seen = set()
+    keep = []
+    for index, item in enumerate(zip(merged.column('cv_file').to_pylist(), merged.column('analyzed_at').to_pylist())):
+        if item not in seen:
+            seen.add(item)
+            keep.append(index)
+    compacted = merged.take(pa.array(keep)).sort_by('event_time')
+
+    _write_table(bucket, _partition_key(date, f"compacted-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}"), compacted)
+    s3_client.delete_objects(Bucket=bucket, Delete={'Objects': [{'Key': key} for key in keys]})
+    logger.info(f"Compacted {len(keys)} files into {compacted.num_rows} rows for {date}")
+    return len(keys)
+
+
+def update_candidate_matrix(bucket: str, records: List[Dict[str, Any]]) -> int:
+    """
+    Apply a stream batch to the persisted candidate matrix. The function runs
+    with a reserved concurrency of 1, so this read-modify-write has a single writer.
+    """
+    matrix, _ = load_from_s3(s3_client, bucket, MATCH_MATRIX_KEY)
+    matrix.apply_stream_records(records)
+    save_to_s3(s3_client, bucket, MATCH_MATRIX_KEY, matrix)
+    return matrix.size
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler for DynamoDB Stream batches (export and candidate matrix)
+    and scheduled events (compaction)
+    """
+    try:
+        bucket = os.environ['EXPORT_BUCKET']
+
+        if 'Records' in event:
+            exported = export_records(bucket, event['Records'], context.aws_request_id)
+            logger.info(f"Exported {exported} records to s3://{bucket}/{EXPORT_PREFIX}")
+            candidates = update_candidate_matrix(bucket, event['Records'])
+            logger.info(f"Candidate matrix at s3://{bucket}/{MATCH_MATRIX_KEY} has {candidates} rows")
+            message = {'message': 'Records exported successfully', 'exported': exported, 'candidates': candidates}
+        else:
+            # Compact yesterday's and today's partitions unless dates are given
+            today = datetime.now(timezone.utc).date()
+            dates = event.get('dates') or [
+                (today.fromordinal(today.toordinal() - 1)).isoformat(),
+                today.isoformat()
+            ]
+            merged = {date: compact_partition(bucket, date) for date in dates}
+            message = {'message': 'Partitions compacted successfully', 'merged_files': merged}
+
+        return {
+            'statusCode': 200,
+            'body': json.dumps(message)
+        }
+
+    except Exception as e:
+        logger.error(f"Error exporting applications: {str(e)}")
+        # Re-raise so the stream batch is retried instead of skipped
+        raise
+
+
+def _report(source: str) -> None:
+    """
+    Example analytical queries as vectorized scans over the exported files
+    (a local directory or s3://bucket/prefix)
+    """
+    import pyarrow.dataset as ds
+    import pyarrow.compute as pc
+
+    # Explicit schema so files exported before position_ids was added read it as null
+    dataset = ds.dataset(source, format='parquet', partitioning='hive', schema=SCHEMA.append(pa.field('dt', pa.string())))
+    table = dataset.to_table(columns=['week', 'country', 'recommendations', 'position_ids'],
+                             filter=pc.field('duplicate_of').is_null())
+
+    print("By country:", table.group_by('country').aggregate([('country', 'count')]).to_pylist())
+    print("By week:", table.group_by('week').aggregate([('week', 'count')]).sort_by('week').to_pylist())
+    roles = pa.table({'role': pc.list_flatten(table.column('recommendations'))})
+    print("By recommended role:",
+          roles.group_by('role').aggregate([('role', 'count')]).sort_by([('role_count', 'descending')]).to_pylist()[:20])
+    positions = pa.table({'position': pc.list_flatten(table.column('position_ids'))})
+    print("By position:",
+          positions.group_by('position').aggregate([('position', 'count')])
+          .sort_by([('position_count', 'descending')]).to_pylist()[:20])
+
+
+if __name__ == '__main__':
+    _report(sys.argv[1])
@@ -0,0 +1,110 @@
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+from botocore.exceptions import ClientError
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Attribute that records which version of the S3 object produced the item
+VERSION_ATTRIBUTE = 'source_version'
+
+# BatchGetItem accepts at most 100 keys per request
+BATCH_GET_LIMIT = 100
+
+
+def source_version(s3_object: Dict[str, Any]) -> str:
+    """
+    Identify one version of an S3 object from the event record or a list/head response.
+    The bucket is versioned, so versionId is preferred; eTag and sequencer are fallbacks.
+    """
+    for field in ('versionId', 'VersionId', 'eTag', 'ETag', 'sequencer'):
+        value = s3_object.get(field)
+        if value:
+            return str(value).strip('"')
+    raise ValueError("S3 object has no versionId, eTag or sequencer")
+
+
+def already_processed(table: Any, key: Dict[str, str], version: str) -> bool:
+    """
+    Check whether this object version was already stored, before doing any work
+    """
+    response = table.get_item(
+        Key=key,
+        ProjectionExpression=VERSION_ATTRIBUTE,
+        ConsistentRead=True
+    )
+    return response.get('Item', {}).get(VERSION_ATTRIBUTE) == version
+
+
+def put_item_once(table: Any, item: Dict[str, Any], version: str) -> bool:
+    """
+    Conditionally store the item. A write for a version that is already stored
+    is rejected by DynamoDB, so it consumes no extra stream record.
+
+    Returns True if the item was written, False if it was a duplicate.
+    """
+    try:
+        table.put_item(
+            Item={**item, VERSION_ATTRIBUTE: version},
+            ConditionExpression='attribute_not_exists(cv_file) OR #version <> :version',
+            ExpressionAttributeNames={'#version': VERSION_ATTRIBUTE},
+            ExpressionAttributeValues={':version': version}
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            logger.info(f"Skipping duplicate write for {item['cv_file']} version {version}")
+            return False
+        raise
+
+
+def filter_processed(dynamodb: Any, table_name: str,
+                     candidates: List[Tuple[Dict[str, str], str]]) -> List[Tuple[Dict[str, str], str]]:
+    """
+    Drop (key, version) pairs that are already stored, using BatchGetItem.
+    When the same key appears more than once (several versions of one
+    object in the same event) only the last candidate is kept, since
+    BatchGetItem rejects duplicate keys and only the latest version matters.
+    """
+    latest: Dict[Tuple[str, str], Tuple[Dict[str, str], str]] = {}
+    for key, version in candidates:
+        identity = (key['cv_file'], key['analyzed_at'])
+        latest.pop(identity, None)
+        latest[identity] = (key, version)
+    candidates = list(latest.values())
+
+    stored: Dict[Tuple[str, str], Optional[str]] = {}
+    for start in range(0, len(candidates), BATCH_GET_LIMIT):
+        request = {
+            table_name: {
+                'Keys': [key for key, _ in candidates[start:start + BATCH_GET_LIMIT]],
+                'ProjectionExpression': 'cv_file, analyzed_at, #version',
+                'ExpressionAttributeNames': {'#version': VERSION_ATTRIBUTE},
+                'ConsistentRead': True
+            }
+        }
+        while request:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            for found in response.get('Responses', {}).get(table_name, []):
+                stored[(found['cv_file'], found['analyzed_at'])] = found.get(VERSION_ATTRIBUTE)
+            request = response.get('UnprocessedKeys') or None
+
+    return [
+        (key, version) for key, version in candidates
+        if stored.get((key['cv_file'], key['analyzed_at'])) != version
+    ]
+
+
+def batch_put_items(table: Any, items: List[Tuple[Dict[str, Any], str]]) -> int:
+    """
+    Store many items with batch_writer. batch_writer cannot apply condition
+    expressions, so callers must run filter_processed first; repeated keys
+    inside the same batch are collapsed by overwrite_by_pkeys.
+
+    Returns the number of items sent.
+    """
+    with table.batch_writer(overwrite_by_pkeys=['cv_file', 'analyzed_at']) as batch:
+        for item, version in items:
+            batch.put_item(Item={**item, VERSION_ATTRIBUTE: version})
+    return len(items)
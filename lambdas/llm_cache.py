@@ -0,0 +1,220 @@
+import json
+import os
+import time
+import zlib
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Callable
+from boto3.dynamodb.types import Binary
+from botocore.exceptions import ClientError
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Cache configuration
+CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', '256'))
+CACHE_TTL_SECONDS = int(os.environ.get('LLM_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+# DynamoDB items are limited to 400 KB, key and attribute names included
+CACHE_MAX_ITEM_BYTES = 350 * 1024
+# Call parameters that do not change the completion and stay out of the key
+UNCACHED_PARAMS = ('request_timeout',)
+
+
+def normalize_for_hash(text: str) -> str:
+    """
+    Collapse whitespace so copies of a CV that only differ in layout share a
+    cache key. Case is kept: it is part of names and emails in the output.
+    """
+    return " ".join(text.split())
+
+
+def cache_key(model: str, prefix: str, text: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Build the cache key from the model, the static prompt prefix, the call
+    parameters (max_tokens, temperature, response_format...) and the normalized text
+    """
+    params = {name: value for name, value in (params or {}).items() if name not in UNCACHED_PARAMS}
+    digest = hashlib.sha256()
+    for part in (model, prefix, json.dumps(params, sort_keys=True, default=str), normalize_for_hash(text)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """
+    In-memory LRU cache with per-entry TTL
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: int = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class DynamoCache:
+    """
+    Shared cache tier in a DynamoDB table, one item per key with the value as
+    compressed JSON. Every container reads it, so a CV analyzed once is not
+    sent to the model again until the entry expires. DynamoDB TTL deletes
+    expired items (`expires_at`), but only eventually, so reads check it too.
+    Errors are logged and treated as misses: the cache never fails an analysis.
+    """
+
+    def __init__(self, table: Any, ttl: int = CACHE_TTL_SECONDS):
+        self.table = table
+        self.ttl = ttl
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            item = self.table.get_item(Key={'cache_key': key}).get('Item')
+        except ClientError as e:
+            logger.warning(f"Could not read LLM cache entry: {str(e)}")
+            return None
+        if item is None or int(item['expires_at']) < time.time():
+            return None
+        return json.loads(zlib.decompress(item['value'].value).decode('utf-8'))
+
+    def set(self, key: str, value: Any) -> None:
+        data = zlib.compress(json.dumps(value).encode('utf-8'))
+        if len(data) > CACHE_MAX_ITEM_BYTES:
+            logger.warning(f"LLM cache entry of {len(data)} bytes is too large to store")
+            return
+        try:
+            self.table.put_item(Item={
+                'cache_key': key,
+                'value': Binary(data),
+                'expires_at': int(time.time()) + self.ttl
+            })
+        except ClientError as e:
+            logger.warning(f"Could not write LLM cache entry: {str(e)}")
+
+
+class CachingLLMClient:
+    """
+    Wrapper around a chat completion function that caches parsed responses by
+    a hash of the normalized input, and keeps the static part of the prompt
+    as an identical prefix so provider-side prompt caching can apply.
+    """
+
+    def __init__(self, create_fn: Callable[..., Any], system_prompt: str, instructions: str,
+                 memory_cache: Optional[LRUCache] = None, shared_cache: Optional[DynamoCache] = None,
+                 parse: Callable[[str], Dict[str, Any]] = json.loads,
+                 cacheable: Callable[[str, Dict[str, Any]], bool] = lambda raw, result: True):
+        self.create_fn = create_fn
+        self.parse = parse
+        # Decides from the raw completion and its parse whether the result may be reused
+        self.cacheable = cacheable
+        self.system_prompt = system_prompt
+        self.instructions = instructions
+        self.memory_cache = memory_cache if memory_cache is not None else LRUCache()
+        self.shared_cache = shared_cache
+        self.last_metrics: Dict[str, Any] = {}
+
+    def build_messages(self, text: str) -> List[Dict[str, str]]:
+        """
+        Static system prompt and instructions first, variable CV text last
+        """
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": f"{self.instructions}\n\nCV Text:\n{text}"}
+        ]
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.memory_cache.get(key)
+        if value is not None:
+            return value
+        if self.shared_cache is not None:
+            value = self.shared_cache.get(key)
+            if value is not None:
+                self.memory_cache.set(key, value)
+        return value
+
+    def _store(self, key: str, value: Dict[str, Any]) -> None:
+        self.memory_cache.set(key, value)
+        if self.shared_cache is not None:
+            self.shared_cache.set(key, value)
+
+    def complete_json(self, text: str, model: str, **kwargs: Any) -> Dict[str, Any]:
+        """
+        Return the parsed JSON completion for the given text, from cache when possible
+        """
+        key = cache_key(model, self.system_prompt + self.instructions, text, kwargs)
+        started = time.perf_counter()
+
+        cached = self._lookup(key)
+        if cached is not None:
+            self.last_metrics = {
+                'cache_hit': True,
+                'cached': True,
+                'latency_ms': round((time.perf_counter() - started) * 1000, 2),
+                'saved_latency_ms': cached.get('latency_ms', 0),
+                'saved_prompt_tokens': cached.get('usage', {}).get('prompt_tokens', 0),
+                'saved_completion_tokens': cached.get('usage', {}).get('completion_tokens', 0),
+                'cached_prompt_tokens': 0
+            }
+            logger.info(f"LLM cache hit: {json.dumps(self.last_metrics)}")
+            return cached['result']
+
+        response = self.create_fn(
+            model=model,
+            messages=self.build_messages(text),
+            **kwargs
+        )
+        latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        content = response.choices[0].message['content']
+        result = self.parse(content)
+
+        usage = response.get('usage') or {}
+        prompt_details = usage.get('prompt_tokens_details') or {}
+        usage_summary = {
+            'prompt_tokens': usage.get('prompt_tokens', 0),
+            'completion_tokens': usage.get('completion_tokens', 0)
+        }
+
+        stored = self.cacheable(content, result)
+        if stored:
+            self._store(key, {'result': result, 'usage': usage_summary, 'latency_ms': latency_ms})
+
+        self.last_metrics = {
+            'cache_hit': False,
+            'cached': stored,
+            'latency_ms': latency_ms,
+            'saved_latency_ms': 0,
+            'saved_prompt_tokens': 0,
+            'saved_completion_tokens': 0,
+            'cached_prompt_tokens': prompt_details.get('cached_tokens', 0),
+            **usage_summary
+        }
+        logger.info(f"LLM cache miss: {json.dumps(self.last_metrics)}")
+        return result
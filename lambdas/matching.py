@@ -0,0 +1,219 @@
+import os
+import sys
+import json
+import time
+import zlib
+import logging
+import tempfile
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Width of the hashed feature space and weight of each feature group
+MATCH_DIMENSIONS = int(os.environ.get('MATCH_DIMENSIONS', '256'))
+FIELD_WEIGHTS = {
+    'position_id': 1.0,
+    'position': 1.0,
+    'country': 0.5
+}
+INITIAL_CAPACITY = 1024
+SPILL_CHUNK_BYTES = 1024 * 1024
+
+
+def _features(profile: Dict[str, Any]) -> List[Tuple[str, float]]:
+    """
+    Turn positions and country into weighted namespaced terms. Canonical
+    taxonomy ids match across languages and wordings; the free-form titles
+    contribute the whole title and each of its words.
+    """
+    terms: List[Tuple[str, float]] = []
+    for position_id in profile.get('position_ids') or []:
+        terms.append((f"position-id:{position_id}", FIELD_WEIGHTS['position_id']))
+    for position in profile.get('recommendations') or profile.get('positions') or []:
+        title = position.strip().lower()
+        terms.append((f"position:{title}", FIELD_WEIGHTS['position']))
+        for word in title.split():
+            terms.append((f"position-word:{word}", FIELD_WEIGHTS['position'] / 2))
+    if profile.get('country'):
+        terms.append((f"country:{profile['country'].strip().lower()}", FIELD_WEIGHTS['country']))
+    return terms
+
+
+def vectorize(profile: Dict[str, Any], dimensions: int = MATCH_DIMENSIONS) -> np.ndarray:
+    """
+    L2-normalized feature vector using the signed hashing trick, so no vocabulary has to be kept
+    """
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for term, weight in _features(profile):
+        digest = zlib.crc32(term.encode('utf-8'))
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        vector[digest % dimensions] += sign * weight
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+
+class CandidateMatrix:
+    """
+    Candidate feature vectors in one contiguous float32 matrix.
+
+    Rows are appended in place (capacity doubles when full) and removed by
+    swapping the last row in, so scoring a job against every candidate is a
+    single matrix-vector product over the first `size` rows.
+    """
+
+    def __init__(self, dimensions: int = MATCH_DIMENSIONS, capacity: int = INITIAL_CAPACITY):
+        self.dimensions = dimensions
+        self.matrix = np.zeros((capacity, dimensions), dtype=np.float32)
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    def _grow(self) -> None:
+        grown = np.zeros((max(INITIAL_CAPACITY, self.matrix.shape[0] * 2), self.dimensions), dtype=np.float32)
+        grown[:self.size] = self.matrix[:self.size]
+        self.matrix = grown
+
+    def upsert(self, candidate_id: str, profile: Dict[str, Any]) -> None:
+        vector = vectorize(profile, self.dimensions)
+        row = self.rows.get(candidate_id)
+        if row is None:
+            if self.size == self.matrix.shape[0]:
+                self._grow()
+            row = self.size
+            self.rows[candidate_id] = row
+            self.ids.append(candidate_id)
+        self.matrix[row] = vector
+
+    def remove(self, candidate_id: str) -> None:
+        row = self.rows.pop(candidate_id, None)
+        if row is None:
+            return
+        last = self.size - 1
+        if row != last:
+            moved_id = self.ids[last]
+            self.matrix[row] = self.matrix[last]
+            self.ids[row] = moved_id
+            self.rows[moved_id] = row
+        self.ids.pop()
+
+    def top_k(self, job: Dict[str, Any], k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Score a job (position_ids, positions, country) against all candidates and return the best k
+        """
+        if not self.size:
+            return []
+        scores = self.matrix[:self.size] @ vectorize(job, self.dimensions)
+        k = min(k, self.size)
+        best = np.argpartition(scores, -k)[-k:]
+        best = best[np.argsort(scores[best])[::-1]]
+        return [(self.ids[row], float(scores[row])) for row in best]
+
+    def apply_stream_records(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Apply DynamoDB stream records from the applications table. Near-duplicates
+        are left out, so the same candidate does not fill several top-k places.
+        """
+        for record in records:
+            keys = record['dynamodb']['Keys']
+            candidate_id = keys['cv_file']['S']
+            new_image = record['dynamodb'].get('NewImage')
+            if record['eventName'] == 'REMOVE' or not new_image or 'duplicate_of' in new_image:
+                self.remove(candidate_id)
+                continue
+            self.upsert(candidate_id, json.loads(new_image['additional_info']['S']))
+
+    def save(self, path: Any) -> None:
+        """
+        Write the matrix as .npz to a path or a binary file object
+        """
+        np.savez(path, matrix=self.matrix[:self.size], ids=np.array(self.ids, dtype=str))
+
+    @classmethod
+    def load(cls, path: Any) -> 'CandidateMatrix':
+        """
+        Read a saved matrix. The loaded array is used as is (capacity == size),
+        so memory peaks at one copy of the matrix; it only grows on the next append.
+        """
+        with np.load(path) as data:
+            loaded = data['matrix']
+            ids = data['ids'].tolist()
+        instance = cls(dimensions=loaded.shape[1], capacity=0)
+        instance.matrix = loaded
+        instance.ids = ids
+        instance.rows = {candidate_id: row for row, candidate_id in enumerate(instance.ids)}
+        return instance
+
+
+def load_from_s3(s3_client: Any, bucket: str, key: str) -> Tuple['CandidateMatrix', Optional[str]]:
+    """
+    The persisted matrix and its ETag, or an empty matrix (and None) if none was saved yet.
+    The object goes through a file in /tmp, so the body is never held in memory
+    next to the array.
+    """
+    with tempfile.NamedTemporaryFile(suffix='.npz') as spill:
+        try:
+            response = s3_client.get_object(Bucket=bucket, Key=key)
+        except s3_client.exceptions.NoSuchKey:
+            return CandidateMatrix(), None
+        for chunk in response['Body'].iter_chunks(SPILL_CHUNK_BYTES):
+            spill.write(chunk)
+        spill.flush()
+        return CandidateMatrix.load(spill.name), response['ETag']
+
+
+def save_to_s3(s3_client: Any, bucket: str, key: str, matrix: 'CandidateMatrix') -> None:
+    with tempfile.NamedTemporaryFile(suffix='.npz') as spill:
+        matrix.save(spill)
+        spill.flush()
+        s3_client.upload_file(spill.name, bucket, key)
+
+
+def _benchmark(candidates: int = 100000, queries: int = 100) -> None:
+    """
+    Build a random pool of candidates and time indexing and top-k scoring
+    """
+    rng = np.random.default_rng(7)
+    position_ids = [f"position-{i}" for i in range(40)]
+    positions = ["backend developer", "frontend developer", "data engineer", "qa analyst",
+                 "product manager", "devops engineer", "data scientist", "mobile developer"]
+    countries = ["peru", "chile", "colombia", "mexico", "argentina", "spain"]
+
+    def random_profile() -> Dict[str, Any]:
+        return {
+            'position_ids': list(rng.choice(position_ids, 3, replace=False)),
+            'recommendations': list(rng.choice(positions, 3, replace=False)),
+            'country': str(rng.choice(countries))
+        }
+
+    matrix = CandidateMatrix()
+    started = time.perf_counter()
+    for i in range(candidates):
+        matrix.upsert(f"cv-{i}.pdf", random_profile())
+    build_s = time.perf_counter() - started
+
+    jobs = [random_profile() for _ in range(queries)]
+    started = time.perf_counter()
+    for job in jobs:
+        matrix.top_k(job, 10)
+    query_ms = (time.perf_counter() - started) * 1000 / queries
+
+    print(json.dumps({
+        'candidates': candidates,
+        'dimensions': matrix.dimensions,
+        'matrix_mb': round(matrix.matrix[:matrix.size].nbytes / 1e6, 1),
+        'build_s': round(build_s, 2),
+        'upserts_per_s': round(candidates / build_s),
+        'top10_query_ms': round(query_ms, 2)
+    }))
+
+
+if __name__ == '__main__':
+    _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,141 @@
+import os
+import re
+import zlib
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# MinHash / LSH configuration
+NEAR_DUP_THRESHOLD = float(os.environ.get('NEAR_DUP_THRESHOLD', '0.85'))
+NUM_PERM = 128
+SHINGLE_SIZE = 5
+MERSENNE_PRIME = (1 << 31) - 1
+SIGNATURE_BAND = 'signature'
+QUERY_WORKERS = 8
+BATCH_WRITE_LIMIT = 25
+
+WORD = re.compile(r'\w+')
+
+# Fixed permutations so signatures stay comparable across containers
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, MERSENNE_PRIME, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, MERSENNE_PRIME, size=NUM_PERM).astype(np.uint64)
+
+
+def _choose_bands(threshold: float) -> Tuple[int, int]:
+    """
+    Bands x rows whose LSH threshold (1/b)^(1/r) is closest to the similarity threshold
+    """
+    options = [(b, NUM_PERM // b) for b in range(1, NUM_PERM + 1) if NUM_PERM % b == 0]
+    return min(options, key=lambda option: abs((1 / option[0]) ** (1 / option[1]) - threshold))
+
+
+LSH_BANDS, LSH_ROWS = _choose_bands(NEAR_DUP_THRESHOLD)
+
+
+def shingles(text: str) -> np.ndarray:
+    """
+    Hashes of the overlapping word 5-grams of the text
+    """
+    words = WORD.findall(text.lower())
+    grams = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash_signature(text: str) -> Optional[np.ndarray]:
+    """
+    MinHash signature of the text, or None if it is too short to compare
+    """
+    hashed = shingles(text) % MERSENNE_PRIME
+    if not len(hashed):
+        return None
+    permuted = (_PERM_A[:, None] * hashed[None, :] + _PERM_B[:, None]) % MERSENNE_PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def estimated_similarity(first: np.ndarray, second: np.ndarray) -> float:
+    return float(np.mean(first == second))
+
+
+def band_keys(signature: np.ndarray) -> List[str]:
+    return [
+        f"{band}:{hashlib.blake2b(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes(), digest_size=8).hexdigest()}"
+        for band in range(LSH_BANDS)
+    ]
+
+
+class LSHIndex:
+    """
+    LSH band index stored in DynamoDB: one item per (band bucket, cv_file) plus
+    one signature item per CV. A lookup queries the CV's own band buckets only,
+    so its cost does not grow with the number of stored CVs.
+    """
+
+    def __init__(self, dynamodb_client: Any, table_name: str, threshold: float = NEAR_DUP_THRESHOLD):
+        self.client = dynamodb_client
+        self.table_name = table_name
+        self.threshold = threshold
+
+    def _bucket_members(self, band_key: str) -> List[str]:
+        response = self.client.query(
+            TableName=self.table_name,
+            KeyConditionExpression='band = :band',
+            ExpressionAttributeValues={':band': {'S': band_key}},
+            ProjectionExpression='cv_file'
+        )
+        return [item['cv_file']['S'] for item in response.get('Items', [])]
+
+    def _signatures(self, cv_files: List[str]) -> Dict[str, np.ndarray]:
+        signatures = {}
+        for start in range(0, len(cv_files), 100):
+            request = {
+                self.table_name: {
+                    'Keys': [{'band': {'S': SIGNATURE_BAND}, 'cv_file': {'S': cv_file}}
+                             for cv_file in cv_files[start:start + 100]]
+                }
+            }
+            while request:
+                response = self.client.batch_get_item(RequestItems=request)
+                for item in response.get('Responses', {}).get(self.table_name, []):
+                    signatures[item['cv_file']['S']] = np.frombuffer(item['minhash']['B'], dtype=np.uint32)
+                request = response.get('UnprocessedKeys') or None
+        return signatures
+
+    def find(self, signature: np.ndarray, exclude: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """
+        Most similar stored CV at or above the threshold, as (cv_file, estimated similarity)
+        """
+        with ThreadPoolExecutor(max_workers=QUERY_WORKERS) as pool:
+            buckets = pool.map(self._bucket_members, band_keys(signature))
+            candidates = {cv_file for members in buckets for cv_file in members if cv_file != exclude}
+        if not candidates:
+            return None
+
+        best = None
+        for cv_file, stored in self._signatures(sorted(candidates)).items():
+            similarity = estimated_similarity(signature, stored)
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (cv_file, similarity)
+        return best
+
+    def add(self, cv_file: str, signature: np.ndarray) -> None:
+        requests = [{'PutRequest': {'Item': {
+            'band': {'S': SIGNATURE_BAND},
+            'cv_file': {'S': cv_file},
+            'minhash': {'B': signature.astype(np.uint32).tobytes()}
+        }}}]
+        requests.extend(
+            {'PutRequest': {'Item': {'band': {'S': band_key}, 'cv_file': {'S': cv_file}}}}
+            for band_key in band_keys(signature)
+        )
+        for start in range(0, len(requests), BATCH_WRITE_LIMIT):
+            pending = {self.table_name: requests[start:start + BATCH_WRITE_LIMIT]}
+            while pending:
+                response = self.client.batch_write_item(RequestItems=pending)
+                pending = response.get('UnprocessedItems') or None
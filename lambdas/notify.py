@@ -4,6 +4,8 @@ import os
 import logging
 from typing import Dict, Any
 from datetime import datetime
+from cache_invalidation import invalidation_keys, bump_generations
+from profiling import profiled
 
 # Configure logging
 logger = logging.getLogger()
@@ -12,6 +14,9 @@ logger.setLevel(logging.INFO)
 # Initialize SES client
 ses_client = boto3.client('ses')
 
+# Tabla de generaciones para invalidar la caché de la API de resultados
+generations_table = boto3.resource('dynamodb').Table(os.environ['CACHE_GENERATIONS_TABLE'])
+
 def create_email_body(cv_info: Dict[str, Any]) -> str:
     """
     Create a formatted HTML email body with the CV information
@@ -37,12 +42,18 @@ def create_email_body(cv_info: Dict[str, Any]) -> str:
     </html>
     """
 
+@profiled
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Lambda handler that processes DynamoDB Stream events and sends email notifications
     """
     try:
         for record in event['Records']:
+            # Cualquier cambio invalida las páginas cacheadas de la API de resultados,
+            # tanto las de la imagen anterior como las de la nueva
+            images = [record['dynamodb'][name] for name in ('OldImage', 'NewImage') if name in record['dynamodb']]
+            bump_generations(generations_table, invalidation_keys(*(images or [record['dynamodb']['Keys']])))
+
             # Solo nos interesan los registros nuevos
             if record['eventName'] != 'INSERT':
                 continue
@@ -50,6 +61,11 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             # Obtener la nueva imagen del registro
             new_image = record['dynamodb']['NewImage']
 
+            # Los CVs casi duplicados ya fueron notificados con el original
+            if 'duplicate_of' in new_image:
+                logger.info(f"Skipping near-duplicate {new_image['cv_file']['S']} of {new_image['duplicate_of']['S']}")
+                continue
+
             # Convertir la imagen de DynamoDB a un diccionario Python
             cv_info = {
                 'cv_file': new_image['cv_file']['S'],
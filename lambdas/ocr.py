@@ -0,0 +1,118 @@
+import os
+import json
+import time
+import logging
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Dict, Any, List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# OCR configuration
+OCR_DPI = int(os.environ.get('OCR_DPI', '200'))
+OCR_MAX_PAGES = int(os.environ.get('OCR_MAX_PAGES', '5'))
+OCR_PAGE_TIMEOUT_SECONDS = float(os.environ.get('OCR_PAGE_TIMEOUT_SECONDS', '20'))
+OCR_WORKERS = int(os.environ.get('OCR_WORKERS', str(os.cpu_count() or 1)))
+OCR_LANGUAGES = os.environ.get('OCR_LANGUAGES', 'spa+eng')
+TESSERACT_CMD = os.environ.get('TESSERACT_CMD', 'tesseract')
+
+# Counters for the lifetime of the container, logged after every fallback
+metrics: Dict[str, Any] = {
+    'documents': 0,
+    'fallback_documents': 0,
+    'pages_ocr': 0,
+    'pages_over_cap': 0,
+    'timeouts': 0,
+    'failures': 0,
+    'rasterize_ms': 0.0,
+    'ocr_ms': 0.0
+}
+
+
+def is_text_less(text: Optional[str]) -> bool:
+    """
+    A page without an extractable text layer (typically a scanned image)
+    """
+    return not text or not text.strip()
+
+
+def _run_tesseract(image_path: str) -> str:
+    """
+    OCR one page image in its own process. Lambda has no /dev/shm, so
+    multiprocessing pools are unavailable; each page runs as a tesseract
+    subprocess with a hard timeout instead.
+    """
+    result = subprocess.run(
+        [TESSERACT_CMD, image_path, 'stdout', '-l', OCR_LANGUAGES],
+        capture_output=True,
+        timeout=OCR_PAGE_TIMEOUT_SECONDS,
+        check=True
+    )
+    return result.stdout.decode('utf-8', errors='replace')
+
+
+def _collect(futures: Dict[Future, Tuple[int, str, float]], done: set, texts: List[Optional[str]]) -> None:
+    for future in done:
+        index, image_path, submitted = futures.pop(future)
+        try:
+            texts[index] = future.result()
+            metrics['pages_ocr'] += 1
+        except subprocess.TimeoutExpired:
+            metrics['timeouts'] += 1
+            logger.warning(f"OCR timed out on page {index + 1}")
+        except Exception as e:
+            metrics['failures'] += 1
+            logger.warning(f"OCR failed on page {index + 1}: {str(e)}")
+        finally:
+            metrics['ocr_ms'] += (time.perf_counter() - submitted) * 1000
+            try:
+                os.remove(image_path)
+            except OSError:
+                pass
+
+
+def ocr_missing_pages(pages: List[Any], texts: List[Optional[str]]) -> List[Optional[str]]:
+    """
+    Fill in the text of pages that have no text layer by rasterizing only those
+    pages and running OCR on them.
+
+    At most OCR_MAX_PAGES pages are processed. Pages are rendered one at a time
+    and written to /tmp, and no more than OCR_WORKERS images are waiting for
+    OCR at once, so memory stays bounded regardless of the page count.
+    """
+    metrics['documents'] += 1
+    missing = [index for index, text in enumerate(texts) if is_text_less(text)]
+    if not missing:
+        return texts
+
+    metrics['fallback_documents'] += 1
+    selected = missing[:OCR_MAX_PAGES]
+    metrics['pages_over_cap'] += len(missing) - len(selected)
+    logger.info(f"OCR fallback for {len(selected)} of {len(texts)} pages ({len(missing)} without text)")
+
+    texts = list(texts)
+    futures: Dict[Future, Tuple[int, str, float]] = {}
+    with tempfile.TemporaryDirectory(prefix='ocr-') as tmp_dir, \
+            ThreadPoolExecutor(max_workers=OCR_WORKERS) as pool:
+        for index in selected:
+            if len(futures) >= OCR_WORKERS:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                _collect(futures, done, texts)
+
+            started = time.perf_counter()
+            image_path = os.path.join(tmp_dir, f"page-{index}.png")
+            pages[index].to_image(resolution=OCR_DPI).save(image_path)
+            # Drop pdfplumber's cached layout objects for this page
+            pages[index].flush_cache()
+            metrics['rasterize_ms'] += (time.perf_counter() - started) * 1000
+
+            futures[pool.submit(_run_tesseract, image_path)] = (index, image_path, time.perf_counter())
+
+        if futures:
+            _collect(futures, set(futures), texts)
+
+    logger.info(f"OCR metrics: {json.dumps(metrics)}")
+    return texts
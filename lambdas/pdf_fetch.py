@@ -0,0 +1,115 @@
+import io
+import os
+import sys
+import json
+import logging
+import tempfile
+import subprocess
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Iterator
+from s3_range import S3RangeFile
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Objects larger than this are streamed to a file in /tmp
+SPILL_THRESHOLD_BYTES = int(os.environ.get('PDF_SPILL_THRESHOLD_BYTES', str(8 * 1024 * 1024)))
+CHUNK_SIZE = 1024 * 1024
+# Objects larger than this are read lazily with range GETs, and only the
+# first RANGE_MAX_PAGES pages are extracted
+RANGE_THRESHOLD_BYTES = int(os.environ.get('PDF_RANGE_THRESHOLD_BYTES', str(32 * 1024 * 1024)))
+RANGE_MAX_PAGES = int(os.environ.get('PDF_RANGE_MAX_PAGES', '5'))
+SPILL_DIR = os.environ.get('PDF_SPILL_DIR', tempfile.gettempdir())
+
+
+@contextmanager
+def open_body(body: Any, size: int, threshold: int = SPILL_THRESHOLD_BYTES) -> Iterator[BinaryIO]:
+    """
+    Turn a streaming body into a seekable file object for pdfplumber.
+
+    Small bodies are read into memory. Larger ones are copied to /tmp in
+    chunks and handed over as a real file, so only the pages pdfplumber
+    touches are read instead of holding the whole file (twice) in the heap.
+    A named file object (not an mmap) also works for pypdfium2, which
+    renders pages for the OCR fallback.
+    """
+    if size <= threshold:
+        yield io.BytesIO(body.read())
+        return
+
+    with tempfile.NamedTemporaryFile(dir=SPILL_DIR, suffix='.pdf') as spill:
+        read = body.read
+        while True:
+            chunk = read(CHUNK_SIZE)
+            if not chunk:
+                break
+            spill.write(chunk)
+        spill.flush()
+        spill.seek(0)
+        logger.info(f"Spilled {size} bytes to {spill.name}")
+        yield spill
+
+
+@contextmanager
+def open_s3_pdf(s3_client: Any, bucket: str, key: str) -> Iterator[BinaryIO]:
+    """
+    Fetch a PDF from S3 choosing the in-memory, spill-to-/tmp or range-read path by its size.
+    The size comes from a HEAD request, so a large object is never opened for a full download.
+    """
+    head = s3_client.head_object(Bucket=bucket, Key=key)
+    if head['ContentLength'] > RANGE_THRESHOLD_BYTES:
+        range_file = S3RangeFile(s3_client, bucket, key, version_id=head.get('VersionId'))
+        try:
+            yield range_file
+        finally:
+            range_file.close()
+        return
+
+    params = {'Bucket': bucket, 'Key': key}
+    if head.get('VersionId'):
+        # The version that was sized, even if the key is overwritten in between
+        params['VersionId'] = head['VersionId']
+    response = s3_client.get_object(**params)
+    try:
+        with open_body(response['Body'], response['ContentLength']) as pdf_file:
+            yield pdf_file
+    finally:
+        response['Body'].close()
+
+
+def _measure(mode: str, path: str) -> None:
+    """
+    Open and extract one local PDF the way the handler would, then print peak RSS
+    """
+    import resource
+    import pdfplumber
+
+    threshold = sys.maxsize if mode == 'memory' else 0
+    with open(path, 'rb') as body, open_body(body, os.path.getsize(path), threshold) as pdf_file:
+        with pdfplumber.open(pdf_file) as pdf:
+            for page in pdf.pages:
+                page.extract_text()
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def _benchmark(paths: list) -> None:
+    """
+    Peak RSS (KiB) per file size for the in-memory and spill paths, each in a fresh process
+    """
+    for path in paths:
+        row = {'file': os.path.basename(path), 'size_kib': os.path.getsize(path) // 1024}
+        for mode in ('memory', 'spill'):
+            output = subprocess.run(
+                [sys.executable, __file__, '--measure', mode, path],
+                capture_output=True, text=True, check=True
+            ).stdout
+            row[f"{mode}_peak_rss_kib"] = int(output.strip().splitlines()[-1])
+        print(json.dumps(row))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--measure']:
+        _measure(sys.argv[2], sys.argv[3])
+    else:
+        _benchmark(sys.argv[1:])
@@ -0,0 +1,229 @@
+import io
+import os
+import json
+import time
+import random
+import shutil
+import pstats
+import cProfile
+import logging
+import threading
+import functools
+import tracemalloc
+from urllib.parse import unquote_plus
+from typing import Dict, Any, Callable, List, Optional, Set
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Comma-separated triggers: "always", "sample" (PROFILE_SAMPLE_RATE) and/or
+# "tag" (S3 records whose object has the tag PROFILE_TAG=true). With "off",
+# the default, handlers are returned undecorated.
+PROFILE_MODE: Set[str] = {
+    mode.strip() for mode in os.environ.get('PROFILE_MODE', 'off').split(',')
+    if mode.strip() and mode.strip() != 'off'
+}
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_TAG = os.environ.get('PROFILE_TAG', 'profile')
+# Local directory or s3://bucket/prefix
+PROFILE_OUTPUT = os.environ.get('PROFILE_OUTPUT', '/tmp/profiles')
+PROFILE_TOP = int(os.environ.get('PROFILE_TOP', '40'))
+PROFILE_TRACE_FRAMES = int(os.environ.get('PROFILE_TRACE_FRAMES', '1'))
+# How often traced memory is checked to keep a snapshot close to the peak
+PROFILE_MEMORY_INTERVAL = float(os.environ.get('PROFILE_MEMORY_INTERVAL', '0.05'))
+
+_s3_client = None
+
+
+def _s3() -> Any:
+    global _s3_client
+    if _s3_client is None:
+        import boto3
+        _s3_client = boto3.client('s3')
+    return _s3_client
+
+
+def _has_profile_tag(event: Dict[str, Any]) -> bool:
+    for record in event.get('Records') or []:
+        if 's3' not in record:
+            continue
+        response = _s3().get_object_tagging(
+            Bucket=record['s3']['bucket']['name'],
+            Key=unquote_plus(record['s3']['object']['key'])
+        )
+        if any(tag['Key'] == PROFILE_TAG and tag['Value'].lower() == 'true' for tag in response.get('TagSet', [])):
+            return True
+    return False
+
+
+def profile_trigger(event: Dict[str, Any]) -> Optional[str]:
+    """
+    Why this invocation should be profiled, or None
+    """
+    if 'always' in PROFILE_MODE:
+        return 'always'
+    if 'sample' in PROFILE_MODE and random.random() < PROFILE_SAMPLE_RATE:
+        return 'sample'
+    if 'tag' in PROFILE_MODE:
+        try:
+            if _has_profile_tag(event):
+                return 'tag'
+        except Exception as e:
+            logger.warning(f"Could not read profiling tag: {str(e)}")
+    return None
+
+
+class _PeakSnapshot(threading.Thread):
+    """
+    Keeps the snapshot taken when traced memory was highest, since
+    allocations freed before the handler returns are gone from a final snapshot
+    """
+
+    def __init__(self, interval: float = PROFILE_MEMORY_INTERVAL):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self.size = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.check()
+
+    def check(self) -> None:
+        current, _ = tracemalloc.get_traced_memory()
+        if current > self.size:
+            self.size = current
+            self.snapshot = tracemalloc.take_snapshot()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def _top_allocations(snapshot: tracemalloc.Snapshot) -> List[tracemalloc.Statistic]:
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, threading.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>')
+    ])
+    return snapshot.statistics('lineno')[:PROFILE_TOP]
+
+
+def _write_artifacts(name: str, files: Dict[str, str]) -> str:
+    """
+    Store the artifacts under <PROFILE_OUTPUT>/<name>/ and return that location
+    """
+    if PROFILE_OUTPUT.startswith('s3://'):
+        bucket, _, prefix = PROFILE_OUTPUT[len('s3://'):].partition('/')
+        base = f"{prefix.rstrip('/')}/{name}".lstrip('/')
+        for filename, path in files.items():
+            with open(path, 'rb') as f:
+                _s3().put_object(Bucket=bucket, Key=f"{base}/{filename}", Body=f.read())
+        return f"s3://{bucket}/{base}"
+
+    target = os.path.join(PROFILE_OUTPUT, name)
+    os.makedirs(target, exist_ok=True)
+    for filename, path in files.items():
+        shutil.copyfile(path, os.path.join(target, filename))
+    return target
+
+
+def _save_profile(profiler: cProfile.Profile, peak: tracemalloc.Snapshot, final: tracemalloc.Snapshot,
+                  summary: Dict[str, Any]) -> str:
+    workdir = os.path.join('/tmp', f"profile-{summary['request_id']}")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        files = {name: os.path.join(workdir, name) for name in ('cpu.pstats', 'cpu.txt', 'memory.txt', 'summary.json')}
+        profiler.dump_stats(files['cpu.pstats'])
+
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(PROFILE_TOP)
+        with open(files['cpu.txt'], 'w') as f:
+            f.write(report.getvalue())
+
+        top = _top_allocations(peak)
+        with open(files['memory.txt'], 'w') as f:
+            f.write('# Allocations alive at peak traced memory\n')
+            f.write('\n'.join(str(stat) for stat in top) + '\n\n')
+            f.write('# Allocations still alive when the handler returned\n')
+            f.write('\n'.join(str(stat) for stat in _top_allocations(final)) + '\n')
+        summary['top_allocations'] = [
+            {'location': str(stat.traceback), 'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+            for stat in top[:10]
+        ]
+
+        with open(files['summary.json'], 'w') as f:
+            json.dump(summary, f, indent=2)
+
+        return _write_artifacts(f"{summary['function']}/{summary['request_id']}", files)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _run_profiled(handler: Callable[..., Any], event: Dict[str, Any], context: Any, trigger: str) -> Any:
+    """
+    Run the handler under cProfile and tracemalloc. Only the handler's
+    thread is profiled; time spent in worker threads (OCR, hedged LLM
+    calls) shows up as waits on their futures.
+    """
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(PROFILE_TRACE_FRAMES)
+    profiler = cProfile.Profile()
+    sampler = _PeakSnapshot()
+    error = None
+    started = time.perf_counter()
+
+    sampler.start()
+    profiler.enable()
+    try:
+        return handler(event, context)
+    except Exception as e:
+        error = f"{type(e).__name__}: {str(e)}"
+        raise
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - started
+        sampler.stop()
+        sampler.check()
+        final = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+
+        try:
+            location = _save_profile(profiler, sampler.snapshot or final, final, {
+                'function': getattr(context, 'function_name', handler.__module__),
+                'request_id': getattr(context, 'aws_request_id', None) or f"local-{int(time.time() * 1000)}",
+                'trigger': trigger,
+                'duration_ms': round(elapsed * 1000, 1),
+                'peak_traced_mb': round(peak / 1024 / 1024, 2),
+                'error': error
+            })
+            logger.info(f"Profile ({trigger}) written to {location}")
+        except Exception as e:
+            logger.error(f"Could not write profile artifacts: {str(e)}")
+
+
+def profiled(handler: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Decorator for Lambda handlers that captures cProfile stats and the top
+    tracemalloc allocations of selected invocations (see PROFILE_MODE).
+    When profiling is off the handler itself is returned, so there is no
+    per-invocation cost.
+    """
+    if not PROFILE_MODE:
+        return handler
+
+    @functools.wraps(handler)
+    def wrapper(event: Dict[str, Any], context: Any) -> Any:
+        trigger = profile_trigger(event)
+        if trigger is None:
+            return handler(event, context)
+        return _run_profiled(handler, event, context, trigger)
+
+    return wrapper
@@ -0,0 +1,332 @@
+import os
+import sys
+import json
+import time
+import base64
+import hashlib
+import logging
+import random
+from decimal import Decimal
+from typing import Dict, Any, List, Optional
+import boto3
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from llm_cache import LRUCache
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Cache configuration: entries are revalidated against the invalidation
+# generations at most every CACHE_CHECK_SECONDS
+CACHE_CHECK_SECONDS = int(os.environ.get('RESULTS_CACHE_CHECK_SECONDS', '5'))
+CACHE_MAX_ENTRIES = int(os.environ.get('RESULTS_CACHE_MAX_ENTRIES', '1024'))
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+RECENT_ENTITY = 'application'
+# Candidate matrix written by the export stream consumer (see matching.py)
+MATCH_BUCKET = os.environ.get('MATCH_BUCKET', '')
+MATCH_MATRIX_KEY = os.environ.get('MATCH_MATRIX_KEY', 'matching/candidates.npz')
+
+# Counters for the lifetime of the container
+metrics = {'requests': 0, 'cache_hits': 0, 'not_modified': 0, 'backend_reads': 0, 'generation_reads': 0}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_cursor(last_key: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not last_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_key, default=_json_default).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not cursor:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+
+def to_result(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Public shape of a stored analysis
+    """
+    additional_info = json.loads(item.get('additional_info') or '{}')
+    return {
+        'cv_file': item['cv_file'],
+        'name': item.get('name'),
+        'email': item.get('email'),
+        'phone': additional_info.get('phone'),
+        'country': additional_info.get('country'),
+        'recommendations': additional_info.get('recommendations', []),
+        'position_ids': additional_info.get('position_ids', []),
+        'created_at': item.get('created_at'),
+        'duplicate_of': item.get('duplicate_of')
+    }
+
+
+class ResultsStore:
+    """
+    Reads from the applications table, with an in-container LRU cache whose
+    entries are invalidated through per-key generation counters that the
+    stream consumer bumps on every change.
+    """
+
+    def __init__(self, table: Any, generations_table: Any, check_seconds: float = CACHE_CHECK_SECONDS,
+                 max_entries: int = CACHE_MAX_ENTRIES, clock: Any = time.time):
+        self.table = table
+        self.generations_table = generations_table
+        self.check_seconds = check_seconds
+        self.clock = clock
+        self.cache = LRUCache(max_entries=max_entries)
+
+    def _generations(self, keys: List[str]) -> Dict[str, int]:
+        metrics['generation_reads'] += 1
+        response = self.generations_table.meta.client.batch_get_item(RequestItems={
+            self.generations_table.name: {
+                'Keys': [{'cache_key': key} for key in keys],
+                'ProjectionExpression': 'cache_key, generation'
+            }
+        })
+        found = {
+            item['cache_key']: int(item['generation'])
+            for item in response.get('Responses', {}).get(self.generations_table.name, [])
+        }
+        return {key: found.get(key, 0) for key in keys}
+
+    def _cached(self, cache_key: str, invalidation_key: str, load: Any) -> Dict[str, Any]:
+        entry = self.cache.get(cache_key)
+        now = self.clock()
+        if entry is not None and now - entry['checked_at'] < self.check_seconds:
+            metrics['cache_hits'] += 1
+            return entry['page']
+
+        generation = self._generations([invalidation_key])[invalidation_key]
+        if entry is not None and entry['generation'] == generation:
+            entry['checked_at'] = now
+            metrics['cache_hits'] += 1
+            return entry['page']
+
+        page = load()
+        self.cache.set(cache_key, {'page': page, 'generation': generation, 'checked_at': now})
+        return page
+
+    def _query(self, **kwargs: Any) -> Dict[str, Any]:
+        metrics['backend_reads'] += 1
+        response = self.table.query(**kwargs)
+        return {
+            'items': [to_result(item) for item in response.get('Items', [])],
+            'next_cursor': encode_cursor(response.get('LastEvaluatedKey'))
+        }
+
+    def _page_args(self, limit: int, cursor: Optional[str]) -> Dict[str, Any]:
+        args: Dict[str, Any] = {'Limit': limit}
+        start_key = decode_cursor(cursor)
+        if start_key:
+            args['ExclusiveStartKey'] = start_key
+        return args
+
+    def by_file(self, cv_file: str) -> Dict[str, Any]:
+        return self._cached(
+            f"file#{cv_file}", f"file#{cv_file}",
+            lambda: self._query(KeyConditionExpression=Key('cv_file').eq(cv_file))
+        )
+
+    def by_email(self, email: str, limit: int, cursor: Optional[str]) -> Dict[str, Any]:
+        return self._cached(
+            f"email#{email}#{limit}#{cursor}", f"email#{email}",
+            lambda: self._query(IndexName='EmailIndex', KeyConditionExpression=Key('email').eq(email),
+                                **self._page_args(limit, cursor))
+        )
+
+    def recent(self, limit: int, cursor: Optional[str]) -> Dict[str, Any]:
+        return self._cached(
+            f"recent#{limit}#{cursor}", 'recent',
+            lambda: self._query(IndexName='RecentIndex', KeyConditionExpression=Key('entity').eq(RECENT_ENTITY),
+                                ScanIndexForward=False, **self._page_args(limit, cursor))
+        )
+
+
+class MatchIndex:
+    """
+    The persisted candidate matrix, reloaded only when its ETag changes and
+    checked at most every CACHE_CHECK_SECONDS. numpy is imported on first use,
+    so the other endpoints do not pay for it.
+    """
+
+    def __init__(self, s3_client: Any, bucket: str, key: str, check_seconds: float = CACHE_CHECK_SECONDS,
+                 clock: Any = time.time):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.check_seconds = check_seconds
+        self.clock = clock
+        self.matrix: Any = None
+        self.etag: Optional[str] = None
+        self.checked_at = float('-inf')
+
+    def _current(self) -> Any:
+        from matching import load_from_s3, CandidateMatrix
+
+        now = self.clock()
+        if self.matrix is not None and now - self.checked_at < self.check_seconds:
+            return self.matrix
+        try:
+            etag = self.s3_client.head_object(Bucket=self.bucket, Key=self.key)['ETag']
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('404', 'NoSuchKey'):
+                raise
+            etag = None
+        if etag is None:
+            self.matrix, self.etag = CandidateMatrix(), None
+        elif etag != self.etag:
+            metrics['backend_reads'] += 1
+            # Drop the old copy first, so a reload does not hold two matrices at once
+            self.matrix, self.etag = None, None
+            self.matrix, self.etag = load_from_s3(self.s3_client, self.bucket, self.key)
+        self.checked_at = now
+        return self.matrix
+
+    def top_k(self, positions: List[str], country: str, k: int) -> Dict[str, Any]:
+        from taxonomy import normalize_recommendations
+
+        job = {'recommendations': positions, 'position_ids': normalize_recommendations(positions), 'country': country}
+        matrix = self._current()
+        return {
+            'job': job,
+            'candidates': matrix.size,
+            'items': [{'cv_file': cv_file, 'score': round(score, 4)} for cv_file, score in matrix.top_k(job, k)]
+        }
+
+
+def _response(status: int, body: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        'statusCode': status,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            **headers
+        },
+        'body': json.dumps(body, default=_json_default) if body else ''
+    }
+
+
+def handle_request(store: ResultsStore, event: Dict[str, Any], matches: Optional[MatchIndex] = None) -> Dict[str, Any]:
+    metrics['requests'] += 1
+    params = event.get('queryStringParameters') or {}
+    path_params = event.get('pathParameters') or {}
+    limit = max(1, min(int(params.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE))
+    cursor = params.get('cursor')
+
+    if event.get('resource', '').endswith('/matches'):
+        positions = [position.strip() for position in (params.get('positions') or '').split(',') if position.strip()]
+        if matches is None or not positions:
+            return _response(400, {'error': 'Provide a comma-separated positions parameter'}, {})
+        page = matches.top_k(positions, (params.get('country') or '').strip(), limit)
+    elif path_params.get('cv_file'):
+        page = store.by_file(path_params['cv_file'])
+        if not page['items']:
+            return _response(404, {'error': 'CV not found'}, {})
+    elif event.get('resource', '').endswith('/recent'):
+        page = store.recent(limit, cursor)
+    elif params.get('email'):
+        page = store.by_email(params['email'].strip().lower(), limit, cursor)
+    else:
+        return _response(400, {'error': 'Provide a cv_file path, an email parameter or use /results/recent'}, {})
+
+    body = json.dumps(page, default=_json_default, sort_keys=True)
+    etag = f"\"{hashlib.sha256(body.encode('utf-8')).hexdigest()[:32]}\""
+    headers = {
+        'ETag': etag,
+        # Results contain personal data: cacheable by the client, not by shared caches
+        'Cache-Control': f"private, max-age={CACHE_CHECK_SECONDS}"
+    }
+
+    request_headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+    if request_headers.get('if-none-match') == etag:
+        metrics['not_modified'] += 1
+        return _response(304, {}, headers)
+    return _response(200, page, headers)
+
+
+dynamodb = boto3.resource('dynamodb')
+store = ResultsStore(
+    dynamodb.Table(os.environ.get('DYNAMODB_TABLE', 'applications')),
+    dynamodb.Table(os.environ.get('CACHE_GENERATIONS_TABLE', 'api-cache-generations'))
+)
+matches = MatchIndex(boto3.client('s3'), MATCH_BUCKET, MATCH_MATRIX_KEY) if MATCH_BUCKET else None
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler for the GET /results and GET /matches endpoints
+    """
+    try:
+        response = handle_request(store, event, matches)
+        logger.info(f"Results API metrics: {json.dumps(metrics)}")
+        return response
+
+    except ValueError as e:
+        return _response(400, {'error': str(e)}, {})
+
+    except Exception as e:
+        logger.error(f"Error reading results: {str(e)}")
+        return _response(500, {'error': str(e), 'type': str(type(e).__name__)}, {})
+
+
+def _load_test(requests: int = 5000, files: int = 500, rate: float = 50.0) -> None:
+    """
+    Backend reads per request with and without the cache, for Zipf-distributed
+    lookups by file and by email at `rate` requests per simulated second
+    against an in-memory fake table
+    """
+    rng = random.Random(5)
+    items = [{'cv_file': f"cv-{i}.pdf", 'email': f"user{i % 200}@mail.com", 'name': f"User {i}",
+              'additional_info': '{}', 'entity': RECENT_ENTITY, 'created_at': f"{i:08d}"} for i in range(files)]
+
+    class FakeTable:
+        name = 'fake'
+
+        def __init__(self) -> None:
+            self.meta = self
+            self.client = self
+
+        def query(self, **kwargs: Any) -> Dict[str, Any]:
+            return {'Items': items[:1]}
+
+        def batch_get_item(self, RequestItems: Dict[str, Any]) -> Dict[str, Any]:
+            return {'Responses': {}}
+
+    weights = [1 / (rank + 1) for rank in range(files)]
+    events = []
+    for _ in range(requests):
+        index = rng.choices(range(files), weights)[0]
+        if rng.random() < 0.5:
+            events.append({'pathParameters': {'cv_file': f"cv-{index}.pdf"}})
+        else:
+            events.append({'queryStringParameters': {'email': f"user{index % 200}@mail.com"}})
+
+    for label, max_entries in (('no_cache', 0), ('cache', CACHE_MAX_ENTRIES)):
+        for key in metrics:
+            metrics[key] = 0
+        clock = [0.0]
+        test_store = ResultsStore(FakeTable(), FakeTable(), max_entries=max_entries, clock=lambda: clock[0])
+        for event in events:
+            clock[0] += 1 / rate
+            handle_request(test_store, event)
+        print(json.dumps({
+            'mode': label,
+            'requests': requests,
+            'queries_per_request': round(metrics['backend_reads'] / requests, 3),
+            'generation_checks_per_request': round(metrics['generation_reads'] / requests, 3)
+        }))
+
+
+if __name__ == '__main__':
+    _load_test(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,202 @@
+import io
+import os
+import sys
+import json
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Range reader configuration
+RANGE_BLOCK_SIZE = int(os.environ.get('PDF_RANGE_BLOCK_SIZE', str(64 * 1024)))
+RANGE_TAIL_SIZE = int(os.environ.get('PDF_RANGE_TAIL_SIZE', str(128 * 1024)))
+RANGE_CACHE_BLOCKS = int(os.environ.get('PDF_RANGE_CACHE_BLOCKS', '256'))
+# Adjacent missing blocks are fetched together up to this many blocks per GET
+RANGE_MAX_MERGE_BLOCKS = 16
+
+
+class S3RangeFile(io.RawIOBase):
+    """
+    Read-only, seekable file object over an S3 object that fetches bytes
+    lazily with range GETs.
+
+    The tail of the object (trailer and cross-reference table of a PDF) is
+    fetched on open, so pdfminer can locate objects and then read only the
+    ones the selected pages reference. Reads are served from a small LRU
+    cache of fixed-size blocks; runs of missing blocks are fetched with one
+    request.
+    """
+
+    def __init__(self, s3_client: Any, bucket: str, key: str, version_id: Optional[str] = None,
+                 block_size: int = RANGE_BLOCK_SIZE, tail_size: int = RANGE_TAIL_SIZE,
+                 cache_blocks: int = RANGE_CACHE_BLOCKS):
+        super().__init__()
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.version_id = version_id
+        self.block_size = block_size
+        self.cache_blocks = cache_blocks
+        self._blocks: "OrderedDict[int, bytes]" = OrderedDict()
+        self._pos = 0
+        self.stats = {'requests': 0, 'bytes_transferred': 0, 'fetch_ms': 0.0}
+        self._opened_at = time.perf_counter()
+
+        # Tail GET: learns the object size and prefetches the trailer/xref
+        body, content_range = self._get(f"bytes=-{tail_size}")
+        self.size = int(content_range.rsplit('/', 1)[1])
+        tail_start = self.size - len(body)
+        first_block = -(-tail_start // block_size)  # Only blocks fully inside the tail
+        for index in range(first_block, self._block_count()):
+            offset = index * block_size - tail_start
+            self._cache(index, body[offset:offset + block_size])
+
+    def _block_count(self) -> int:
+        return -(-self.size // self.block_size)
+
+    def _get(self, byte_range: str) -> Tuple[bytes, str]:
+        params = {'Bucket': self.bucket, 'Key': self.key, 'Range': byte_range}
+        if self.version_id:
+            params['VersionId'] = self.version_id
+        started = time.perf_counter()
+        response = self.s3_client.get_object(**params)
+        body = response['Body'].read()
+        self.stats['fetch_ms'] += (time.perf_counter() - started) * 1000
+        self.stats['requests'] += 1
+        self.stats['bytes_transferred'] += len(body)
+        return body, response['ContentRange']
+
+    def _cache(self, index: int, data: bytes) -> None:
+        self._blocks[index] = data
+        self._blocks.move_to_end(index)
+        while len(self._blocks) > self.cache_blocks:
+            self._blocks.popitem(last=False)
+
+    def _fetch_blocks(self, first: int, last: int) -> List[bytes]:
+        """
+        Return blocks first..last (inclusive), fetching runs of missing blocks with one GET each
+        """
+        found: Dict[int, bytes] = {}
+        for index in range(first, last + 1):
+            if index in self._blocks:
+                self._blocks.move_to_end(index)
+                found[index] = self._blocks[index]
+        missing = [index for index in range(first, last + 1) if index not in found]
+        runs: List[List[int]] = []
+        for index in missing:
+            if runs and index == runs[-1][-1] + 1 and len(runs[-1]) < RANGE_MAX_MERGE_BLOCKS:
+                runs[-1].append(index)
+            else:
+                runs.append([index])
+
+        for run in runs:
+            start = run[0] * self.block_size
+            end = min((run[-1] + 1) * self.block_size, self.size) - 1
+            body, _ = self._get(f"bytes={start}-{end}")
+            for index in run:
+                offset = index * self.block_size - start
+                found[index] = body[offset:offset + self.block_size]
+                self._cache(index, found[index])
+
+        return [found[index] for index in range(first, last + 1)]
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        self._pos = max(0, self._pos)
+        return self._pos
+
+    def readinto(self, buffer: Any) -> int:
+        length = min(len(buffer), self.size - self._pos)
+        if length <= 0:
+            return 0
+
+        first = self._pos // self.block_size
+        last = (self._pos + length - 1) // self.block_size
+        blocks = self._fetch_blocks(first, last)
+
+        view = memoryview(buffer)
+        written = 0
+        for index, block in enumerate(blocks, first):
+            start = self._pos + written - index * self.block_size
+            chunk = block[start:start + length - written]
+            view[written:written + len(chunk)] = chunk
+            written += len(chunk)
+
+        self._pos += written
+        return written
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Bytes transferred and time spent compared to downloading the whole object
+        """
+        return {
+            'object_bytes': self.size,
+            'bytes_transferred': self.stats['bytes_transferred'],
+            'transferred_pct': round(100 * self.stats['bytes_transferred'] / self.size, 1) if self.size else 0.0,
+            'requests': self.stats['requests'],
+            'fetch_ms': round(self.stats['fetch_ms'], 1),
+            'elapsed_ms': round((time.perf_counter() - self._opened_at) * 1000, 1)
+        }
+
+    def close(self) -> None:
+        if not self.closed:
+            logger.info(f"Range reads for {self.key}: {json.dumps(self.report())}")
+            self._blocks.clear()
+        super().close()
+
+
+def _benchmark(bucket: str, key: str, max_pages: int) -> None:
+    """
+    Compare a full download with range reads for extracting the first pages of one object
+    """
+    import boto3
+    import pdfplumber
+
+    s3_client = boto3.client('s3')
+
+    started = time.perf_counter()
+    response = s3_client.get_object(Bucket=bucket, Key=key)
+    full = response['Body'].read()
+    with pdfplumber.open(io.BytesIO(full), pages=list(range(1, max_pages + 1))) as pdf:
+        for page in pdf.pages:
+            page.extract_text()
+    full_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    range_file = S3RangeFile(s3_client, bucket, key)
+    with pdfplumber.open(range_file, pages=list(range(1, max_pages + 1))) as pdf:
+        for page in pdf.pages:
+            page.extract_text()
+    range_ms = (time.perf_counter() - started) * 1000
+
+    print(json.dumps({
+        'full_bytes': len(full),
+        'full_ms': round(full_ms, 1),
+        'range_ms': round(range_ms, 1),
+        **range_file.report()
+    }))
+    range_file.close()
+
+
+if __name__ == '__main__':
+    _benchmark(sys.argv[1], sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 3)
@@ -0,0 +1,298 @@
+import os
+import sys
+import json
+import time
+import uuid
+import heapq
+import random
+import logging
+import itertools
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
+from botocore.exceptions import ClientError
+from deadline import DeadlineExceeded
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Lanes in priority order
+LANES = ('interactive', 'bulk', 'reprocess')
+DEFAULT_TENANT = 'default'
+
+
+def _parse_pairs(value: str, cast: Callable[[str], Any]) -> Dict[str, Any]:
+    """
+    Parse "a=1,b=2" style settings
+    """
+    pairs = {}
+    for part in value.split(','):
+        if '=' in part:
+            name, number = part.split('=', 1)
+            pairs[name.strip()] = cast(number)
+    return pairs
+
+
+# Concurrent LLM calls allowed per lane across all containers. Together they
+# should stay under the OpenAI rate limit, so a backfill can never take the
+# slots interactive uploads need.
+LANE_LIMITS = {'interactive': 3, 'bulk': 6, 'reprocess': 1,
+               **_parse_pairs(os.environ.get('SCHEDULER_LANE_LIMITS', ''), int)}
+TENANT_WEIGHTS = _parse_pairs(os.environ.get('SCHEDULER_TENANT_WEIGHTS', ''), float)
+SLOT_LEASE_SECONDS = int(os.environ.get('SCHEDULER_SLOT_LEASE_SECONDS', '300'))
+# Waiting containers retry with exponential backoff and full jitter, so a
+# backlog does not turn into a steady stream of conditional writes
+SLOT_POLL_SECONDS = float(os.environ.get('SCHEDULER_SLOT_POLL_SECONDS', '0.5'))
+SLOT_MAX_POLL_SECONDS = float(os.environ.get('SCHEDULER_SLOT_MAX_POLL_SECONDS', '8'))
+
+# Counters for the lifetime of the container
+metrics = {'acquired': 0, 'waits': 0, 'wait_seconds': 0.0, 'polls': 0, 'expired_leases': 0, 'timeouts': 0}
+
+
+def classify(metadata: Optional[Dict[str, str]] = None, default_lane: str = 'bulk',
+             default_tenant: str = DEFAULT_TENANT) -> Tuple[str, str]:
+    """
+    Lane and tenant of an object from the metadata upload_cv sets on it
+    (x-amz-meta-lane / x-amz-meta-tenant). Keys carry no tenant (upload_cv
+    stores the plain filename), so objects written straight to the bucket
+    and backfills get the given defaults.
+    """
+    metadata = metadata or {}
+    lane = metadata.get('lane') if metadata.get('lane') in LANES else default_lane
+    return lane, metadata.get('tenant') or default_tenant
+
+
+class FairQueue:
+    """
+    Strict priority between lanes, weighted fair queuing between tenants
+    inside a lane, and a concurrency limit per lane.
+
+    Each submitted item gets a virtual finish time of
+    max(lane virtual time, tenant's last finish) + cost / weight, and the
+    lane serves the smallest finish time first (self-clocked fair queuing).
+    A tenant that queues 5,000 files therefore only delays another
+    tenant's first file by about one item.
+
+    The queue lives for one invocation: it orders the records of a single
+    S3 event and the objects of a backfill. A one-object upload event gains
+    nothing from it; across invocations, lanes are kept apart by LaneSlots
+    (lane priority and limits shared through DynamoDB), not per tenant.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None, weights: Optional[Dict[str, float]] = None):
+        self.limits = dict(limits or LANE_LIMITS)
+        self.weights = dict(TENANT_WEIGHTS if weights is None else weights)
+        self.queues: Dict[str, List[Tuple[float, int, str, Any]]] = {lane: [] for lane in LANES}
+        self.running = {lane: 0 for lane in LANES}
+        self.virtual_time = {lane: 0.0 for lane in LANES}
+        self.last_finish: Dict[Tuple[str, str], float] = {}
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def submit(self, item: Any, lane: str, tenant: str = DEFAULT_TENANT, cost: float = 1.0) -> None:
+        if lane not in self.queues:
+            raise ValueError(f"Unknown lane: {lane}")
+        start = max(self.virtual_time[lane], self.last_finish.get((lane, tenant), 0.0))
+        finish = start + cost / self.weights.get(tenant, 1.0)
+        self.last_finish[(lane, tenant)] = finish
+        heapq.heappush(self.queues[lane], (finish, next(self._sequence), tenant, item))
+
+    def pop(self) -> Optional[Tuple[str, str, Any]]:
+        """
+        Next (lane, tenant, item) that may start now, or None
+        """
+        for lane in LANES:
+            queue = self.queues[lane]
+            if queue and self.running[lane] < self.limits.get(lane, 1):
+                finish, _, tenant, item = heapq.heappop(queue)
+                self.virtual_time[lane] = finish
+                self.running[lane] += 1
+                return lane, tenant, item
+        return None
+
+    def done(self, lane: str) -> None:
+        self.running[lane] -= 1
+
+    def take_all(self) -> List[Any]:
+        """
+        Remove and return every queued item, in the order they would have been served
+        """
+        items = []
+        for lane in LANES:
+            items.extend(item for _, _, _, item in sorted(self.queues[lane]))
+            self.queues[lane] = []
+        return items
+
+
+class LaneSlots:
+    """
+    Distributed per-lane concurrency limit on DynamoDB.
+
+    Every lane has `limit` slot items ("<lane>#<n>"). A slot is taken with a
+    conditional PutItem that only succeeds when the slot is free or its lease
+    has expired, so a container that dies mid-call cannot leak a slot for
+    longer than SLOT_LEASE_SECONDS.
+    """
+
+    def __init__(self, client: Any, table: str, limits: Optional[Dict[str, int]] = None,
+                 lease_seconds: int = SLOT_LEASE_SECONDS, poll_seconds: float = SLOT_POLL_SECONDS,
+                 max_poll_seconds: float = SLOT_MAX_POLL_SECONDS, sleep: Callable[[float], None] = time.sleep):
+        self.client = client
+        self.table = table
+        self.limits = dict(limits or LANE_LIMITS)
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.max_poll_seconds = max_poll_seconds
+        self.sleep = sleep
+        self.owner = uuid.uuid4().hex
+
+    def _try_acquire(self, lane: str) -> Optional[str]:
+        slots = list(range(self.limits.get(lane, 1)))
+        random.shuffle(slots)
+        now = int(time.time())
+        for number in slots:
+            slot = f"{lane}#{number}"
+            try:
+                self.client.put_item(
+                    TableName=self.table,
+                    Item={
+                        'slot': {'S': slot},
+                        'owner': {'S': self.owner},
+                        'expires_at': {'N': str(now + self.lease_seconds)}
+                    },
+                    ConditionExpression='attribute_not_exists(slot) OR expires_at < :now',
+                    ExpressionAttributeValues={':now': {'N': str(now)}}
+                )
+                return slot
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+        return None
+
+    def _release(self, slot: str) -> None:
+        try:
+            self.client.delete_item(
+                TableName=self.table,
+                Key={'slot': {'S': slot}},
+                ConditionExpression='#owner = :owner',
+                ExpressionAttributeNames={'#owner': 'owner'},
+                ExpressionAttributeValues={':owner': {'S': self.owner}}
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            # The lease expired and another container took the slot
+            metrics['expired_leases'] += 1
+
+    @contextmanager
+    def slot(self, lane: str, remaining: Callable[[], float]) -> Iterator[str]:
+        """
+        Hold one slot of `lane`, waiting while `remaining()` seconds of budget
+        are left. Raises DeadlineExceeded when no slot frees up in time.
+        """
+        started = time.monotonic()
+        slot = self._try_acquire(lane)
+        if slot is None:
+            metrics['waits'] += 1
+        attempt = 0
+        while slot is None:
+            budget = remaining() - self.poll_seconds
+            if budget <= 0:
+                metrics['timeouts'] += 1
+                raise DeadlineExceeded(f"No free {lane} slot within the invocation budget")
+            self.sleep(min(budget, random.uniform(0, min(self.max_poll_seconds, self.poll_seconds * 2 ** attempt))))
+            attempt += 1
+            metrics['polls'] += 1
+            slot = self._try_acquire(lane)
+
+        waited = time.monotonic() - started
+        metrics['acquired'] += 1
+        metrics['wait_seconds'] = round(metrics['wait_seconds'] + waited, 3)
+        if waited > 0.1:
+            logger.info(f"Waited {waited:.1f}s for a {lane} slot")
+        try:
+            yield slot
+        finally:
+            self._release(slot)
+
+
+def _simulate(duration: float = 3600.0, seed: int = 7) -> None:
+    """
+    Discrete-event simulation of mixed load on a shared OpenAI quota of
+    sum(LANE_LIMITS) concurrent calls: a 5,000-file backfill from one tenant,
+    a 300-file import from another, a reprocess trickle and interactive
+    uploads arriving every ~20 s. Compares a single FIFO against FairQueue
+    and reports the queueing delay per lane (and per tenant for bulk).
+    """
+    rng = random.Random(seed)
+    capacity = sum(LANE_LIMITS.values())
+
+    arrivals: List[Tuple[float, str, str]] = []
+    arrivals += [(0.0, 'bulk', 'acme')] * 5000
+    arrivals += [(600.0, 'bulk', 'globex')] * 300
+    arrivals += [(t * 30.0, 'reprocess', 'acme') for t in range(int(duration / 30))]
+    clock = 0.0
+    while clock < duration:
+        clock += rng.expovariate(1 / 20)
+        arrivals.append((clock, 'interactive', rng.choice(['acme', 'globex', 'initech'])))
+    arrivals.sort(key=lambda arrival: arrival[0])
+    service = [rng.lognormvariate(1.5, 0.4) for _ in arrivals]
+
+    def run(fair: bool) -> Dict[str, List[float]]:
+        queue = FairQueue(limits=LANE_LIMITS if fair else {lane: capacity for lane in LANES}, weights={})
+        fifo: List[int] = []
+        events: List[Tuple[float, int, str, Any]] = []
+        for index, (at, _, _) in enumerate(arrivals):
+            heapq.heappush(events, (at, index, 'arrive', index))
+        sequence = itertools.count(len(arrivals))
+        busy = 0
+        delays: Dict[str, List[float]] = {}
+
+        while events:
+            now, _, kind, payload = heapq.heappop(events)
+            if kind == 'arrive':
+                _, lane, tenant = arrivals[payload]
+                if fair:
+                    queue.submit(payload, lane, tenant)
+                else:
+                    fifo.append(payload)
+            else:
+                busy -= 1
+                if fair:
+                    queue.done(payload)
+
+            while busy < capacity:
+                if fair:
+                    entry = queue.pop()
+                    if entry is None:
+                        break
+                    lane, tenant, index = entry
+                elif fifo:
+                    index = fifo.pop(0)
+                    lane, tenant = arrivals[index][1], arrivals[index][2]
+                else:
+                    break
+                busy += 1
+                label = f"{lane}:{tenant}" if lane == 'bulk' else lane
+                delays.setdefault(label, []).append(now - arrivals[index][0])
+                heapq.heappush(events, (now + service[index], next(sequence), 'finish', lane))
+        return delays
+
+    def summary(values: List[float]) -> Dict[str, float]:
+        values = sorted(values)
+        return {
+            'n': len(values),
+            'mean': round(sum(values) / len(values), 1),
+            'p95': round(values[min(len(values) - 1, int(len(values) * 0.95))], 1)
+        }
+
+    for label, fair in (('fifo', False), ('fair', True)):
+        delays = run(fair)
+        print(json.dumps({'scheduler': label, 'capacity': capacity,
+                          'queue_delay_seconds': {lane: summary(values) for lane, values in sorted(delays.items())}}))
+
+
+if __name__ == '__main__':
+    _simulate(float(sys.argv[1]) if len(sys.argv) > 1 else 3600.0)
@@ -0,0 +1,306 @@
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import random
+import logging
+import functools
+import unicodedata
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_PATH = os.path.join(BASE_DIR, 'position_taxonomy.json')
+INDEX_PATH = os.environ.get('TAXONOMY_INDEX_PATH', os.path.join(BASE_DIR, 'position_taxonomy.idx'))
+INDEX_VERSION = 1
+
+# Minimum Dice similarity of trigram sets for a fuzzy match
+MIN_SCORE = float(os.environ.get('TAXONOMY_MIN_SCORE', '0.55'))
+# Shortest input that may be completed from the prefix trie
+MIN_PREFIX = 4
+# Completions kept on every trie node
+TRIE_FANOUT = 8
+
+PARENTHESES = re.compile(r'\([^)]*\)|\[[^\]]*\]')
+NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+ABBREVIATIONS = {
+    'sr': 'senior', 'snr': 'senior', 'jr': 'junior', 'jnr': 'junior', 'ssr': 'semi senior',
+    'dev': 'developer', 'devs': 'developer', 'eng': 'engineer', 'engr': 'engineer',
+    'mgr': 'manager', 'mngr': 'manager', 'admin': 'administrator', 'sw': 'software',
+    'ing': 'ingeniero', 'asist': 'asistente', 'tec': 'tecnico', 'lic': 'licenciado',
+    'desarrolladora': 'desarrollador', 'ingeniera': 'ingeniero', 'programadora': 'programador',
+    'disenadora': 'disenador', 'consultora': 'consultor', 'contadora': 'contador'
+}
+# Seniority is reported apart from the position
+SENIORITY = {
+    'senior': 'senior', 'junior': 'junior', 'semi': 'mid', 'mid': 'mid', 'middle': 'mid',
+    'trainee': 'trainee', 'intern': 'trainee', 'internship': 'trainee', 'practicante': 'trainee',
+    'pasante': 'trainee', 'entry': 'junior', 'level': None, 'i': None, 'ii': None, 'iii': None
+}
+STOPWORDS = {'de', 'del', 'la', 'el', 'los', 'las', 'en', 'y', 'e', 'o', 'of', 'the', 'and', 'a', 'an', 'para', 'con', 'for'}
+
+
+def normalize_title(title: str) -> Tuple[str, Optional[str]]:
+    """
+    Lowercase, strip accents, punctuation and parenthesized details, expand
+    abbreviations and split off the seniority. Returns (normalized, seniority).
+    """
+    text = unicodedata.normalize('NFKD', PARENTHESES.sub(' ', title or '').lower())
+    text = NON_ALNUM.sub(' ', ''.join(char for char in text if not unicodedata.combining(char)))
+
+    words = []
+    seniority = None
+    for word in text.split():
+        for part in ABBREVIATIONS.get(word, word).split():
+            if part in SENIORITY:
+                seniority = seniority or SENIORITY[part]
+            elif part not in STOPWORDS:
+                words.append(part)
+    return ' '.join(words), seniority
+
+
+def trigrams(text: str) -> List[str]:
+    padded = f" {text} "
+    return sorted({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+def build_index(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Compile the taxonomy into flat arrays: normalized aliases, exact and
+    word-order-insensitive lookups, trigram postings and a prefix trie
+    whose nodes carry their first completions and whether they are unambiguous
+    """
+    aliases: List[str] = []
+    alias_position: List[int] = []
+    seen = set()
+    for position, entry in enumerate(entries):
+        for title in [entry['en'], entry['es'], *entry.get('aliases', [])]:
+            normalized, _ = normalize_title(title)
+            if normalized and normalized not in seen:
+                seen.add(normalized)
+                aliases.append(normalized)
+                alias_position.append(position)
+
+    postings: Dict[str, List[int]] = {}
+    sizes = []
+    trie: Dict[str, Any] = {}
+    for alias_id, alias in enumerate(aliases):
+        grams = trigrams(alias)
+        sizes.append(len(grams))
+        for gram in grams:
+            postings.setdefault(gram, []).append(alias_id)
+        node = trie
+        for char in alias:
+            node = node.setdefault(char, {})
+            completions = node.setdefault('#', [])
+            if len(completions) < TRIE_FANOUT:
+                completions.append(alias_id)
+            # '@': the only position below this node, or -1 when several share the prefix
+            position = alias_position[alias_id]
+            node['@'] = position if node.get('@', position) == position else -1
+
+    return {
+        'version': INDEX_VERSION,
+        'ids': [entry['id'] for entry in entries],
+        'labels': [[entry['en'], entry['es']] for entry in entries],
+        'aliases': aliases,
+        'alias_position': alias_position,
+        'sizes': sizes,
+        'sorted': {' '.join(sorted(alias.split())): alias_id for alias_id, alias in enumerate(aliases)},
+        'postings': postings,
+        'trie': trie
+    }
+
+
+def write_index(index: Dict[str, Any], path: str = INDEX_PATH) -> int:
+    data = zlib.compress(json.dumps(index, separators=(',', ':'), ensure_ascii=False).encode('utf-8'), 9)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+@functools.lru_cache(maxsize=None)
+def load_index(path: str = INDEX_PATH) -> Dict[str, Any]:
+    """
+    Load the serialized index once per container
+    """
+    started = time.perf_counter()
+    with open(path, 'rb') as f:
+        index = json.loads(zlib.decompress(f.read()))
+    if index.get('version') != INDEX_VERSION:
+        raise ValueError(f"Unsupported taxonomy index version: {index.get('version')}")
+    index['exact'] = {alias: alias_id for alias_id, alias in enumerate(index['aliases'])}
+    logger.info(f"Loaded taxonomy index with {len(index['ids'])} positions in {(time.perf_counter() - started) * 1000:.1f}ms")
+    return index
+
+
+def _result(index: Dict[str, Any], alias_id: int, score: float, seniority: Optional[str], method: str) -> Dict[str, Any]:
+    position = index['alias_position'][alias_id]
+    return {
+        'id': index['ids'][position],
+        'label': index['labels'][position][0],
+        'label_es': index['labels'][position][1],
+        'seniority': seniority,
+        'score': round(score, 3),
+        'method': method
+    }
+
+
+def complete(prefix: str, index: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    Taxonomy ids of the aliases that start with `prefix`
+    """
+    index = index or load_index()
+    node = index['trie']
+    for char in normalize_title(prefix)[0]:
+        node = node.get(char)
+        if node is None:
+            return []
+    ids: List[str] = []
+    for alias_id in node.get('#', []):
+        position_id = index['ids'][index['alias_position'][alias_id]]
+        if position_id not in ids:
+            ids.append(position_id)
+    return ids
+
+
+def match_title(title: str, index: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Map a free-form position title to the taxonomy: exact alias, same words
+    in another order, unambiguous prefix, then trigram similarity
+    """
+    index = index or load_index()
+    normalized, seniority = normalize_title(title)
+    if not normalized:
+        return None
+
+    alias_id = index['exact'].get(normalized)
+    if alias_id is not None:
+        return _result(index, alias_id, 1.0, seniority, 'exact')
+
+    alias_id = index['sorted'].get(' '.join(sorted(normalized.split())))
+    if alias_id is not None:
+        return _result(index, alias_id, 1.0, seniority, 'reordered')
+
+    if len(normalized) >= MIN_PREFIX:
+        node = index['trie']
+        for char in normalized:
+            node = node.get(char)
+            if node is None:
+                break
+        if node is not None and node.get('@', -1) >= 0:
+            return _result(index, node['#'][0], 0.9, seniority, 'prefix')
+
+    grams = trigrams(normalized)
+    postings = index['postings']
+    shared: Counter = Counter()
+    for gram in grams:
+        shared.update(postings.get(gram, ()))
+    if not shared:
+        return None
+
+    sizes = index['sizes']
+    best_id, best_score = max(
+        ((alias_id, 2 * count / (len(grams) + sizes[alias_id])) for alias_id, count in shared.items()),
+        key=lambda candidate: candidate[1]
+    )
+    if best_score < MIN_SCORE:
+        return None
+    return _result(index, best_id, best_score, seniority, 'trigram')
+
+
+def normalize_recommendations(recommendations: List[str]) -> List[str]:
+    """
+    Distinct taxonomy ids for the positions recommended by the model, in order
+    """
+    ids: List[str] = []
+    for title in recommendations or []:
+        match = match_title(title)
+        if match is None:
+            logger.info(f"No taxonomy match for position: {title}")
+        elif match['id'] not in ids:
+            ids.append(match['id'])
+    return ids
+
+
+def _noisy_variants(entries: List[Dict[str, Any]], count: int, rng: random.Random) -> List[Tuple[str, str]]:
+    prefixes = ['', '', 'Sr. ', 'Senior ', 'Jr ', 'Semi Senior ', 'Trainee ']
+    suffixes = ['', '', ' (Python)', ' - Remote', ' II']
+    replacements = [('developer', 'dev'), ('engineer', 'eng'), ('Developer', 'Dev'), ('Engineer', 'Eng'),
+                    ('manager', 'mgr'), ('desarrollador', 'desarrolladora'), ('ingeniero', 'ingeniera')]
+    titles = [(title, entry['id']) for entry in entries for title in [entry['en'], entry['es'], *entry['aliases']]]
+
+    samples = []
+    for _ in range(count):
+        title, position_id = rng.choice(titles)
+        for old, new in replacements:
+            if old in title and rng.random() < 0.5:
+                title = title.replace(old, new)
+        if len(title) > 8 and rng.random() < 0.3:
+            # One typo: drop or swap a character
+            i = rng.randrange(1, len(title) - 2)
+            title = title[:i] + title[i + 1:] if rng.random() < 0.5 else title[:i] + title[i + 1] + title[i] + title[i + 2:]
+        title = rng.choice(prefixes) + (title.title() if rng.random() < 0.5 else title) + rng.choice(suffixes)
+        samples.append((title, position_id))
+    return samples
+
+
+def _benchmark(count: int = 50000) -> None:
+    """
+    Lookup throughput and accuracy on noisy variants (seniority, abbreviations,
+    typos, gendered Spanish titles) of the taxonomy titles
+    """
+    with open(SOURCE_PATH, encoding='utf-8') as f:
+        entries = json.load(f)
+    load_started = time.perf_counter()
+    index = load_index()
+    load_ms = (time.perf_counter() - load_started) * 1000
+    samples = _noisy_variants(entries, count, random.Random(3))
+
+    latencies = []
+    correct = 0
+    matched = 0
+    methods: Counter = Counter()
+    started = time.perf_counter()
+    for title, expected in samples:
+        lookup_started = time.perf_counter()
+        result = match_title(title, index)
+        latencies.append(time.perf_counter() - lookup_started)
+        if result:
+            matched += 1
+            methods[result['method']] += 1
+            correct += result['id'] == expected
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    print(json.dumps({
+        'lookups': count,
+        'index_bytes': os.path.getsize(INDEX_PATH),
+        'load_ms': round(load_ms, 1),
+        'lookups_per_second': int(count / elapsed),
+        'mean_us': round(sum(latencies) / count * 1e6, 1),
+        'p99_us': round(latencies[int(count * 0.99)] * 1e6, 1),
+        'matched': round(matched / count, 3),
+        'accuracy': round(correct / count, 3),
+        'methods': dict(methods)
+    }))
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'bench'
+    if command == 'build':
+        with open(SOURCE_PATH, encoding='utf-8') as f:
+            size = write_index(build_index(json.load(f)))
+        print(f"Wrote {INDEX_PATH} ({size} bytes)")
+    elif command == 'bench':
+        _benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 50000)
+    else:
+        for title in sys.argv[1:]:
+            print(title, '->', json.dumps(match_title(title), ensure_ascii=False))
@@ -0,0 +1,192 @@
+import os
+import re
+import sys
+import time
+import logging
+from collections import Counter
+from typing import Dict, Any, List, Optional, Set
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Precompiled patterns, applied line by line
+HORIZONTAL_SPACE = re.compile(r'[ \t\u00a0\u2000-\u200b\u3000]+')
+PAGE_NUMBER = re.compile(r'^(?:(?:page|p[aá]gina|p[aá]g\.?)\s*)?\d{1,3}(?:\s*(?:of|de|/)\s*\d{1,3})?$', re.IGNORECASE)
+BOILERPLATE = re.compile(
+    r'^(?:curriculum\s+vitae|curr[ií]culum|resume|r[eé]sum[eé]|cv|hoja\s+de\s+vida|'
+    r'references?\s+(?:available\s+)?(?:up)?on\s+request|referencias\s+a\s+solicitud)\.?$',
+    re.IGNORECASE
+)
+LAYOUT_NOISE = re.compile(r'^[\W_]+$')
+DOT_LEADER = re.compile(r'(?:\s*[.…·_-]){4,}\s*')
+HYPHENATED_END = re.compile(r'[A-Za-zÀ-ÿ]-$')
+WORD = re.compile(r'[A-Za-zÀ-ÿ]+')
+LAST_WORD = re.compile(r'([A-Za-zÀ-ÿ]+)-$')
+# Typographic ligatures some PDF fonts extract as a single code point ("ﬁnance")
+LIGATURES = str.maketrans({'\ufb00': 'ff', '\ufb01': 'fi', '\ufb02': 'fl', '\ufb03': 'ffi',
+                           '\ufb04': 'ffl', '\ufb05': 'st', '\ufb06': 'st'})
+# "Page 2", "Página 2 de 5", "2/5" inside a running header/footer
+PAGE_REFERENCE = re.compile(
+    r'(?:page|p[aá]gina|p[aá]g\.?)\s*\d{1,3}(?:\s*(?:of|de|/)\s*\d{1,3})?|\b\d{1,3}\s*(?:of|de|/)\s*\d{1,3}\s*$',
+    re.IGNORECASE
+)
+
+# A line among the first/last EDGE_LINES non-empty lines of a page is treated
+# as a running header/footer when it repeats at the edge of at least this
+# fraction of the pages (and of two pages or more)
+REPEAT_PAGE_RATIO = 0.5
+REPEAT_MAX_LENGTH = 80
+EDGE_LINES = 3
+
+# Words hyphenated at a line end are joined without the hyphen only if the
+# joined word is known: it appears elsewhere in the CV or in this list of
+# words that often wrap. Otherwise the hyphen is a real one ("Full-stack").
+HYPHEN_LEXICON = frozenset('''
+    development management experience experiences responsibilities responsible professional
+    engineering engineer information technology technologies implementation administration
+    application applications communication organization international environment requirements
+    infrastructure performance architecture analysis analytics coordination customer
+    desarrollo experiencia responsabilidades profesional ingeniería ingeniero información
+    tecnología tecnologías implementación administración aplicaciones comunicación
+    organización internacional infraestructura rendimiento arquitectura análisis
+    coordinación gestión empresa universidad
+'''.split())
+
+# Rough chars-per-token ratio used for reporting
+CHARS_PER_TOKEN = 4
+
+
+def _clean_line(line: str) -> str:
+    line = DOT_LEADER.sub(' ', line.translate(LIGATURES))
+    return HORIZONTAL_SPACE.sub(' ', line).strip()
+
+
+def _repeat_key(line: str) -> str:
+    # "John Doe - Page 2" and "John Doe - Page 3" are the same footer; other
+    # digits are kept so that "2019 - 2021" and "2020 - 2022" stay distinct
+    return PAGE_REFERENCE.sub('#', line.lower())
+
+
+def _edge_indexes(lines: List[str]) -> Set[int]:
+    filled = [i for i, line in enumerate(lines) if line]
+    return set(filled[:EDGE_LINES] + filled[-EDGE_LINES:])
+
+
+def _repeated_lines(pages: List[List[str]]) -> Set[str]:
+    if len(pages) < 2:
+        return set()
+    counts: Counter = Counter()
+    for lines in pages:
+        counts.update({_repeat_key(lines[i]) for i in _edge_indexes(lines) if len(lines[i]) <= REPEAT_MAX_LENGTH})
+    threshold = max(2, int(len(pages) * REPEAT_PAGE_RATIO + 0.5))
+    return {key for key, count in counts.items() if count >= threshold}
+
+
+def normalize_pages(pages: List[Optional[str]]) -> str:
+    """
+    Compact the text of a CV before prompting: drop running headers/footers
+    (keeping their first occurrence, which usually carries the name and
+    contact details), page numbers and boilerplate, expand ligatures, re-join
+    words hyphenated across line breaks and collapse whitespace
+    """
+    cleaned = [[_clean_line(line) for line in (page or '').splitlines()] for page in pages]
+    repeated = _repeated_lines(cleaned)
+    vocabulary = {word.lower() for lines in cleaned for line in lines for word in WORD.findall(line)}
+    seen: Set[str] = set()
+
+    out: List[str] = []
+    pending_blank = False
+    for lines in cleaned:
+        edges = _edge_indexes(lines) if repeated else set()
+        for i, line in enumerate(lines):
+            if not line:
+                pending_blank = bool(out)
+                continue
+            if PAGE_NUMBER.match(line) or BOILERPLATE.match(line) or LAYOUT_NOISE.match(line):
+                continue
+            if i in edges:
+                key = _repeat_key(line)
+                if key in repeated:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+
+            # Re-join "develop-" + "ment" across a line break; keep the hyphen of
+            # compounds ("Full-" + "stack", "Jean-" + "Pierre")
+            if out and not pending_blank and HYPHENATED_END.search(out[-1]) and line[0].isalpha():
+                joined = (LAST_WORD.search(out[-1]).group(1) + WORD.match(line).group(0)).lower()
+                if line[0].islower() and (joined in vocabulary or joined in HYPHEN_LEXICON):
+                    out[-1] = out[-1][:-1] + line
+                else:
+                    out[-1] += line
+                continue
+
+            if pending_blank:
+                out.append('')
+                pending_blank = False
+            out.append(line)
+
+    return '\n'.join(out)
+
+
+def normalization_stats(raw: str, normalized: str, elapsed: float) -> Dict[str, Any]:
+    """
+    Size reduction and throughput figures for one normalization run
+    """
+    raw_tokens = len(raw) // CHARS_PER_TOKEN
+    normalized_tokens = len(normalized) // CHARS_PER_TOKEN
+    return {
+        'raw_chars': len(raw),
+        'normalized_chars': len(normalized),
+        'raw_tokens_est': raw_tokens,
+        'normalized_tokens_est': normalized_tokens,
+        'token_reduction_pct': round(100 * (1 - normalized_tokens / raw_tokens), 1) if raw_tokens else 0.0,
+        'elapsed_ms': round(elapsed * 1000, 3)
+    }
+
+
+def _report_corpus(paths: List[str]) -> None:
+    """
+    Print per-file and total reduction and throughput over a corpus of PDFs or .txt files
+    (.txt files use form feeds as page separators)
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)))
+        else:
+            files.append(path)
+
+    total_raw = total_norm = 0
+    total_elapsed = 0.0
+    for path in files:
+        if path.lower().endswith('.pdf'):
+            import pdfplumber
+            with pdfplumber.open(path) as pdf:
+                pages = [page.extract_text() for page in pdf.pages]
+        elif path.lower().endswith('.txt'):
+            with open(path, encoding='utf-8') as f:
+                pages = f.read().split('\f')
+        else:
+            continue
+
+        raw = '\n'.join(page or '' for page in pages)
+        started = time.perf_counter()
+        normalized = normalize_pages(pages)
+        elapsed = time.perf_counter() - started
+
+        stats = normalization_stats(raw, normalized, elapsed)
+        print(f"{os.path.basename(path)}: {stats}")
+        total_raw += len(raw)
+        total_norm += len(normalized)
+        total_elapsed += elapsed
+
+    if total_raw:
+        print(f"TOTAL files={len(files)} chars {total_raw} -> {total_norm} "
+              f"({100 * (1 - total_norm / total_raw):.1f}% fewer), "
+              f"throughput {total_raw / max(total_elapsed, 1e-9) / 1e6:.1f} MB/s")
+
+
+if __name__ == '__main__':
+    _report_corpus(sys.argv[1:])
@@ -0,0 +1,183 @@
+import os
+import json
+import logging
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
+
+try:
+    import tiktoken
+except ImportError:  # Fall back to a character estimate if the layer lacks tiktoken
+    tiktoken = None
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Candidate models: context window, USD per 1k tokens and rough latency per 1k prompt tokens
+MODELS: List[Dict[str, Any]] = [
+    {'name': 'gpt-3.5-turbo', 'context': 16385, 'input_cost': 0.0005, 'output_cost': 0.0015, 'ms_per_1k': 350},
+    {'name': 'gpt-4o-mini', 'context': 128000, 'input_cost': 0.00015, 'output_cost': 0.0006, 'ms_per_1k': 300},
+    {'name': 'gpt-4o', 'context': 128000, 'input_cost': 0.0025, 'output_cost': 0.01, 'ms_per_1k': 450}
+]
+
+# Routing configuration
+ROUTE_POLICY = os.environ.get('LLM_ROUTE_POLICY', 'cost')  # "cost" or "latency"
+ALLOWED_MODELS = [m for m in os.environ.get('LLM_ALLOWED_MODELS', 'gpt-3.5-turbo').split(',') if m]
+MAX_INPUT_TOKENS = int(os.environ.get('LLM_MAX_INPUT_TOKENS', '12000'))
+OVERSIZE_ACTION = os.environ.get('LLM_OVERSIZE_ACTION', 'truncate')  # "truncate" or "split"
+MAX_CHUNKS = int(os.environ.get('LLM_MAX_CHUNKS', '3'))
+OUTPUT_TOKENS = 512
+
+# Per-message formatting overhead of the chat format
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_OVERHEAD_TOKENS = 3
+
+CHARS_PER_TOKEN = 4
+
+# Encodings by model prefix, so routing counts with the tokenizer the API bills
+# with. Other models go through tiktoken's own table, then cl100k_base.
+MODEL_ENCODINGS = (('gpt-4o', 'o200k_base'), ('gpt-3.5-turbo', 'cl100k_base'), ('gpt-4', 'cl100k_base'))
+DEFAULT_ENCODING = 'cl100k_base'
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str) -> Optional[Any]:
+    """
+    Tokenizer of the model, or None to use the chars/4 estimate. The BPE files
+    ship in the layer (TIKTOKEN_CACHE_DIR); if they are missing tiktoken tries
+    to download them, and any failure there must not fail the analysis.
+    """
+    if tiktoken is None:
+        return None
+    try:
+        for prefix, name in MODEL_ENCODINGS:
+            if model.startswith(prefix):
+                return tiktoken.get_encoding(name)
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        logger.warning(f"Could not load the tokenizer for {model}, estimating tokens: {str(e)}")
+        return None
+
+
+def count_tokens(text: str, model: str = 'gpt-3.5-turbo') -> int:
+    """
+    Count tokens locally with the model's tokenizer
+    """
+    encoding = _encoding(model)
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: List[Dict[str, str]], model: str) -> int:
+    """
+    Estimate the prompt tokens the API will bill for a list of chat messages
+    """
+    return sum(count_tokens(m['content'], model) + MESSAGE_OVERHEAD_TOKENS for m in messages) + REPLY_OVERHEAD_TOKENS
+
+
+def _split_tokens(text: str, model: str, max_tokens: int) -> List[str]:
+    encoding = _encoding(model)
+    if encoding is None:
+        size = max_tokens * CHARS_PER_TOKEN
+        return [text[i:i + size] for i in range(0, len(text), size)]
+    tokens = encoding.encode(text, disallowed_special=())
+    return [encoding.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+
+
+def _estimated_cost(model: Dict[str, Any], prompt_tokens: int) -> float:
+    return (prompt_tokens * model['input_cost'] + OUTPUT_TOKENS * model['output_cost']) / 1000
+
+
+def choose_route(text: str, prefix_messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    """
+    Pick a model for the text and decide whether it is sent whole, truncated or split.
+
+    prefix_messages are the static messages sent with every chunk (with empty
+    text); their tokens count against each model's context window.
+    """
+    candidates = [m for m in MODELS if m['name'] in ALLOWED_MODELS] or MODELS[:1]
+    sort_key = 'ms_per_1k' if ROUTE_POLICY == 'latency' else 'input_cost'
+    candidates.sort(key=lambda m: m[sort_key])
+
+    for model in candidates:
+        overhead = count_message_tokens(prefix_messages, model['name'])
+        text_tokens = count_tokens(text, model['name'])
+        budget = min(MAX_INPUT_TOKENS, model['context'] - OUTPUT_TOKENS) - overhead
+        if text_tokens <= budget:
+            return {
+                'model': model['name'],
+                'action': 'single',
+                'chunks': [text],
+                'estimated_prompt_tokens': [overhead + text_tokens],
+                'estimated_cost': _estimated_cost(model, overhead + text_tokens)
+            }
+
+    # Nothing fits: use the model with the largest window and cut the text down
+    model = max(candidates, key=lambda m: m['context'])
+    overhead = count_message_tokens(prefix_messages, model['name'])
+    budget = min(MAX_INPUT_TOKENS, model['context'] - OUTPUT_TOKENS) - overhead
+    if budget <= 0:
+        raise ValueError(f"Prompt prefix alone exceeds the input budget of {model['name']}")
+
+    chunks = _split_tokens(text, model['name'], budget)
+    if OVERSIZE_ACTION == 'split':
+        chunks = chunks[:MAX_CHUNKS]
+        action = 'split'
+    else:
+        # Contact details and the most recent experience are at the top of a CV
+        chunks = chunks[:1]
+        action = 'truncate'
+
+    estimated = [overhead + count_tokens(chunk, model['name']) for chunk in chunks]
+    return {
+        'model': model['name'],
+        'action': action,
+        'chunks': chunks,
+        'estimated_prompt_tokens': estimated,
+        'estimated_cost': sum(_estimated_cost(model, tokens) for tokens in estimated)
+    }
+
+
+def merge_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine the extractions of several chunks of the same CV
+    """
+    if len(results) == 1:
+        return results[0]
+
+    merged: Dict[str, Any] = {}
+    recommendations: List[str] = []
+    for result in results:
+        for field, value in result.items():
+            if field == 'recommendations':
+                for position in value or []:
+                    if position not in recommendations:
+                        recommendations.append(position)
+            elif value and not merged.get(field):
+                merged[field] = value
+    merged['recommendations'] = recommendations[:5]
+    return merged
+
+
+def record_usage(route: Dict[str, Any], chunk_index: int, call_metrics: Dict[str, Any]) -> None:
+    """
+    Log estimated versus actual prompt tokens for one call
+    """
+    estimated = route['estimated_prompt_tokens'][chunk_index]
+    actual = call_metrics.get('prompt_tokens')
+    logger.info("LLM usage: " + json.dumps({
+        'model': route['model'],
+        'action': route['action'],
+        'chunk': chunk_index,
+        'chunks': len(route['chunks']),
+        'cache_hit': call_metrics.get('cache_hit', False),
+        'estimated_prompt_tokens': estimated,
+        'actual_prompt_tokens': actual,
+        'estimate_error': (actual - estimated) if actual else None,
+        'completion_tokens': call_metrics.get('completion_tokens'),
+        'estimated_cost': round(route['estimated_cost'], 6)
+    }))
@@ -1,9 +1,11 @@
 import json
+import hashlib
 import base64
 import boto3
 import os
 import logging
 from typing import Dict, Any
+from profiling import profiled
 
 # Configure logging
 logger = logging.getLogger()
@@ -12,6 +14,23 @@ logger.setLevel(logging.INFO)
 # Initialize S3 client
 s3_client = boto3.client('s3')
 
+def tenant_from_request(event: Dict[str, Any]) -> str:
+    """
+    Submitter of the CV, used by analyze_cv to share the OpenAI quota fairly.
+    Only values API Gateway sets are trusted: the authorizer principal when
+    the route has one, otherwise the caller's source IP (hashed, since it
+    ends up in S3 metadata). Client-supplied headers are ignored.
+    """
+    request_context = event.get('requestContext') or {}
+    principal = (request_context.get('authorizer') or {}).get('principalId')
+    if principal:
+        return f"user-{hashlib.sha256(principal.encode('utf-8')).hexdigest()[:16]}"
+    source_ip = (request_context.get('identity') or {}).get('sourceIp')
+    if source_ip:
+        return f"ip-{hashlib.sha256(source_ip.encode('utf-8')).hexdigest()[:16]}"
+    return 'default'
+
+@profiled
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Lambda function to handle file upload to S3 from API Gateway
@@ -63,12 +82,19 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
         logger.info(f"Using filename: {filename}")
 
+        # Uploads from the frontend go to the interactive scheduling lane
+        tenant = tenant_from_request(event)
+
         # Upload file to S3
         response = s3_client.put_object(
             Bucket=bucket_name,
             Key=filename,
             Body=body,
-            ContentType=headers.get('Content-Type', 'application/pdf')
+            ContentType=headers.get('Content-Type', 'application/pdf'),
+            Metadata={
+                'tenant': tenant,
+                'lane': 'interactive'
+            }
         )
 
         logger.info(f"S3 upload response: {response}")
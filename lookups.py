@@ -0,0 +1,31 @@
+import functools
+from typing import List
+import pulumi
+import pulumi_aws as aws
+
+# Configuración del stack, compartida por todos los módulos
+config = pulumi.Config()
+
+# Profiling de los handlers (lambdas/profiling.py): "off", o "always", "sample" y/o "tag"
+profile_variables = {
+    "PROFILE_MODE": config.get("profile_mode") or "off",
+    "PROFILE_SAMPLE_RATE": config.get("profile_sample_rate") or "0",
+    "PROFILE_OUTPUT": "s3://mis-postulaciones-cv/profiles"
+}
+
+
+# Cada invoke al provider es una llamada gRPC síncrona durante preview/up;
+# se resuelven una sola vez por ejecución del programa.
+@functools.lru_cache(maxsize=None)
+def region() -> str:
+    return aws.get_region().name
+
+
+@functools.lru_cache(maxsize=None)
+def availability_zones() -> List[str]:
+    return list(aws.get_availability_zones().names)
+
+
+@functools.lru_cache(maxsize=None)
+def account_id() -> str:
+    return aws.get_caller_identity().account_id
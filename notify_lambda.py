@@ -1,28 +1,18 @@
 import pulumi
 import pulumi_aws as aws
 import json
-from utils import tags
-from dynamo import dynamo_table
+from factories import lambda_role, lambda_function
+from lookups import config, profile_variables
+from dynamo import dynamo_table, cache_generations_table
 
 # Create IAM role for the Lambda
-notify_lambda_role = aws.iam.Role("notify-lambda-role",
-    assume_role_policy=json.dumps({
-        "Version": "2012-10-17",
-        "Statement": [{
-            "Action": "sts:AssumeRole",
-            "Principal": {
-                "Service": "lambda.amazonaws.com"
-            },
-            "Effect": "Allow"
-        }]
-    }),
-    tags=tags
-)
+notify_lambda_role = lambda_role("notify-lambda-role")
 
 # Add necessary policies to the role
 notify_lambda_policy = aws.iam.RolePolicy("notify-lambda-policy",
     role=notify_lambda_role.id,
-    policy=pulumi.Output.all(stream_arn=dynamo_table.stream_arn).apply(
+    policy=pulumi.Output.all(stream_arn=dynamo_table.stream_arn,
+                             generations_arn=cache_generations_table.arn).apply(
         lambda values: json.dumps({
             "Version": "2012-10-17",
             "Statement": [
@@ -46,6 +36,20 @@ notify_lambda_policy = aws.iam.RolePolicy("notify-lambda-policy",
                         values['stream_arn']
                     ]
                 },
+                {
+                    "Effect": "Allow",
+                    "Action": [
+                        "dynamodb:UpdateItem"
+                    ],
+                    "Resource": values['generations_arn']
+                },
+                {
+                    "Effect": "Allow",
+                    "Action": [
+                        "s3:PutObject"
+                    ],
+                    "Resource": "arn:aws:s3:::mis-postulaciones-cv/profiles/*"
+                },
                 {
                     "Effect": "Allow",
                     "Action": [
@@ -61,22 +65,15 @@ notify_lambda_policy = aws.iam.RolePolicy("notify-lambda-policy",
 )
 
 # Create the Lambda function
-notify_lambda = aws.lambda_.Function("notify-lambda",
-    runtime="python3.9",
-    handler="notify.lambda_handler",
-    role=notify_lambda_role.arn,
-    code=pulumi.AssetArchive({
-        ".": pulumi.FileArchive("./lambdas")
-    }),
+notify_lambda = lambda_function("notify-lambda", "notify.lambda_handler", notify_lambda_role,
     timeout=30,
     memory_size=128,
-    environment={
-        "variables": {
-            "SENDER_EMAIL": pulumi.Config().require("sender_email"),
-            "RECIPIENT_EMAIL": pulumi.Config().require("recipient_email")
-        }
-    },
-    tags=tags
+    variables={
+        "SENDER_EMAIL": config.require("sender_email"),
+        "RECIPIENT_EMAIL": config.require("recipient_email"),
+        "CACHE_GENERATIONS_TABLE": cache_generations_table.name,
+        **profile_variables
+    }
 )
 
 # Add DynamoDB Stream trigger to Lambda
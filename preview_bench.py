@@ -0,0 +1,101 @@
+"""
+Runs the Pulumi program against mocked providers and reports how many
+provider invokes it makes and how long it takes, with the memoized lookups
+and with every call site hitting the provider (the previous behaviour).
+
+Usage: python preview_bench.py [invoke_latency_ms]
+"""
+import os
+import sys
+import json
+import time
+import runpy
+import subprocess
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+# Each invoke is a round trip to the provider plugin; 150 ms is a typical
+# value for the AWS provider with credentials already resolved
+DEFAULT_INVOKE_LATENCY_MS = 150
+
+MOCK_RESULTS = {
+    "aws:index/getRegion:getRegion": {"name": "us-east-1", "id": "us-east-1"},
+    "aws:index/getAvailabilityZones:getAvailabilityZones": {
+        "names": ["us-east-1a", "us-east-1b", "us-east-1c"],
+        "zoneIds": ["use1-az1", "use1-az2", "use1-az4"],
+        "id": "us-east-1"
+    },
+    "aws:index/getCallerIdentity:getCallerIdentity": {
+        "accountId": "123456789012", "arn": "arn:aws:iam::123456789012:user/bench",
+        "userId": "bench", "id": "123456789012"
+    }
+}
+
+MOCK_CONFIG = {
+    "sillarcv:openai_api_key": "sk-bench",
+    "sillarcv:sender_email": "bench@example.com",
+    "sillarcv:recipient_email": "bench@example.com"
+}
+
+
+def _run_program(memoized: bool, latency: float) -> Dict[str, Any]:
+    os.environ["PULUMI_CONFIG"] = json.dumps(MOCK_CONFIG)
+    import pulumi
+    from pulumi.runtime.stack import wait_for_rpcs
+    from pulumi.runtime.sync_await import _sync_await
+
+    class CountingMocks(pulumi.runtime.Mocks):
+        def __init__(self) -> None:
+            self.invokes: Counter = Counter()
+            self.resources = 0
+
+        def new_resource(self, args: pulumi.runtime.MockResourceArgs) -> Tuple[str, Dict[str, Any]]:
+            self.resources += 1
+            return f"{args.name}-id", dict(args.inputs, arn=f"arn:aws:mock:::{args.name}")
+
+        def call(self, args: pulumi.runtime.MockCallArgs) -> Dict[str, Any]:
+            self.invokes[args.token] += 1
+            time.sleep(latency)
+            return MOCK_RESULTS.get(args.token, {})
+
+    mocks = CountingMocks()
+    pulumi.runtime.set_mocks(mocks, project="sillarcv", stack="bench", preview=True)
+
+    import lookups
+    if not memoized:
+        for name in ("region", "availability_zones", "account_id"):
+            setattr(lookups, name, getattr(lookups, name).__wrapped__)
+
+    started = time.perf_counter()
+    runpy.run_path("__main__.py", run_name="__pulumi_program__")
+    _sync_await(wait_for_rpcs())
+    elapsed = time.perf_counter() - started
+
+    return {
+        "mode": "memoized" if memoized else "direct",
+        "invokes": sum(mocks.invokes.values()),
+        "by_token": {token.split(":")[-1]: count for token, count in sorted(mocks.invokes.items())},
+        "resources": mocks.resources,
+        "wall_seconds": round(elapsed, 3)
+    }
+
+
+def _benchmark(latency_ms: float) -> None:
+    # One subprocess per mode so module state and mocks start clean
+    results: List[Dict[str, Any]] = []
+    for mode in ("direct", "memoized"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, str(latency_ms)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    for result in results:
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--mode":
+        latency_ms = float(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_INVOKE_LATENCY_MS
+        print(json.dumps(_run_program(sys.argv[2] == "memoized", latency_ms / 1000)))
+    else:
+        _benchmark(float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_INVOKE_LATENCY_MS)
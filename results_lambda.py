@@ -0,0 +1,82 @@
+import pulumi
+import pulumi_aws as aws
+import json
+from factories import lambda_role, lambda_function
+from dynamo import dynamo_table, cache_generations_table
+from export_lambda import analytics_bucket, pyarrow_layer_arn
+
+# Create IAM role for the Lambda
+results_lambda_role = lambda_role("results-lambda-role")
+
+# Solo lectura sobre applications y sus índices
+results_lambda_policy = aws.iam.RolePolicy("results-lambda-policy",
+    role=results_lambda_role.id,
+    policy=pulumi.Output.all(table_arn=dynamo_table.arn, generations_arn=cache_generations_table.arn,
+                             bucket_arn=analytics_bucket.arn).apply(
+        lambda values: json.dumps({
+            "Version": "2012-10-17",
+            "Statement": [
+                {
+                    "Effect": "Allow",
+                    "Action": [
+                        "dynamodb:Query"
+                    ],
+                    "Resource": [
+                        values['table_arn'],
+                        f"{values['table_arn']}/index/EmailIndex",
+                        f"{values['table_arn']}/index/RecentIndex"
+                    ]
+                },
+                {
+                    "Effect": "Allow",
+                    "Action": [
+                        "dynamodb:BatchGetItem"
+                    ],
+                    "Resource": values['generations_arn']
+                },
+                {
+                    "Effect": "Allow",
+                    "Action": [
+                        "s3:GetObject"
+                    ],
+                    "Resource": f"{values['bucket_arn']}/matching/*"
+                },
+                {
+                    "Effect": "Allow",
+                    "Action": [
+                        "s3:ListBucket"  # 404 en vez de 403 mientras la matriz no existe
+                    ],
+                    "Resource": values['bucket_arn']
+                },
+                {
+                    "Effect": "Allow",
+                    "Action": [
+                        "logs:CreateLogGroup",
+                        "logs:CreateLogStream",
+                        "logs:PutLogEvents"
+                    ],
+                    "Resource": "arn:aws:logs:*:*:*"
+                }
+            ]
+        })
+    )
+)
+
+# Create the Lambda function
+results_lambda = lambda_function("results-lambda", "results_api.lambda_handler", results_lambda_role,
+    layers=[pyarrow_layer_arn],  # numpy para /matches
+    # /matches carga la matriz de candidatos: con 100k candidatos (~113 MB en S3) el pico medido
+    # es ~165 MB más el runtime; 512 MB deja margen para duplicar candidatos y más CPU para cargarla
+    timeout=30,
+    memory_size=512,
+    variables={
+        "DYNAMODB_TABLE": dynamo_table.name,
+        "CACHE_GENERATIONS_TABLE": cache_generations_table.name,
+        "RESULTS_CACHE_CHECK_SECONDS": "5",
+        "MATCH_BUCKET": analytics_bucket.bucket,
+        "MATCH_MATRIX_KEY": "matching/candidates.npz"
+    }
+)
+
+# Export the Lambda ARN
+pulumi.export("results_lambda_arn", results_lambda.arn)
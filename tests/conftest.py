@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Lambda code is deployed as a flat directory and imports its modules by name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lambdas'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
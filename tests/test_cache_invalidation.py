@@ -0,0 +1,11 @@
+from cache_invalidation import invalidation_keys
+
+
+def test_invalidation_keys_cover_old_and_new_email():
+    old = {'cv_file': {'S': 'acme/cv.pdf'}, 'email': {'S': 'old@mail.com'}}
+    new = {'cv_file': {'S': 'acme/cv.pdf'}, 'email': {'S': 'new@mail.com'}}
+    assert invalidation_keys(old, new) == ['recent', 'file#acme/cv.pdf', 'email#old@mail.com', 'email#new@mail.com']
+
+
+def test_invalidation_keys_from_keys_only():
+    assert invalidation_keys({'cv_file': {'S': 'cv.pdf'}, 'analyzed_at': {'S': 'arn'}}) == ['recent', 'file#cv.pdf']
@@ -0,0 +1,62 @@
+import json
+
+from cv_schema import contact_fields, validate_cv_info, cacheable_output, parse_model_json, _close_truncated, local_repairs, metrics
+
+
+def test_contact_fields_reads_email_and_phone():
+    text = "Juan Perez\nJuan.P@Mail.com | +54 9 11 5555-1234\nAcme 2019 - 2021"
+    assert contact_fields(text) == {'email': 'juan.p@mail.com', 'phone': '+54 9 11 5555-1234'}
+
+
+def test_contact_fields_ignores_date_ranges():
+    text = "Acme 2019 - 2021\nBeta 2020-2022\nTel (011) 4321-9876"
+    assert contact_fields(text)['phone'] == '(011) 4321-9876'
+    assert contact_fields("Acme 2019 - 2021") == {'email': '', 'phone': ''}
+
+
+def test_truncation_keeps_complete_elements_and_drops_the_cut_member():
+    assert json.loads(_close_truncated('{"recommendations": ["x", "y"')) == {'recommendations': ['x', 'y']}
+    assert json.loads(_close_truncated('{"recommendations": ["x", "y", "Data Eng')) == {'recommendations': ['x', 'y']}
+    assert json.loads(_close_truncated('{"name": "Ana", "email": "ana@mail.c')) == {'name': 'Ana'}
+    assert json.loads(_close_truncated('{"name": "Ana", "email":')) == {'name': 'Ana'}
+    assert json.loads(_close_truncated('{"name": "Ana", "ema')) == {'name': 'Ana'}
+    assert json.loads(_close_truncated('{"name": "Ana",')) == {'name': 'Ana'}
+    assert json.loads(_close_truncated('{"name": "Ana \\"A')) == {}
+
+
+def test_truncation_drops_partial_scalars():
+    assert json.loads(_close_truncated('{"name": "Ana", "open": tru')) == {'name': 'Ana'}
+    assert json.loads(_close_truncated('{"name": "Ana", "phone": nul')) == {'name': 'Ana'}
+    assert json.loads(_close_truncated('{"name": "Ana", "years": 12.')) == {'name': 'Ana'}
+    assert json.loads(_close_truncated('{"name": "Ana", "scores": [1, 2')) == {'name': 'Ana', 'scores': [1]}
+    assert json.loads(_close_truncated('{"name": "Ana", "open": true')) == {'name': 'Ana', 'open': True}
+    assert json.loads(_close_truncated('{"name": "Ana", "years": 12 ')) == {'name': 'Ana', 'years': 12}
+
+
+def test_repairs_do_not_count_avoided_recalls_themselves():
+    before = dict(metrics)
+    repairs = local_repairs()
+    result, missing = validate_cv_info(parse_model_json('{"name": "Ana", "email": ["ana@mail.com"], "phone": "'))
+    assert not missing
+    assert local_repairs() > repairs
+    assert metrics['avoided_recalls'] == before['avoided_recalls']
+
+
+def test_explicit_empty_values_are_not_defaulted():
+    before = dict(metrics)
+    validate_cv_info({'name': 'Ana', 'email': 'ana@mail.com', 'phone': '', 'country': '', 'recommendations': []})
+    assert metrics['fields_defaulted'] == before['fields_defaulted']
+    assert metrics['avoided_recalls'] == before['avoided_recalls']
+    assert metrics['valid'] == before['valid'] + 1
+
+
+def test_only_clean_complete_outputs_are_cacheable():
+    complete = {'name': 'Ana', 'email': 'ana@mail.com', 'phone': '', 'country': '', 'recommendations': []}
+    raw = json.dumps(complete)
+    assert cacheable_output(raw, parse_model_json(raw))
+
+    truncated = raw[:-10]
+    assert not cacheable_output(truncated, parse_model_json(truncated))
+    partial = json.dumps({'name': 'Ana', 'email': 'ana@mail.com'})
+    assert not cacheable_output(partial, parse_model_json(partial))
+    assert not cacheable_output('{"email": ""}', {'email': ''}, fields=('email',), required=('email',))
@@ -0,0 +1,44 @@
+import threading
+import time
+
+import pytest
+
+from deadline import HedgedCaller
+
+
+def test_errors_are_raised_without_hedging():
+    calls = []
+
+    def failing(**kwargs):
+        calls.append(kwargs)
+        raise RuntimeError("429 Too Many Requests")
+
+    caller = HedgedCaller(failing, max_attempts=2)
+    with pytest.raises(RuntimeError):
+        caller()
+    assert len(calls) == 1
+    assert caller.metrics['hedged'] == 0
+
+
+def test_slow_attempt_is_hedged_and_losers_do_not_starve_later_calls():
+    release = threading.Event()
+    attempts = []
+
+    def endpoint(**kwargs):
+        attempts.append(kwargs)
+        # The first attempt of every call hangs until the end of the test
+        if len(attempts) % 2 == 1:
+            release.wait(5)
+            return None
+        return {'ok': True}
+
+    caller = HedgedCaller(endpoint, is_valid=lambda response: response is not None, max_attempts=2)
+    caller.hedge_after = lambda: 0.01
+    try:
+        started = time.monotonic()
+        for _ in range(5):
+            assert caller() == {'ok': True}
+        assert time.monotonic() - started < 2
+        assert caller.metrics['hedged'] == caller.metrics['hedge_wins'] == 5
+    finally:
+        release.set()
@@ -0,0 +1,55 @@
+import pytest
+from botocore.exceptions import ClientError
+
+from deferred import PendingQueue, PENDING_PREFIX
+
+
+class FakeTable:
+    """
+    In-memory stand-in for the deferred table, only for the updates claim/release/fail make
+    """
+
+    def __init__(self):
+        self.items = {}
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues=None, ConditionExpression=None,
+                    ReturnValues=None):
+        item = self.items.get(Key['pk'])
+        values = ExpressionAttributeValues or {}
+        if ConditionExpression:
+            if item is None or item.get('claimed_until', 0) >= values[':now']:
+                raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException'}}, 'UpdateItem')
+        if 'SET claimed_until' in UpdateExpression:
+            item['claimed_until'] = values[':until']
+        if 'REMOVE claimed_until' in UpdateExpression:
+            item.pop('claimed_until', None)
+        if 'ADD attempts' in UpdateExpression:
+            item['attempts'] = item.get('attempts', 0) + values[':one']
+        if ReturnValues == 'ALL_NEW':
+            return {'Attributes': dict(item)}
+        if ReturnValues == 'UPDATED_NEW':
+            return {'Attributes': {'attempts': item['attempts']}}
+        return {}
+
+
+@pytest.fixture
+def queue():
+    table = FakeTable()
+    table.items[f"{PENDING_PREFIX}cv.pdf"] = {'pk': f"{PENDING_PREFIX}cv.pdf", 'cv_file': 'cv.pdf'}
+    return PendingQueue(table)
+
+
+def test_claims_put_back_unattempted_do_not_count(queue):
+    for _ in range(10):
+        item = queue.claim('cv.pdf')
+        assert item is not None and 'attempts' not in item
+        # The LLM stage is still down: released untried
+        queue.release('cv.pdf')
+
+
+def test_failures_count_attempts_and_release_the_claim(queue):
+    queue.claim('cv.pdf')
+    assert queue.claim('cv.pdf') is None
+    assert queue.fail('cv.pdf') == 1
+    queue.claim('cv.pdf')
+    assert queue.fail('cv.pdf') == 2
@@ -0,0 +1,26 @@
+import pyarrow as pa
+
+import export_columnar
+from export_columnar import concat_promoting
+
+
+def test_concat_fills_columns_missing_from_older_files():
+    old = pa.table({'cv_file': ['a.pdf']})
+    new = pa.table({'cv_file': ['b.pdf'], 'position_ids': [['data-engineer']]})
+    merged = concat_promoting([old, new])
+    assert merged.column('position_ids').to_pylist() == [None, ['data-engineer']]
+
+
+def test_concat_falls_back_to_promote_on_older_pyarrow(monkeypatch):
+    calls = []
+
+    def concat_tables(tables, promote=False, **kwargs):
+        # pyarrow < 14 has no promote_options keyword
+        if kwargs:
+            raise TypeError("concat_tables() got an unexpected keyword argument 'promote_options'")
+        calls.append(promote)
+        return tables[0]
+
+    monkeypatch.setattr(export_columnar.pa, 'concat_tables', concat_tables)
+    concat_promoting([pa.table({'cv_file': ['a.pdf']})])
+    assert calls == [True]
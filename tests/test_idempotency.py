@@ -0,0 +1,45 @@
+from botocore.exceptions import ClientError
+
+from idempotency import filter_processed, source_version
+
+
+class FakeDynamoDB:
+    """
+    BatchGetItem over an in-memory table; rejects duplicate keys like DynamoDB does
+    """
+
+    def __init__(self, stored):
+        self.stored = stored
+
+    def batch_get_item(self, RequestItems):
+        (table_name, request), = RequestItems.items()
+        identities = [(key['cv_file'], key['analyzed_at']) for key in request['Keys']]
+        if len(set(identities)) != len(identities):
+            raise ClientError({'Error': {'Code': 'ValidationException',
+                                         'Message': 'Provided list of item keys contains duplicates'}}, 'BatchGetItem')
+        found = [
+            {'cv_file': cv_file, 'analyzed_at': analyzed_at, 'source_version': self.stored[(cv_file, analyzed_at)]}
+            for cv_file, analyzed_at in identities if (cv_file, analyzed_at) in self.stored
+        ]
+        return {'Responses': {table_name: found}}
+
+
+def key(cv_file):
+    return {'cv_file': cv_file, 'analyzed_at': 'arn'}
+
+
+def test_source_version_prefers_version_id():
+    assert source_version({'versionId': 'v2', 'eTag': '"abc"'}) == 'v2'
+    assert source_version({'ETag': '"abc"'}) == 'abc'
+
+
+def test_filter_processed_skips_stored_versions():
+    dynamodb = FakeDynamoDB({('a.pdf', 'arn'): 'v1', ('b.pdf', 'arn'): 'v1'})
+    pending = filter_processed(dynamodb, 'table', [(key('a.pdf'), 'v1'), (key('b.pdf'), 'v2'), (key('c.pdf'), 'v1')])
+    assert pending == [(key('b.pdf'), 'v2'), (key('c.pdf'), 'v1')]
+
+
+def test_filter_processed_keeps_only_the_latest_version_of_a_key():
+    dynamodb = FakeDynamoDB({})
+    pending = filter_processed(dynamodb, 'table', [(key('a.pdf'), 'v1'), (key('b.pdf'), 'v1'), (key('a.pdf'), 'v2')])
+    assert pending == [(key('b.pdf'), 'v1'), (key('a.pdf'), 'v2')]
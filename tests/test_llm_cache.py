@@ -0,0 +1,56 @@
+import time
+
+from llm_cache import CachingLLMClient, DynamoCache, LRUCache, cache_key
+
+
+class FakeTable:
+    """
+    In-memory stand-in for the LLM cache table: GetItem / PutItem only
+    """
+
+    def __init__(self):
+        self.items = {}
+
+    def get_item(self, Key):
+        item = self.items.get(Key['cache_key'])
+        return {'Item': item} if item else {}
+
+    def put_item(self, Item):
+        self.items[Item['cache_key']] = Item
+
+
+class FakeResponse(dict):
+    def __init__(self, content):
+        super().__init__(usage={'prompt_tokens': 10, 'completion_tokens': 5})
+        self.choices = [type('Choice', (), {'message': {'content': content}})()]
+
+
+def test_cache_key_covers_call_parameters_and_case():
+    base = cache_key('gpt-4o', 'prompt', 'Ana Perez  ana@mail.com', {'max_tokens': 500})
+    assert base == cache_key('gpt-4o', 'prompt', 'Ana Perez\nana@mail.com', {'max_tokens': 500, 'request_timeout': 3})
+    assert base != cache_key('gpt-4o', 'prompt', 'Ana Perez ana@mail.com', {'max_tokens': 100})
+    assert base != cache_key('gpt-4o', 'prompt', 'Ana Perez ana@mail.com', {'max_tokens': 500, 'temperature': 0.5})
+    assert base != cache_key('gpt-4o', 'prompt', 'ANA PEREZ ana@mail.com', {'max_tokens': 500})
+
+
+def test_shared_cache_serves_other_containers_until_it_expires():
+    table = FakeTable()
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        return FakeResponse('{"name": "Ana"}')
+
+    def container():
+        # Fresh memory tier, as in a new Lambda container
+        return CachingLLMClient(create, 'system', 'instructions', memory_cache=LRUCache(),
+                                shared_cache=DynamoCache(table))
+
+    assert container().complete_json('cv text', model='gpt-4o', max_tokens=500) == {'name': 'Ana'}
+    assert container().complete_json('cv text', model='gpt-4o', max_tokens=500) == {'name': 'Ana'}
+    assert len(calls) == 1
+
+    for item in table.items.values():
+        item['expires_at'] = int(time.time()) - 1
+    container().complete_json('cv text', model='gpt-4o', max_tokens=500)
+    assert len(calls) == 2
@@ -0,0 +1,44 @@
+import io
+import json
+
+from matching import CandidateMatrix
+
+
+def _record(event_name, cv_file, info=None, **extra):
+    record = {'eventName': event_name, 'dynamodb': {'Keys': {'cv_file': {'S': cv_file}}}}
+    if info is not None:
+        image = {'cv_file': {'S': cv_file}, 'additional_info': {'S': json.dumps(info)}}
+        image.update({name: {'S': value} for name, value in extra.items()})
+        record['dynamodb']['NewImage'] = image
+    return record
+
+
+def test_stream_records_upsert_and_remove_candidates():
+    matrix = CandidateMatrix(dimensions=64, capacity=1)
+    matrix.apply_stream_records([
+        _record('INSERT', 'a.pdf', {'recommendations': ['Data Engineer'], 'country': 'Peru'}),
+        _record('INSERT', 'b.pdf', {'recommendations': ['Frontend Developer'], 'country': 'Chile'}),
+        _record('INSERT', 'c.pdf', {'recommendations': ['Data Engineer']}, duplicate_of='a.pdf'),
+    ])
+    assert sorted(matrix.ids) == ['a.pdf', 'b.pdf']
+    assert matrix.top_k({'positions': ['Data Engineer'], 'country': 'Peru'}, k=1)[0][0] == 'a.pdf'
+
+    matrix.apply_stream_records([_record('REMOVE', 'a.pdf')])
+    assert matrix.ids == ['b.pdf']
+    assert matrix.rows == {'b.pdf': 0}
+
+
+def test_save_and_load_roundtrip():
+    matrix = CandidateMatrix(dimensions=64)
+    matrix.upsert('a.pdf', {'position_ids': ['data-engineer'], 'country': 'Peru'})
+    buffer = io.BytesIO()
+    matrix.save(buffer)
+    buffer.seek(0)
+
+    loaded = CandidateMatrix.load(buffer)
+    assert loaded.ids == ['a.pdf']
+    assert loaded.top_k({'position_ids': ['data-engineer']}) == matrix.top_k({'position_ids': ['data-engineer']})
+    # Loaded in place, no spare capacity until the next append
+    assert loaded.matrix.shape == (1, 64)
+    loaded.upsert('b.pdf', {'position_ids': ['qa-analyst']})
+    assert loaded.size == 2 and loaded.rows == {'a.pdf': 0, 'b.pdf': 1}
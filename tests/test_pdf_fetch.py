@@ -0,0 +1,39 @@
+import io
+
+import pdf_fetch
+from pdf_fetch import open_s3_pdf
+
+
+class FakeS3:
+    def __init__(self, data):
+        self.data = data
+        self.calls = []
+
+    def head_object(self, Bucket, Key):
+        self.calls.append(('head', None))
+        return {'ContentLength': len(self.data), 'VersionId': 'v1'}
+
+    def get_object(self, Bucket, Key, VersionId=None, Range=None):
+        self.calls.append(('get', Range))
+        data = self.data
+        if Range:
+            start = max(0, len(data) - int(Range.split('-')[-1]))
+            data = data[start:]
+            return {'Body': io.BytesIO(data), 'ContentRange': f"bytes {start}-{len(self.data) - 1}/{len(self.data)}"}
+        return {'Body': io.BytesIO(data), 'ContentLength': len(data)}
+
+
+def test_small_objects_are_downloaded_once():
+    s3 = FakeS3(b'%PDF-1.4 small')
+    with open_s3_pdf(s3, 'bucket', 'cv.pdf') as pdf_file:
+        assert pdf_file.read() == b'%PDF-1.4 small'
+    assert s3.calls == [('head', None), ('get', None)]
+
+
+def test_large_objects_never_start_a_full_download(monkeypatch):
+    monkeypatch.setattr(pdf_fetch, 'RANGE_THRESHOLD_BYTES', 10)
+    s3 = FakeS3(b'%PDF-1.4 ' + b'x' * 100)
+    with open_s3_pdf(s3, 'bucket', 'cv.pdf'):
+        pass
+    assert s3.calls[0] == ('head', None)
+    assert all(byte_range for kind, byte_range in s3.calls[1:])
@@ -0,0 +1,107 @@
+import pytest
+from botocore.exceptions import ClientError
+
+import scheduler
+from deadline import DeadlineExceeded
+from scheduler import FairQueue, LaneSlots, classify
+
+
+class FakeSlotsClient:
+    """
+    In-memory stand-in for the lane-slots table: conditional PutItem / DeleteItem only
+    """
+
+    def __init__(self):
+        self.items = {}
+        self.puts = 0
+
+    def put_item(self, TableName, Item, ConditionExpression, ExpressionAttributeValues):
+        self.puts += 1
+        current = self.items.get(Item['slot']['S'])
+        if current and int(current['expires_at']['N']) >= int(ExpressionAttributeValues[':now']['N']):
+            raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException'}}, 'PutItem')
+        self.items[Item['slot']['S']] = Item
+
+    def delete_item(self, TableName, Key, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues):
+        current = self.items.get(Key['slot']['S'])
+        if not current or current['owner'] != ExpressionAttributeValues[':owner']:
+            raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException'}}, 'DeleteItem')
+        del self.items[Key['slot']['S']]
+
+
+def drain(queue):
+    served = []
+    while True:
+        entry = queue.pop()
+        if entry is None:
+            return served
+        served.append(entry)
+        queue.done(entry[0])
+
+
+def test_classify_reads_metadata_then_defaults():
+    assert classify({'lane': 'interactive', 'tenant': 'ip-0123456789abcdef'}) == ('interactive', 'ip-0123456789abcdef')
+    assert classify() == ('bulk', 'default')
+    assert classify({'lane': 'unknown'}, default_lane='reprocess', default_tenant='acme') == ('reprocess', 'acme')
+
+
+def test_fair_queue_serves_lanes_by_priority():
+    queue = FairQueue(limits={'interactive': 10, 'bulk': 10, 'reprocess': 10}, weights={})
+    queue.submit('r', 'reprocess')
+    queue.submit('b', 'bulk')
+    queue.submit('i', 'interactive')
+    assert [item for _, _, item in drain(queue)] == ['i', 'b', 'r']
+
+
+def test_fair_queue_interleaves_tenants_within_a_lane():
+    queue = FairQueue(limits={'interactive': 1, 'bulk': 1, 'reprocess': 1}, weights={})
+    for n in range(100):
+        queue.submit(f"acme-{n}", 'bulk', 'acme')
+    queue.submit('globex-0', 'bulk', 'globex')
+    served = [item for _, _, item in drain(queue)]
+    assert served.index('globex-0') <= 1
+
+
+def test_fair_queue_respects_lane_limits():
+    queue = FairQueue(limits={'interactive': 1, 'bulk': 2, 'reprocess': 1}, weights={})
+    for n in range(3):
+        queue.submit(n, 'bulk')
+    assert queue.pop() is not None
+    assert queue.pop() is not None
+    assert queue.pop() is None
+    queue.done('bulk')
+    assert queue.pop() is not None
+
+
+def test_lane_slots_limit_and_release():
+    client = FakeSlotsClient()
+    slots = LaneSlots(client, 'slots', limits={'interactive': 1})
+    with slots.slot('interactive', lambda: 60) as slot:
+        assert slot == 'interactive#0'
+        assert slots._try_acquire('interactive') is None
+    assert client.items == {}
+
+
+def test_lane_slots_wait_backs_off_and_times_out():
+    client = FakeSlotsClient()
+    holder = LaneSlots(client, 'slots', limits={'bulk': 1})
+    holder._try_acquire('bulk')
+
+    scheduler.random.seed(1)
+    budget = [30.0]
+    delays = []
+
+    def sleep(seconds):
+        delays.append(seconds)
+        budget[0] -= seconds
+
+    waiter = LaneSlots(client, 'slots', limits={'bulk': 1}, poll_seconds=0.5, max_poll_seconds=4, sleep=sleep)
+    timeouts = scheduler.metrics['timeouts']
+    with pytest.raises(DeadlineExceeded):
+        with waiter.slot('bulk', lambda: budget[0]):
+            pass
+
+    assert scheduler.metrics['timeouts'] == timeouts + 1
+    assert all(delay <= 4 for delay in delays)
+    # Backoff keeps the number of conditional writes well below fixed 0.5 s polling
+    assert client.puts - 1 < 30 / 0.5 / 2
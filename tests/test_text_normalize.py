@@ -0,0 +1,31 @@
+from text_normalize import normalize_pages
+
+
+def test_hyphenated_words_are_rejoined_across_line_breaks():
+    assert normalize_pages(["Software develop-\nment at Acme"]) == "Software development at Acme"
+    # Known from elsewhere in the CV
+    assert normalize_pages(["Kubernetes deploy-\nments\nMore deployments"]) == \
+        "Kubernetes deployments\nMore deployments"
+
+
+def test_compound_hyphens_are_kept():
+    assert normalize_pages(["Senior Full-\nstack developer"]) == "Senior Full-stack developer"
+    assert normalize_pages(["Reference: Jean-\nPierre Dupont"]) == "Reference: Jean-Pierre Dupont"
+    assert normalize_pages(["Projects 2019-\n2021"]) == "Projects 2019-\n2021"
+    # A blank line in between is a paragraph break, not a wrap
+    assert normalize_pages(["Back-\n\nend"]) == "Back-\n\nend"
+
+
+def test_whitespace_is_collapsed():
+    text = "Ana \t Perez  Lopez\n\n\n\nData   Engineer ........ 2020\n   \n"
+    assert normalize_pages([text]) == "Ana Perez Lopez\n\nData Engineer 2020"
+
+
+def test_ligatures_are_expanded():
+    assert normalize_pages(["ﬁnance and ofﬁce workﬂow, eﬀort"]) == \
+        "finance and office workflow, effort"
+
+
+def test_running_headers_keep_first_occurrence_and_drop_page_numbers():
+    pages = ["Ana Perez - ana@mail.com\nExperience\nPage 1 of 2", "Ana Perez - ana@mail.com\nEducation\nPage 2 of 2"]
+    assert normalize_pages(pages) == "Ana Perez - ana@mail.com\nExperience\nEducation"
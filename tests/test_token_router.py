@@ -0,0 +1,19 @@
+import types
+
+import token_router
+
+
+def test_models_use_the_encoding_the_api_bills_with(monkeypatch):
+    def encoding_for_model(model):
+        raise KeyError(model)
+
+    fake = types.SimpleNamespace(get_encoding=lambda name: name, encoding_for_model=encoding_for_model)
+    monkeypatch.setattr(token_router, 'tiktoken', fake)
+    token_router._encoding.cache_clear()
+    try:
+        assert token_router._encoding('gpt-4o') == 'o200k_base'
+        assert token_router._encoding('gpt-4o-mini') == 'o200k_base'
+        assert token_router._encoding('gpt-3.5-turbo') == 'cl100k_base'
+        assert token_router._encoding('some-new-model') == 'cl100k_base'
+    finally:
+        token_router._encoding.cache_clear()
@@ -0,0 +1,163 @@
+"""
+Unit tests of the VPC program (gateway endpoints, their policies and the
+per-AZ NAT routing) against mocked Pulumi providers, the same way
+preview_bench.py runs the whole program.
+"""
+import os
+import sys
+import json
+import importlib
+from types import SimpleNamespace
+
+import pytest
+
+pulumi = pytest.importorskip("pulumi")
+pytest.importorskip("pulumi_aws")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CV_BUCKET_ARN = "arn:aws:s3:::mis-postulaciones-cv"
+
+
+class Mocks(pulumi.runtime.Mocks):
+    def __init__(self, call_results):
+        super().__init__()
+        self.call_results = call_results
+
+    def new_resource(self, args: pulumi.runtime.MockResourceArgs):
+        outputs = dict(args.inputs)
+        if args.typ == "aws:s3/bucket:Bucket":
+            outputs["arn"] = f"arn:aws:s3:::{args.inputs.get('bucket', args.name)}"
+        elif args.typ == "aws:dynamodb/table:Table":
+            outputs["arn"] = f"arn:aws:dynamodb:us-east-1:123456789012:table/{args.name}"
+        else:
+            outputs.setdefault("arn", f"arn:aws:mock:::{args.name}")
+        return f"{args.name}-id", outputs
+
+    def call(self, args: pulumi.runtime.MockCallArgs):
+        return self.call_results.get(args.token, {})
+
+
+@pytest.fixture(scope="module")
+def infra():
+    """
+    The VPC program under mocks, with per-AZ NAT gateways. The config
+    variable, the Pulumi runtime settings, sys.path and the infra modules
+    (which read config at import) are restored afterwards, so no mock state
+    leaks into other test modules.
+    """
+    saved_config = os.environ.get("PULUMI_CONFIG")
+    preloaded = set(sys.modules)
+    sys.path.insert(0, ROOT)
+    os.environ["PULUMI_CONFIG"] = json.dumps({"sillarcv:nat_gateway_per_az": "true"})
+    try:
+        from preview_bench import MOCK_RESULTS
+        pulumi.runtime.set_mocks(Mocks(MOCK_RESULTS), project="sillarcv", stack="test", preview=False)
+        yield SimpleNamespace(vpc=importlib.import_module("vpc"), dynamo=importlib.import_module("dynamo"))
+    finally:
+        for name in set(sys.modules) - preloaded:
+            path = getattr(sys.modules[name], "__file__", None) or ""
+            if os.path.dirname(os.path.abspath(path)) == ROOT:
+                del sys.modules[name]
+        sys.path.remove(ROOT)
+        if saved_config is None:
+            os.environ.pop("PULUMI_CONFIG", None)
+        else:
+            os.environ["PULUMI_CONFIG"] = saved_config
+        pulumi.runtime.settings.reset_options()
+
+
+def _field(value, name):
+    # Nested outputs come back as typed objects or plain dicts depending on the SDK version
+    if isinstance(value, dict):
+        camel = name.split("_")[0] + "".join(part.title() for part in name.split("_")[1:])
+        return value.get(name, value.get(camel))
+    return getattr(value, name, None)
+
+
+def _statements(policy):
+    return json.loads(policy)["Statement"]
+
+
+@pulumi.runtime.test
+def test_gateway_endpoints_cover_every_private_route_table(infra):
+    vpc = infra.vpc
+
+    def check(args):
+        s3_type, s3_service, s3_tables, dynamodb_type, dynamodb_service, dynamodb_tables, *private = args
+        assert s3_type == dynamodb_type == "Gateway"
+        assert s3_service == "com.amazonaws.us-east-1.s3"
+        assert dynamodb_service == "com.amazonaws.us-east-1.dynamodb"
+        assert len(private) == 2
+        assert sorted(s3_tables) == sorted(private)
+        assert sorted(dynamodb_tables) == sorted(private)
+
+    return pulumi.Output.all(
+        vpc.s3_endpoint.vpc_endpoint_type, vpc.s3_endpoint.service_name, vpc.s3_endpoint.route_table_ids,
+        vpc.dynamodb_endpoint.vpc_endpoint_type, vpc.dynamodb_endpoint.service_name,
+        vpc.dynamodb_endpoint.route_table_ids,
+        *[route_table.id for route_table in vpc.private_route_tables]
+    ).apply(check)
+
+
+@pulumi.runtime.test
+def test_s3_endpoint_policy_is_scoped_to_the_cv_bucket(infra):
+    vpc = infra.vpc
+
+    def check(policy):
+        statements = _statements(policy)
+        resources = [statement["Resource"] for statement in statements]
+        assert sorted(resources) == sorted([CV_BUCKET_ARN, f"{CV_BUCKET_ARN}/*"])
+        actions = {action for statement in statements for action in statement["Action"]}
+        assert {"s3:GetObject", "s3:PutObject", "s3:ListBucketVersions"} <= actions
+        assert not any(action.endswith("*") for action in actions)
+
+    return vpc.s3_endpoint.policy.apply(check)
+
+
+@pulumi.runtime.test
+def test_dynamodb_endpoint_policy_only_lists_project_tables(infra):
+    vpc, dynamo = infra.vpc, infra.dynamo
+
+    def check(args):
+        policy, *table_arns = args
+        statement, = _statements(policy)
+        resources = statement["Resource"]
+        assert set(table_arns) <= set(resources)
+        assert all(any(resource.startswith(arn) for arn in table_arns) for resource in resources)
+        assert not any(action.endswith("*") for action in statement["Action"])
+
+    return pulumi.Output.all(
+        vpc.dynamodb_endpoint.policy,
+        dynamo.dynamo_table.arn, dynamo.lsh_table.arn, dynamo.lane_slots_table.arn, dynamo.deferred_table.arn,
+        dynamo.llm_cache_table.arn
+    ).apply(check)
+
+
+@pulumi.runtime.test
+def test_each_private_subnet_routes_through_the_nat_gateway_of_its_az(infra):
+    vpc = infra.vpc
+
+    def check(args):
+        (subnet_1_az, subnet_2_az, table_1, table_2, private_1_id, private_2_id,
+         routes_1, routes_2, nat_1_id, nat_2_id, nat_1_subnet, nat_2_subnet,
+         public_1_id, public_2_id, public_1_az, public_2_az) = args
+
+        assert subnet_1_az != subnet_2_az
+        assert (table_1, table_2) == (private_1_id, private_2_id)
+        assert [_field(route, "nat_gateway_id") for route in routes_1] == [nat_1_id]
+        assert [_field(route, "nat_gateway_id") for route in routes_2] == [nat_2_id]
+        assert all(_field(route, "cidr_block") == "0.0.0.0/0" for route in routes_1 + routes_2)
+        assert (nat_1_subnet, nat_2_subnet) == (public_1_id, public_2_id)
+        assert (public_1_az, public_2_az) == (subnet_1_az, subnet_2_az)
+
+    return pulumi.Output.all(
+        vpc.private_subnet_1.availability_zone, vpc.private_subnet_2.availability_zone,
+        vpc.private_route_table_assoc_1.route_table_id, vpc.private_route_table_assoc_2.route_table_id,
+        vpc.private_route_table.id, vpc.private_route_table_2.id,
+        vpc.private_route_table.routes, vpc.private_route_table_2.routes,
+        vpc.nat_gateway.id, vpc.nat_gateway_2.id,
+        vpc.nat_gateway.subnet_id, vpc.nat_gateway_2.subnet_id,
+        vpc.public_subnet.id, vpc.public_subnet_2.id,
+        vpc.public_subnet.availability_zone, vpc.public_subnet_2.availability_zone
+    ).apply(check)
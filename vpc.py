@@ -1,6 +1,13 @@
 import pulumi
 import pulumi_aws as aws
+import json
 from utils import tags
+from lookups import config, region, availability_zones
+from s3 import cv_bucket
+from dynamo import dynamo_table, lsh_table, lane_slots_table, deferred_table, llm_cache_table
+
+# Un NAT Gateway por AZ para el tráfico restante hacia OpenAI (opcional)
+nat_gateway_per_az = config.get_bool("nat_gateway_per_az") or False
 
 # VPC principal
 vpc = aws.ec2.Vpc("main",
@@ -20,14 +27,14 @@ igw = aws.ec2.InternetGateway("main",
 private_subnet_1 = aws.ec2.Subnet("private-1",
     vpc_id=vpc.id,
     cidr_block="10.0.1.0/24",
-    availability_zone=aws.get_availability_zones().names[0],
+    availability_zone=availability_zones()[0],
     tags=tags | {"Name": "sillarcv-private-1"}
 )
 
 private_subnet_2 = aws.ec2.Subnet("private-2",
     vpc_id=vpc.id,
     cidr_block="10.0.2.0/24",
-    availability_zone=aws.get_availability_zones().names[1],
+    availability_zone=availability_zones()[1],
     tags=tags | {"Name": "sillarcv-private-2"}
 )
 
@@ -35,7 +42,7 @@ private_subnet_2 = aws.ec2.Subnet("private-2",
 public_subnet = aws.ec2.Subnet("public",
     vpc_id=vpc.id,
     cidr_block="10.0.0.0/24",
-    availability_zone=aws.get_availability_zones().names[0],
+    availability_zone=availability_zones()[0],
     map_public_ip_on_launch=True,
     tags=tags | {"Name": "sillarcv-public"}
 )
@@ -74,6 +81,47 @@ private_route_table = aws.ec2.RouteTable("private",
     tags=tags | {"Name": "sillarcv-private-rt"}
 )
 
+private_route_tables = [private_route_table]
+
+if nat_gateway_per_az:
+    # Segundo NAT Gateway en la otra AZ, cada subnet privada sale por el de su AZ
+    public_subnet_2 = aws.ec2.Subnet("public-2",
+        vpc_id=vpc.id,
+        cidr_block="10.0.3.0/24",
+        availability_zone=availability_zones()[1],
+        map_public_ip_on_launch=True,
+        tags=tags | {"Name": "sillarcv-public-2"}
+    )
+
+    eip_2 = aws.ec2.Eip("nat-2",
+        domain="vpc",
+        tags=tags | {"Name": "sillarcv-nat-eip-2"}
+    )
+
+    nat_gateway_2 = aws.ec2.NatGateway("nat-2",
+        allocation_id=eip_2.id,
+        subnet_id=public_subnet_2.id,
+        tags=tags | {"Name": "sillarcv-nat-2"}
+    )
+
+    private_route_table_2 = aws.ec2.RouteTable("private-2",
+        vpc_id=vpc.id,
+        routes=[
+            aws.ec2.RouteTableRouteArgs(
+                cidr_block="0.0.0.0/0",
+                nat_gateway_id=nat_gateway_2.id,
+            )
+        ],
+        tags=tags | {"Name": "sillarcv-private-rt-2"}
+    )
+
+    public_route_table_assoc_2 = aws.ec2.RouteTableAssociation("public-2",
+        subnet_id=public_subnet_2.id,
+        route_table_id=public_route_table.id
+    )
+
+    private_route_tables.append(private_route_table_2)
+
 # Asociaciones de tablas de ruteo
 public_route_table_assoc = aws.ec2.RouteTableAssociation("public",
     subnet_id=public_subnet.id,
@@ -87,7 +135,80 @@ private_route_table_assoc_1 = aws.ec2.RouteTableAssociation("private-1",
 
 private_route_table_assoc_2 = aws.ec2.RouteTableAssociation("private-2",
     subnet_id=private_subnet_2.id,
-    route_table_id=private_route_table.id
+    route_table_id=private_route_tables[-1].id
+)
+
+# Gateway endpoints: el tráfico a S3 y DynamoDB no pasa por el NAT Gateway
+s3_endpoint = aws.ec2.VpcEndpoint("s3",
+    vpc_id=vpc.id,
+    service_name=f"com.amazonaws.{region()}.s3",
+    vpc_endpoint_type="Gateway",
+    route_table_ids=[route_table.id for route_table in private_route_tables],
+    policy=pulumi.Output.all(cv_bucket.arn).apply(
+        lambda args: json.dumps({
+            "Version": "2012-10-17",
+            "Statement": [
+                {
+                    "Effect": "Allow",
+                    "Principal": "*",
+                    "Action": [
+                        "s3:GetObject",
+                        "s3:GetObjectVersion",
+                        "s3:GetObjectTagging",
+                        "s3:PutObject"
+                    ],
+                    "Resource": f"{args[0]}/*"
+                },
+                {
+                    "Effect": "Allow",
+                    "Principal": "*",
+                    "Action": [
+                        "s3:ListBucket",
+                        "s3:ListBucketVersions"
+                    ],
+                    "Resource": args[0]
+                }
+            ]
+        })
+    ),
+    tags=tags | {"Name": "sillarcv-s3-endpoint"}
+)
+
+dynamodb_endpoint = aws.ec2.VpcEndpoint("dynamodb",
+    vpc_id=vpc.id,
+    service_name=f"com.amazonaws.{region()}.dynamodb",
+    vpc_endpoint_type="Gateway",
+    route_table_ids=[route_table.id for route_table in private_route_tables],
+    policy=pulumi.Output.all(dynamo_table.arn, lsh_table.arn, lane_slots_table.arn, deferred_table.arn,
+                             llm_cache_table.arn).apply(
+        lambda args: json.dumps({
+            "Version": "2012-10-17",
+            "Statement": [{
+                "Effect": "Allow",
+                "Principal": "*",
+                "Action": [
+                    "dynamodb:GetItem",
+                    "dynamodb:PutItem",
+                    "dynamodb:UpdateItem",
+                    "dynamodb:DeleteItem",
+                    "dynamodb:Scan",
+                    "dynamodb:BatchGetItem",
+                    "dynamodb:BatchWriteItem",
+                    "dynamodb:Query"
+                ],
+                "Resource": [
+                    args[0],
+                    f"{args[0]}/index/*",
+                    args[1],
+                    args[2],
+                    args[3],
+                    f"{args[3]}/index/*",
+                    args[4]
+                ]
+            }]
+        })
+    ),
+    tags=tags | {"Name": "sillarcv-dynamodb-endpoint"}
 )
 
 # Security Group para las Lambdas
@@ -110,4 +231,6 @@ security_group_id = lambda_sg.id
 # Export the VPC ID
 pulumi.export("vpc_id", vpc.id)
 pulumi.export("private_subnet_ids", private_subnet_ids)
-pulumi.export("lambda_security_group_id", security_group_id)
\ No newline at end of file
+pulumi.export("lambda_security_group_id", security_group_id)
+pulumi.export("s3_endpoint_id", s3_endpoint.id)
+pulumi.export("dynamodb_endpoint_id", dynamodb_endpoint.id)
\ No newline at end of file